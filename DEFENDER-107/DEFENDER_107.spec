@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('img', 'img')],
+    datas=[('assets.pak', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
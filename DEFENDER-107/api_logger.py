@@ -1,11 +1,367 @@
 # api_logger.py
 # Singleton logger for sending game events and scores to remote API
 import requests
+import json
+import base64
 import threading
 import queue
 import time
 import sys
-from settings import API_URL
+import random
+import asyncio
+from collections import deque
+from urllib.parse import urlsplit
+import wire_format
+from async_http import AsyncHTTPConnection
+from settings import (API_URL, WIRE_FORMAT, WIRE_COMPRESSION, LOG_SUMMARY_INTERVAL,
+                      LOG_AGGREGATED_LEVELS, LOG_SAMPLE_RATES, LOG_RATE_CAPS,
+                      LOG_BACKEND, LOG_PUMP_BUDGET_MS, LOG_OUTBOX_BATCHES)
+
+SUMMARY_LEVEL = "SUMMARY"
+_MAX_MESSAGE = 200  # GameLog.message column size
+
+
+class LogAggregator:
+    """
+    Coalesces high-frequency levels (kills, pickups, damage, pilot idle/moving)
+    into per-interval counters and value histograms,
+    emitted as SUMMARY records ("LEVEL n=.. key:count ..", several levels per
+    record, separated by " | "). A sampled fraction of events (LOG_SAMPLE_RATES) is still
+    forwarded verbatim, and every level is capped at LOG_RATE_CAPS records per
+    interval; the overflow is reported in the summaries instead of being sent.
+    """
+    def __init__(self, interval=LOG_SUMMARY_INTERVAL, aggregated=LOG_AGGREGATED_LEVELS,
+                 sample_rates=LOG_SAMPLE_RATES, rate_caps=LOG_RATE_CAPS):
+        self.interval = interval
+        self.aggregated = frozenset(aggregated)
+        self.sample_rates = sample_rates
+        self.rate_caps = rate_caps
+        self.default_cap = rate_caps.get('default', 0)
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+        self._reset(time.time())
+
+    def _reset(self, now):
+        self._window_start = now
+        self._counters = {}   # level -> {key: count}
+        self._values = {}     # level -> [count, min, max, {log2 bucket: count}]
+        self._sent = {}       # level -> verbatim records this interval
+        self._dropped = {}    # level -> records over the rate cap
+
+    def admit(self, level, message, key=None, value=None):
+        """
+        Returns True if this event should be sent verbatim, False if it was
+        absorbed into the current summary.
+        """
+        with self._lock:
+            if level in self.aggregated:
+                keys = self._counters.get(level)
+                if keys is None:
+                    keys = self._counters[level] = {}
+                k = key if key is not None else message
+                keys[k] = keys.get(k, 0) + 1
+                if value is not None:
+                    self._add_value(level, value)
+                rate = self.sample_rates.get(level, 0.0)
+                if rate <= 0.0 or self._rng.random() >= rate:
+                    return False
+            # Rate cap applies to verbatim records of every level
+            cap = self.rate_caps.get(level, self.default_cap)
+            sent = self._sent.get(level, 0)
+            if cap and sent >= cap:
+                self._dropped[level] = self._dropped.get(level, 0) + 1
+                return False
+            self._sent[level] = sent + 1
+            return True
+
+    def _add_value(self, level, value):
+        h = self._values.get(level)
+        if h is None:
+            h = self._values[level] = [0, value, value, {}]
+        h[0] += 1
+        if value < h[1]: h[1] = value
+        if value > h[2]: h[2] = value
+        bucket = int(value).bit_length()  # power-of-two buckets: 0, 1, 2-3, 4-7, ...
+        h[3][bucket] = h[3].get(bucket, 0) + 1
+
+    def due(self, now=None):
+        return (now or time.time()) - self._window_start >= self.interval
+
+    def drain(self, now=None):
+        """Closes the current interval. Returns SUMMARY records as (level, message, ts_ms)."""
+        now = now or time.time()
+        with self._lock:
+            counters, values, dropped = self._counters, self._values, self._dropped
+            window = now - self._window_start
+            self._reset(now)
+        ts = int(now * 1000)
+        parts_by_level = []
+        for level, keys in counters.items():
+            total = sum(keys.values())
+            parts = [f"{level} n={total} in {window:.0f}s"]
+            for k, n in sorted(keys.items(), key=lambda kv: -kv[1]):
+                parts.append(f"{k}:{n}")
+            h = values.get(level)
+            if h:
+                parts.append(f"v={h[1]}..{h[2]}")
+                parts.append("h=" + ",".join(f"{(1 << b) >> 1}+:{n}" for b, n in sorted(h[3].items())))
+            parts_by_level.append(" ".join(parts)[:_MAX_MESSAGE])
+        if dropped:
+            msg = "rate-capped " + " ".join(f"{level}:{n}" for level, n in dropped.items())
+            parts_by_level.append(msg[:_MAX_MESSAGE])
+        # Several levels share one record as long as it fits the message column
+        records, current = [], ""
+        for part in parts_by_level:
+            if current and len(current) + 3 + len(part) > _MAX_MESSAGE:
+                records.append((SUMMARY_LEVEL, current, ts))
+                current = ""
+            current = f"{current} | {part}" if current else part
+        if current:
+            records.append((SUMMARY_LEVEL, current, ts))
+        return records
+
+
+class _Batcher:
+    """Shared flush policy of both backends: 10 records or 5 seconds, whichever comes first."""
+    def __init__(self, size=10, max_age=5):
+        self.size = size
+        self.max_age = max_age
+        self.records = []
+        self.last_flush = time.time()
+
+    def add(self, record):
+        self.records.append(record)
+
+    def extend(self, records):
+        self.records.extend(records)
+
+    def ready(self, now=None):
+        if not self.records:
+            return False
+        return len(self.records) >= self.size or (now or time.time()) - self.last_flush > self.max_age
+
+    def take(self):
+        records, self.records = self.records, []
+        self.last_flush = time.time()
+        return records
+
+
+# --- PATTERN: STRATEGY (delivery backends) ---
+# Both backends consume the same queues with the same batching policy and the same
+# encoding. Scores have their own unbounded queue (never dropped, sent at once);
+# the bounded event queue carries (priority, payload) tasks: 1 = logs (batched),
+# 0 = perf telemetry (held until nothing else is waiting to be sent).
+# The backends only differ in *where* the waiting happens:
+#   ThreadedBackend - a daemon thread blocking on the queue and on `requests` (original design)
+#   AsyncioBackend  - tasks on the game's own event loop, fed a small time slice per frame.
+#                     No threads, so it also runs in single-threaded runtimes (pygbag).
+class ThreadedBackend:
+    name = 'thread'
+
+    def __init__(self, logger):
+        self.logger = logger
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker_loop, daemon=True)
+            self._thread.start()
+
+    def _worker_loop(self):
+        logger = self.logger
+        batcher = _Batcher()
+        perf = []
+        while True:
+            try:
+                task = logger._queue.get(timeout=1)
+                if task is None: break
+                if task is not _WAKE:
+                    priority, payload = task
+                    if priority == 1:
+                        # Generic logs are batched
+                        batcher.add(payload)
+                    else:
+                        perf.extend(payload)
+            except queue.Empty:
+                pass
+            except Exception as e:
+                time.sleep(1)
+
+            # Scores: immediate, after the logs that came before them
+            scores = logger._take_scores()
+            if scores and batcher.records:
+                logger._deliver_sync('logs', batcher.take())
+            for payload in scores:
+                logger._deliver_sync('score', payload)
+
+            # Summaries ride along with the next batch
+            if logger._aggregator.due():
+                batcher.extend(logger._aggregator.drain())
+            if batcher.ready():
+                logger._deliver_sync('logs', batcher.take())
+            if perf and logger._queue.empty() and logger._scores.empty():
+                logger._deliver_sync('perf', perf)
+                perf = []
+
+        # Shutdown: don't lose the last interval
+        batcher.extend(logger._aggregator.drain())
+        if batcher.records:
+            logger._deliver_sync('logs', batcher.take())
+        for payload in logger._take_scores():
+            logger._deliver_sync('score', payload)
+        if perf:
+            logger._deliver_sync('perf', perf)
+
+    def pump(self, budget_ms=None):
+        pass  # The thread needs no help from the game loop
+
+    def shutdown(self):
+        self.logger._queue.put(None)
+        if self._thread:
+            self._thread.join(timeout=2) # Wait up to 2 seconds for worker to finish
+
+
+class AsyncioBackend:
+    name = 'asyncio'
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.loop = None
+        self._batcher = _Batcher()
+        self._perf = []
+        self._score_box = deque()  # Scores waiting for the sender: never dropped
+        self._outbox = deque()     # Log batches / perf: at most LOG_OUTBOX_BATCHES
+        self.dropped_batches = 0   # Oldest log batches dropped while the network was down
+        self._ready = None         # Set when either box gets something
+        self._sender_task = None
+        self._in_flight = None   # (kind, records) the sender is delivering right now
+        self._conn = None
+
+    def attach(self, loop):
+        self.loop = loop
+        self._ready = asyncio.Event()
+        self._sender_task = loop.create_task(self._sender())
+
+    def _send(self, kind, records):
+        if kind == 'score':
+            self._score_box.append((kind, records))
+        else:
+            if len(self._outbox) >= LOG_OUTBOX_BATCHES:
+                # Network down for a while: the oldest batch goes, memory stays bounded
+                for i, item in enumerate(self._outbox):
+                    if item[0] == 'logs':
+                        del self._outbox[i]
+                        self.dropped_batches += 1
+                        break
+                else:
+                    return # Only perf summaries waiting: drop the new one
+            self._outbox.append((kind, records))
+        self._ready.set()
+
+    def pump(self, budget_ms=LOG_PUMP_BUDGET_MS):
+        """
+        Called once per frame from the game loop. Moves queued events into batches
+        for at most `budget_ms`, then hands finished batches to the sender task.
+        Never waits on the network: the sender awaits I/O between frames.
+        """
+        if self.loop is None:
+            return
+        logger = self.logger
+        # Scores first, whatever the budget: they're few and must not wait
+        scores = logger._take_scores()
+        if scores and self._batcher.records:
+            self._send('logs', self._batcher.take())
+        for payload in scores:
+            self._send('score', payload)
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        while time.perf_counter() < deadline:
+            try:
+                task = logger._queue.get_nowait()
+            except queue.Empty:
+                break
+            if task is None or task is _WAKE:
+                continue
+            priority, payload = task
+            if priority == 1:
+                self._batcher.add(payload)
+            else:
+                self._perf.extend(payload)
+        if logger._aggregator.due():
+            self._batcher.extend(logger._aggregator.drain())
+        if self._batcher.ready():
+            self._send('logs', self._batcher.take())
+        if self._perf and not self._outbox and not self._score_box and logger._queue.empty():
+            self._send('perf', self._perf)
+            self._perf = []
+
+    async def _sender(self):
+        logger = self.logger
+        while True:
+            while not self._score_box and not self._outbox:
+                self._ready.clear()
+                await self._ready.wait()
+            box = self._score_box if self._score_box else self._outbox
+            kind, records = self._in_flight = box.popleft()
+            try:
+                await logger._deliver_async(self, kind, records)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            self._in_flight = None
+
+    async def post(self, url, body, headers):
+        if self.logger._is_web:
+            return _print_transport(url, body)
+        parts = urlsplit(url)
+        if self._conn is None:
+            self._conn = AsyncHTTPConnection(f"{parts.scheme}://{parts.netloc}", timeout=5)
+        status, _ = await self._conn.request("POST", parts.path, body, headers)
+        return status
+
+    def shutdown(self):
+        """Exit path: deliver whatever is left synchronously, the frame budget no longer matters."""
+        logger = self.logger
+        if self._sender_task is not None:
+            self._sender_task.cancel()
+        pending = []
+        if self._in_flight is not None:
+            # Interrupted mid-send: resent (a duplicate row beats a lost score)
+            pending.append(self._in_flight)
+            self._in_flight = None
+        pending.extend(self._score_box)
+        pending.extend(('score', payload) for payload in logger._take_scores())
+        pending.extend(self._outbox)
+        self._score_box.clear()
+        self._outbox.clear()
+        while True:
+            try:
+                task = logger._queue.get_nowait()
+            except queue.Empty:
+                break
+            if task is not None and task is not _WAKE:
+                priority, payload = task
+                if priority == 1:
+                    self._batcher.add(payload)
+                else:
+                    self._perf.extend(payload)
+        self._batcher.extend(logger._aggregator.drain())
+        if self._batcher.records:
+            pending.append(('logs', self._batcher.take()))
+        if self._perf:
+            pending.append(('perf', self._perf))
+            self._perf = []
+        for kind, records in pending:
+            logger._deliver_sync(kind, records)
+
+
+# Queued after a score so a backend blocked on the event queue wakes up for it
+_WAKE = (-1, None)
+
+def _print_transport(url, body):
+    """Web builds have no sockets: delivery ends in the browser console."""
+    print(f"[API] {url} <- {len(body)} bytes")
+    return 201
 
 
 # --- PATTERN: SINGLETON ---
@@ -15,94 +371,154 @@ class APILogger:
     _instance = None
     _url = API_URL
     _api_key = "Defender-gamo-pwd-2025" 
-    _queue = queue.Queue()
-    _worker_thread = None
+    # Bounded: if no backend ever drains it (tools, headless runs), events are dropped, not hoarded
+    _queue = queue.Queue(maxsize=5000)
+    # Scores only (a handful per session): unbounded, a score is never dropped
+    _scores = queue.Queue()
+    _backend = None
     _is_web = sys.platform == 'emscripten'
+    _wire_format = WIRE_FORMAT
+    # Built once, every request shares it
+    _headers = {"X-API-KEY": _api_key}
+    _aggregator = LogAggregator()
+    # Headless re-simulations (replay.py) must not report their events again
+    _muted = False
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(APILogger, cls).__new__(cls)
-            if not cls._instance._is_web:
-                cls._instance._start_worker()
-            else:
-                print("APILogger: Web Mode detected. Networking disabled.")
+            if cls._instance._is_web:
+                print("APILogger: Web Mode detected. Events are printed, not sent.")
+            if LOG_BACKEND == 'thread' and not cls._instance._is_web:
+                cls._instance._backend = ThreadedBackend(cls._instance)
+                cls._instance._backend.start()
+            # else: events queue up until the game loop calls attach_loop()
         return cls._instance
 
-    def _start_worker(self):
-        if self._worker_thread is None:
-            self._worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
-            self._worker_thread.start()
+    def attach_loop(self, loop=None):
+        """
+        Switch delivery onto the running asyncio loop (WarGame.run calls this).
+        Falls back to the threaded backend when LOG_BACKEND = 'thread'.
+        """
+        if self._backend is not None:
+            return self._backend
+        if LOG_BACKEND == 'asyncio' or self._is_web:
+            backend = AsyncioBackend(self)
+            backend.attach(loop or asyncio.get_running_loop())
+        else:
+            backend = ThreadedBackend(self)
+            backend.start()
+        APILogger._backend = backend
+        return backend
 
-    def _worker_loop(self):
-        batch = []
-        last_flush = time.time()
-        
-        while True:
-            try:
-                task = self._queue.get(timeout=1)
-                if task is None: break
-                
-                method, url, payload, headers, priority = task
-                
-                # Priority 2 = Immediate (Scores)
-                if priority >= 2:
-                    if batch:
-                        self._flush_batch(batch)
-                        batch = []
-                    try:
-                        requests.post(url, json=payload, headers=headers, timeout=5)
-                    except: pass
+    def pump(self, budget_ms=LOG_PUMP_BUDGET_MS):
+        """Per-frame hook for the asyncio backend; a no-op for the threaded one."""
+        if self._backend is not None:
+            self._backend.pump(budget_ms)
+
+    # --- Encoding (shared by both backends) ---
+    def _encode(self, kind, records, fmt):
+        """Returns (url, body, headers) for a 'logs' batch, a 'score' payload or 'perf' summaries."""
+        if kind == 'perf':
+            # A few records per session: JSON (gzipped with the compact format) is small enough
+            url = self._url.replace("/log", "/perf")
+            body = json.dumps(records, separators=(',', ':')).encode()
+            content_type = wire_format.JSON_CONTENT_TYPE
+        elif kind == 'logs':
+            url = self._url + "/batch"
+            if fmt == 'compact':
+                body, content_type = wire_format.encode_log_batch(records), wire_format.LOG_BATCH_CONTENT_TYPE
+            else:
+                body = json.dumps([{"level": l, "message": m, "ts": t} for l, m, t in records]).encode()
+                content_type = wire_format.JSON_CONTENT_TYPE
+        else:
+            url = self._url.replace("/log", "/score")
+            if fmt == 'compact':
+                body, content_type = wire_format.encode_score(*records), wire_format.SCORE_CONTENT_TYPE
+            else:
+                payload = {"username": records[0], "score": records[1]}
+                if len(records) > 2 and records[2]:
+                    payload["replay"] = base64.b64encode(records[2]).decode('ascii')
+                body = json.dumps(payload).encode()
+                content_type = wire_format.JSON_CONTENT_TYPE
+        headers = {"X-API-KEY": self._api_key, "Content-Type": content_type}
+        if fmt == 'compact':
+            body, encoding = wire_format.compress(body, WIRE_COMPRESSION)
+            if encoding:
+                headers["Content-Encoding"] = encoding
+        return url, body, headers
+
+    def _formats(self):
+        # If the server answers 415 Unsupported Media Type, fall back to JSON for the rest of the session
+        return ('compact', 'json') if self._wire_format == 'compact' else ('json',)
+
+    def _deliver_sync(self, kind, records):
+        try:
+            for fmt in self._formats():
+                url, body, headers = self._encode(kind, records, fmt)
+                if self._is_web:
+                    status = _print_transport(url, body)
                 else:
-                    # Generic logs are batched
-                    batch.append(payload)
-                
-                # Check flush conditions
-                if len(batch) >= 10 or (time.time() - last_flush > 5 and batch):
-                    self._flush_batch(batch)
-                    batch = []
-                    last_flush = time.time()
-                
-                self._queue.task_done()
-            except queue.Empty:
-                if batch and time.time() - last_flush > 5:
-                    self._flush_batch(batch)
-                    batch = []
-                    last_flush = time.time()
+                    status = requests.post(url, data=body, headers=headers, timeout=5).status_code
+                if status == 415 and fmt == 'compact':
+                    APILogger._wire_format = 'json'
+                    continue
+                return status
+        except: pass
+
+    async def _deliver_async(self, backend, kind, records):
+        for fmt in self._formats():
+            url, body, headers = self._encode(kind, records, fmt)
+            status = await backend.post(url, body, headers)
+            if status == 415 and fmt == 'compact':
+                APILogger._wire_format = 'json'
                 continue
-            except Exception as e:
-                time.sleep(1)
+            return status
 
-    def _flush_batch(self, batch):
+    def _enqueue(self, task):
         try:
-            batch_url = self._url + "/batch"
-            headers = {"X-API-KEY": self._api_key}
-            requests.post(batch_url, json=batch, headers=headers, timeout=5)
-        except: pass
+            self._queue.put_nowait(task)
+        except queue.Full:
+            pass # Full queue: logs and perf summaries are dropped
 
-    def log(self, level, message):
-        if self._is_web:
-            print(f"[LOG] {level}: {message}")
-            return
+    def _take_scores(self):
+        scores = []
+        while True:
+            try:
+                scores.append(self._scores.get_nowait())
+            except queue.Empty:
+                return scores
 
-        headers = {"X-API-KEY": self._api_key}
-        payload = {"level": level, "message": message}
+    # --- Public API ---
+    def log(self, level, message, key=None, value=None):
+        """
+        key/value feed the aggregated levels (LOG_AGGREGATED_LEVELS): `key` is counted
+        (defaults to the message) and numeric `value` goes into the level's histogram.
+        """
+        if self._muted or not self._aggregator.admit(level, message, key, value):
+            return
+        # (level, message, client timestamp in ms) - encoded at flush time
         # Priority 1 for normal logs (batched)
-        self._queue.put(('POST', self._url, payload, headers, 1))
+        self._enqueue((1, (level, message, int(time.time() * 1000))))
 
-    def submit_score(self, username, score):
-        if self._is_web:
-            print(f"[SCORE] {username}: {score} (Local Only)")
+    def submit_score(self, username, score, replay=None):
+        """replay: optional encoded replay (replay.Replay.to_bytes) the server can verify."""
+        if self._muted:
             return
+        # Own queue: sent immediately, and a full event queue can't drop it
+        self._scores.put_nowait((username, score, replay))
+        self._enqueue(_WAKE)
 
-        headers = {"X-API-KEY": self._api_key}
-        payload = {"username": username, "score": score}
-        score_url = self._url.replace("/log", "/score")
-        # Priority 2 for scores (immediate)
-        self._queue.put(('POST', score_url, payload, headers, 2))
+    def report_perf(self, summaries):
+        """Frame-time summaries (perf_telemetry.py). Priority 0: sent when the queue is idle."""
+        if self._muted:
+            return
+        self._enqueue((0, summaries))
+
+    @classmethod
+    def set_muted(cls, muted):
+        cls._muted = muted
 
     def shutdown(self):
-        if self._is_web:
-            return
-        self._queue.put(None)
-        if self._worker_thread:
-            self._worker_thread.join(timeout=2) # Wait up to 2 seconds for worker to finish
+        if self._backend is not None:
+            self._backend.shutdown()
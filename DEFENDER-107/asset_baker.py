@@ -0,0 +1,84 @@
+# asset_baker.py
+# Startup asset pipeline: independent decode/scale/procedural jobs on a thread pool.
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# --- PATTERN: PRODUCER / CONSUMER ---
+# Each job is split in two halves:
+#   build()         runs on a pool thread and returns the finished asset. Image decode,
+#                   scaling and WAV decoding release the GIL inside SDL, so these overlap.
+#   install(asset)  runs on the main thread (poll/wait) and publishes it, so the cached
+#                   globals the draw() code reads only ever change between frames.
+# Jobs belong to a group ('menu', 'game'): a screen waits only for its own group.
+class AssetBaker:
+    def __init__(self, workers=4):
+        # Browsers (pygbag) have no threads: build inline, in order
+        self.workers = 0 if sys.platform == 'emscripten' else workers
+        self._pool = None
+        self._lock = threading.Lock()
+        self._jobs = []            # [name, group, future_or_result, install, installed]
+        self.timings = {}          # name -> build seconds
+        self.started_at = time.perf_counter()
+
+    def add(self, name, group, build, install):
+        """Queue a job. With workers=0 it is built and installed immediately."""
+        if self.workers <= 0:
+            asset = self._run(name, build)
+            self._install(name, install, asset)
+            self._jobs.append([name, group, None, install, True])
+            return
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="asset")
+        future = self._pool.submit(self._run, name, build)
+        with self._lock:
+            self._jobs.append([name, group, future, install, False])
+
+    def _run(self, name, build):
+        start = time.perf_counter()
+        try:
+            return build()
+        except Exception as e:
+            print(f"ASSETS: [ERROR] {name} failed to bake: {e}")
+            return None
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    def _install(self, name, install, asset):
+        if asset is None:
+            return  # Keep the fallback (DUMMY_SURF etc.)
+        try:
+            install(asset)
+        except Exception as e:
+            print(f"ASSETS: [ERROR] {name} failed to install: {e}")
+
+    def poll(self):
+        """Install every finished job. Main thread only; cheap enough to call every frame."""
+        with self._lock:
+            pending = [job for job in self._jobs if not job[4] and job[2].done()]
+        for job in pending:
+            self._install(job[0], job[3], job[2].result())
+            job[4] = True
+        return len(pending)
+
+    def wait(self, group=None):
+        """Block until every job of `group` (or all jobs) is built, then install them."""
+        with self._lock:
+            futures = [job[2] for job in self._jobs
+                       if not job[4] and (group is None or job[1] == group)]
+        for future in futures:
+            future.result()
+        self.poll()
+
+    def ready(self, group=None):
+        self.poll()
+        with self._lock:
+            return all(job[4] for job in self._jobs if group is None or job[1] == group)
+
+    def progress(self, group=None):
+        """(installed, total) for a group or all jobs."""
+        with self._lock:
+            jobs = [job for job in self._jobs if group is None or job[1] == group]
+        return sum(1 for job in jobs if job[4]), len(jobs)
@@ -0,0 +1,142 @@
+# asset_pack.py
+# Single-file asset bundle (assets.pak, written by build_assets.py).
+#
+# Layout (little endian):
+#   header   MAGIC, entry count
+#   table    one fixed-size ENTRY per asset: name, kind, format fields, offset, size
+#   data     payloads, each aligned to DATA_ALIGN bytes
+# Payloads are stored ready to use: images as the scaled sprite's pixels in the
+# display's 32-bit order (BGRA), sounds as PCM in the mixer's sample format, anything
+# else (music) as the original file bytes.
+#
+# At runtime the file is memory-mapped once; a lookup is one dict access and an image
+# is a Surface over a slice of the mapping (pygame.image.frombuffer, no copy, no decode).
+import mmap
+import os
+import struct
+import sys
+
+import pygame
+from settings import ASSET_PACK_FILE
+
+MAGIC = b'D107PAK1'
+HEADER = struct.Struct('<8sI')                # magic, entry count
+ENTRY = struct.Struct('<48sBBHHhIII')         # name, kind, channels, w, h, sample format, rate, offset, size
+DATA_ALIGN = 16
+
+KIND_IMAGE = 1  # w x h BGRA pixels
+KIND_PCM = 2    # raw samples: sample format, channels, rate
+KIND_RAW = 3    # file bytes as-is
+PIXEL_FORMAT = 'BGRA'
+
+
+def resource_path(path):
+    """Absolute path of a file shipped next to the game (or inside a PyInstaller bundle)."""
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    if hasattr(sys, '_MEIPASS'):
+        base_dir = sys._MEIPASS
+    return os.path.join(base_dir, *path.replace('\\', '/').split('/'))
+
+def image_key(path, size):
+    """Pack name of an image file scaled to `size` ('img/enemy1.png@60x60')."""
+    path = path.replace('\\', '/')
+    return f"{path}@{size[0]}x{size[1]}"
+
+
+# --- WRITER (build time) ---
+def write_pack(path, entries):
+    """
+    entries: [(name, kind, meta, payload)] with meta = {'size': (w, h)} for images,
+    {'format': ..., 'channels': ..., 'rate': ...} for PCM, {} for raw bytes.
+    """
+    table_end = HEADER.size + ENTRY.size * len(entries)
+    offset = _align(table_end)
+    table, blobs = [], []
+    for name, kind, meta, payload in entries:
+        encoded = name.encode('utf-8')
+        if len(encoded) > 48:
+            raise ValueError(f"asset name too long for the pack table: {name}")
+        w, h = meta.get('size', (0, 0))
+        table.append(ENTRY.pack(encoded, kind, meta.get('channels', 0), w, h,
+                                meta.get('format', 0), meta.get('rate', 0), offset, len(payload)))
+        blobs.append((offset, payload))
+        offset = _align(offset + len(payload))
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(entries)))
+        f.write(b''.join(table))
+        for start, payload in blobs:
+            f.write(b'\0' * (start - f.tell()))
+            f.write(payload)
+    os.replace(tmp, path) # A running game never maps a half-written pack
+    return offset
+
+def _align(n):
+    return (n + DATA_ALIGN - 1) // DATA_ALIGN * DATA_ALIGN
+
+
+# --- READER (runtime) ---
+class AssetPack:
+    """
+    Index of one pack file. A missing or unreadable pack is an empty index, so every
+    lookup misses and the loaders use loose files / procedural drawing instead.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}   # name -> (kind, channels, w, h, sample format, rate, offset, size)
+        self._map = None
+        self._view = None
+        try:
+            if os.path.exists(path):
+                self._open(path)
+        except Exception as e:
+            print(f"ASSETS: [WARNING] Ignoring asset pack {path}: {e}")
+            self.entries = {}
+
+    def _open(self, path):
+        with open(path, 'rb') as f:
+            # Copy-on-write mapping: pages are shared with the file until a sprite is drawn on
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        self._view = memoryview(self._map)
+        magic, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError("not an asset pack")
+        for i in range(count):
+            name, *fields = ENTRY.unpack_from(self._map, HEADER.size + i * ENTRY.size)
+            self.entries[name.rstrip(b'\0').decode('utf-8')] = tuple(fields)
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def image(self, name):
+        """Surface sharing the mapped pixels, or None."""
+        entry = self.entries.get(name)
+        if entry is None or entry[0] != KIND_IMAGE:
+            return None
+        _, _, w, h, _, _, offset, size = entry
+        return pygame.image.frombuffer(self._view[offset:offset + size], (w, h), PIXEL_FORMAT)
+
+    def sound(self, name):
+        """pygame Sound from the packed PCM, or None (also when the mixer runs another format)."""
+        entry = self.entries.get(name)
+        if entry is None or entry[0] != KIND_PCM:
+            return None
+        _, channels, _, _, sample_format, rate, offset, size = entry
+        if pygame.mixer.get_init() != (rate, sample_format, channels):
+            print(f"ASSETS: [WARNING] {name} packed as {rate}Hz/{sample_format}/{channels}ch, "
+                  f"mixer is {pygame.mixer.get_init()}")
+            return None
+        return pygame.mixer.Sound(buffer=self._view[offset:offset + size])
+
+    def raw(self, name):
+        """Read-only view of a raw payload, or None."""
+        entry = self.entries.get(name)
+        if entry is None or entry[0] != KIND_RAW:
+            return None
+        offset, size = entry[6], entry[7]
+        return self._view[offset:offset + size].toreadonly()
+
+ASSET_PACK = AssetPack(resource_path(ASSET_PACK_FILE))
@@ -0,0 +1,90 @@
+# async_http.py
+# Minimal asyncio HTTP/1.1 client (keep-alive, Content-Length bodies only).
+# Used where a blocking `requests` call is not an option: the load generator
+# and the asyncio APILogger backend. Standard library only, so it also runs
+# in builds where aiohttp/httpx are unavailable.
+import asyncio
+from urllib.parse import urlsplit
+
+
+class HTTPError(Exception):
+    pass
+
+
+class AsyncHTTPConnection:
+    """One persistent connection to a single host. Not safe for concurrent requests."""
+
+    def __init__(self, base_url, timeout=5):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"unsupported scheme {parts.scheme}")
+        self.host = parts.hostname
+        self.ssl = parts.scheme == "https"
+        self.port = parts.port or (443 if self.ssl else 80)
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self.ssl or None), self.timeout)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except Exception:
+                pass
+        self._reader = self._writer = None
+
+    async def request(self, method, path, body=b"", headers=None):
+        """Returns (status, body bytes). Reconnects once if the kept-alive socket was closed."""
+        for attempt in (0, 1):
+            if self._writer is None:
+                await self._connect()
+            try:
+                return await asyncio.wait_for(self._roundtrip(method, path, body, headers), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                if attempt:
+                    raise
+            except BaseException:
+                # Timeouts/cancellation leave the stream in an unknown state
+                await self.close()
+                raise
+
+    async def _roundtrip(self, method, path, body, headers):
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                 f"Content-Length: {len(body)}"]
+        for k, v in (headers or {}).items():
+            lines.append(f"{k}: {v}")
+        self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await self._writer.drain()
+
+        status_line = await self._reader.readuntil(b"\r\n")
+        if not status_line:
+            raise ConnectionError("connection closed")
+        try:
+            status = int(status_line.split(b" ", 2)[1])
+        except (IndexError, ValueError):
+            raise HTTPError(f"bad status line {status_line!r}")
+
+        length = 0
+        keep_alive = True
+        while True:
+            line = await self._reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            if name == "content-length":
+                length = int(value.strip())
+            elif name == "connection" and value.strip().lower() == "close":
+                keep_alive = False
+            elif name == "transfer-encoding":
+                raise HTTPError("chunked responses are not supported")
+        data = await self._reader.readexactly(length) if length else b""
+        if not keep_alive:
+            await self.close()
+        return status, data
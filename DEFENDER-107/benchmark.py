@@ -0,0 +1,828 @@
+# benchmark.py
+# Offline performance benchmarks for the client/server stack.
+# Usage: python benchmark.py <suite> [options]   (python benchmark.py -h for the list)
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import wire_format
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _sample_events(count):
+    """Real log events from the bundled dev database, synthetic ones if it's missing."""
+    events = []
+    db_path = os.path.join(BASE_DIR, 'instance', 'game_data.db')
+    if os.path.exists(db_path):
+        try:
+            conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+            rows = conn.execute("SELECT level, message FROM game_log ORDER BY id").fetchall()
+            conn.close()
+            events = [(level, message) for level, message in rows]
+        except sqlite3.Error:
+            events = []
+    if not events:
+        rng = random.Random(107)
+        for i in range(500):
+            events.append(rng.choice([
+                ("ENTITY_DESTROY", f"Drone destroyed. Score: {i * 100}"),
+                ("PICKUP", "Collected SHIELD PowerUp"),
+                ("DAMAGE", f"Hull Integrity Critical. Lives: {rng.randint(0, 3)}"),
+                ("CHARACTER_STATE", "Pilot -> Moving"),
+                ("GAME", f"Wave {rng.randint(1, 10)} Spawning"),
+            ]))
+    ts = int(time.time() * 1000)
+    out = []
+    for i in range(count):
+        level, message = events[i % len(events)]
+        ts += random.randint(0, 400)
+        out.append((level, message, ts))
+    return out
+
+
+def _timeit(fn, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - start) / repeat
+
+
+# --- SUITE: WIRE FORMAT ---
+def bench_wire(args):
+    """Bytes per event and server-side parse CPU, JSON vs compact encoding."""
+    events = _sample_events(args.batches * args.batch_size)
+    batches = [events[i:i + args.batch_size] for i in range(0, len(events), args.batch_size)]
+
+    def as_json(batch):
+        return json.dumps([{"level": l, "message": m, "ts": t} for l, m, t in batch]).encode()
+
+    variants = {
+        "json": (lambda b: (as_json(b), None), lambda body, enc: json.loads(body)),
+        "json+gzip": (lambda b: wire_format.compress(as_json(b), "gzip"),
+                      lambda body, enc: json.loads(wire_format.decompress(body, enc))),
+        "compact": (lambda b: (wire_format.encode_log_batch(b), None),
+                    lambda body, enc: wire_format.decode_log_batch(body)),
+        "compact+gzip": (lambda b: wire_format.compress(wire_format.encode_log_batch(b), "gzip"),
+                         lambda body, enc: wire_format.decode_log_batch(wire_format.decompress(body, enc))),
+    }
+    if wire_format.zstandard is not None:
+        variants["compact+zstd"] = (
+            lambda b: wire_format.compress(wire_format.encode_log_batch(b), "zstd"),
+            lambda body, enc: wire_format.decode_log_batch(wire_format.decompress(body, enc)))
+
+    # The real client sends one request header per batch, count it too
+    header_bytes = len("X-API-KEY: Defender-gamo-pwd-2025\r\n")
+    print(f"{len(events)} events in batches of {args.batch_size}\n")
+    print(f"{'format':<14}{'bytes/event':>12}{'parse us/event':>16}")
+    for name, (encode, decode) in variants.items():
+        bodies = [encode(b) for b in batches]
+        total = sum(len(body) + header_bytes for body, _ in bodies)
+        cpu = _timeit(lambda: [decode(body, enc) for body, enc in bodies], args.repeat)
+        print(f"{name:<14}{total / len(events):>12.1f}{cpu / len(events) * 1e6:>16.2f}")
+
+
+# --- SUITE: SERVER BOOT ---
+def _boot_once(workers, preload, tmp_dir):
+    """Seconds from gunicorn launch until every worker has finished post_worker_init."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    boot_log = os.path.join(tmp_dir, f"boot-{workers}-{int(preload)}.log")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp_dir, 'boot.db')}",
+               DEFENDER_BOOT_LOG=boot_log, GUNICORN_PRELOAD='1' if preload else '0')
+    start = time.time()
+    proc = subprocess.Popen(['gunicorn', '-c', 'gunicorn.conf.py', 'server:app', '-w', str(workers),
+                             '-b', f'127.0.0.1:{port}', '--log-level', 'warning'], cwd=BASE_DIR, env=env)
+    try:
+        deadline = start + 60
+        while time.time() < deadline:
+            if os.path.exists(boot_log):
+                with open(boot_log) as f:
+                    stamps = [float(line.split()[1]) for line in f if line.strip()]
+                if len(stamps) >= workers:
+                    return max(stamps) - start
+            if proc.poll() is not None:
+                raise RuntimeError("gunicorn exited during boot")
+            time.sleep(0.01)
+        raise RuntimeError("workers did not boot within 60s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+def bench_boot(args):
+    """Time for all gunicorn workers to be ready, preloaded app vs per-worker import."""
+    if not shutil.which('gunicorn'):
+        print("gunicorn is not installed")
+        return
+    tmp_dir = tempfile.mkdtemp(prefix='defender-boot-')
+    try:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp_dir, 'boot.db')}")
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'server', 'init-db'],
+                       cwd=BASE_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+        print(f"{'workers':>8}{'preload s':>12}{'no-preload s':>14}")
+        for workers in args.workers:
+            results = []
+            for preload in (True, False):
+                runs = [_boot_once(workers, preload, tmp_dir) for _ in range(args.repeat)]
+                results.append(min(runs))
+            print(f"{workers:>8}{results[0]:>12.3f}{results[1]:>14.3f}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+# --- SUITE: GAME STARTUP ---
+_STARTUP_MARKS = ('first_frame', 'menu_ready', 'assets_ready')
+
+def _startup_once(workers, tmp_dir):
+    """Seconds from launching the game to each startup mark (see WarGame._log_startup)."""
+    log = os.path.join(tmp_dir, f"startup-{workers}-{time.time_ns()}.log")
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy', DEFENDER_STARTUP_LOG=log)
+    code = ("import settings; settings.ASSET_WORKERS = %d\n"
+            "import asyncio, main; asyncio.run(main.main())" % workers)
+    start = time.time()
+    proc = subprocess.Popen([sys.executable, '-c', code], cwd=BASE_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = start + 60
+        while time.time() < deadline:
+            if os.path.exists(log):
+                with open(log) as f:
+                    marks = dict(line.split() for line in f if line.strip())
+                if all(name in marks for name in _STARTUP_MARKS):
+                    return {name: float(marks[name]) - start for name in _STARTUP_MARKS}
+            if proc.poll() is not None:
+                raise RuntimeError("game exited during startup")
+            time.sleep(0.005)
+        raise RuntimeError("game did not finish loading within 60s")
+    finally:
+        proc.kill()
+        proc.wait(timeout=10)
+
+def bench_startup(args):
+    """Time to first frame, to an interactive menu and to all assets: serial vs thread pool."""
+    tmp_dir = tempfile.mkdtemp(prefix='defender-startup-')
+    try:
+        print(f"{'asset workers':>14}{'first frame s':>15}{'menu s':>9}{'all assets s':>14}")
+        for workers in args.workers:
+            runs = [_startup_once(workers, tmp_dir) for _ in range(args.repeat)]
+            best = {name: min(r[name] for r in runs) for name in _STARTUP_MARKS}
+            label = f"{workers}" if workers else "0 (serial)"
+            print(f"{label:>14}{best['first_frame']:>15.3f}{best['menu_ready']:>9.3f}{best['assets_ready']:>14.3f}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+# --- SUITE: CLIENT LOG AGGREGATION ---
+def bench_logging(args):
+    """Records, bytes and client CPU for one game's events, raw vs LogAggregator."""
+    import queue
+    from api_logger import LogAggregator
+    events = _sample_events(args.events)
+    # The historical DB predates per-frame pilot state logging: add the idle/moving
+    # flips a mouse resting on the window edge produces during live play
+    if args.flips_per_sec > 0:
+        start, end = events[0][2], events[-1][2]
+        step = int(1000 / args.flips_per_sec)
+        flips = [("CHARACTER_STATE", "Pilot -> Idle" if i % 2 else "Pilot -> Moving", ts)
+                 for i, ts in enumerate(range(start, end, step))]
+        events = sorted(events + flips, key=lambda e: e[2])
+    # Hot-path key/value the game passes for aggregated levels (see states.py)
+    def key_value(level, message):
+        if level == "ENTITY_DESTROY":
+            name, _, score = message.partition(" destroyed. Score: ")
+            return name, int(score) if score.isdigit() else None
+        if level == "DAMAGE":
+            return "HULL", int(message[-1]) if message[-1].isdigit() else None
+        return None, None
+    def key_value_or_state(level, message):
+        if level == "CHARACTER_STATE":
+            return message.rpartition(" ")[2], None
+        return key_value(level, message)
+    prepared = [(l, m, t) + key_value_or_state(l, m) for l, m, t in events]
+    api_key = "Defender-gamo-pwd-2025"
+
+    def run_raw():
+        # What APILogger.log did per event before aggregation
+        q = queue.Queue()
+        for level, message, ts, _, _ in prepared:
+            headers = {"X-API-KEY": api_key}
+            payload = {"level": level, "message": message}
+            q.put(('POST', "/log", payload, headers, 1))
+        return [(p["level"], p["message"], ts) for (_, _, p, _, _), (_, _, ts, _, _) in zip(q.queue, prepared)]
+
+    def run_aggregated():
+        agg = LogAggregator()
+        q = queue.Queue()
+        out = []
+        window_end = prepared[0][2] + agg.interval * 1000
+        for level, message, ts, key, value in prepared:
+            if ts >= window_end:
+                out.extend(agg.drain(ts / 1000.0))
+                window_end = ts + agg.interval * 1000
+            if agg.admit(level, message, key, value):
+                q.put(('POST', "/log", (level, message, ts), None, 1))
+                out.append((level, message, ts))
+        out.extend(agg.drain(prepared[-1][2] / 1000.0))
+        return out
+
+    seconds = (events[-1][2] - events[0][2]) / 1000.0
+    print(f"{len(events)} events over {seconds:.0f}s of simulated play\n")
+    print(f"{'mode':<12}{'records':>9}{'bytes':>9}{'client us/event':>17}")
+    for name, fn in (("raw", run_raw), ("aggregated", run_aggregated)):
+        records = fn()
+        size = sum(len(wire_format.compress(wire_format.encode_log_batch(records[i:i + 10]), "gzip")[0])
+                   for i in range(0, len(records), 10))
+        cpu = _timeit(fn, args.repeat)
+        print(f"{name:<12}{len(records):>9}{size:>9}{cpu / len(events) * 1e6:>17.2f}")
+
+
+# --- SUITE: REPLAY RE-SIMULATION ---
+def _bot_replay(seed, max_ticks=60 * 60 * 5):
+    """A recorded game played by a jittery random pilot (for trees without real replays)."""
+    import replay
+    replay.init_headless()
+    from states import WarState
+    from settings import SCREEN_WIDTH
+    game = replay.HeadlessGame()
+    state = WarState(seed=seed, headless=True, scenario='campaign')
+    bot = random.Random(seed * 7919)
+    x = SCREEN_WIDTH // 2
+    for _ in range(max_ticks):
+        if bot.random() < 0.05:
+            x = max(1, min(SCREEN_WIDTH - 1, x + bot.randint(-200, 200)))
+        state.queue_input(replay.InputFrame(x, bot.random() < 0.02, bot.random() < 0.02,
+                                            1 if bot.random() < 0.15 else 0, False))
+        state.update(game)
+        if game.finished:
+            break
+    return state.replay or state.recorder.finish(state)
+
+def _load_replays(files, count):
+    import replay
+    if files:
+        return [replay.Replay.load(path) for path in files]
+    folder = os.path.join(BASE_DIR, 'replays')
+    found = sorted(os.path.join(folder, f) for f in os.listdir(folder)
+                   if f.endswith(replay.FILE_EXTENSION)) if os.path.isdir(folder) else []
+    if found:
+        return [replay.Replay.load(path) for path in found[:count]]
+    print(f"no recorded replays in {folder}, using {count} bot games")
+    return [_bot_replay(seed) for seed in range(1, count + 1)]
+
+def bench_replay(args):
+    """Replay file size and headless re-simulation speed (ticks/s) on recorded games."""
+    import replay
+    replays = _load_replays(args.files, args.count)
+    ticks = sum(len(r.frames) for r in replays)
+    size = sum(len(r.to_bytes()) for r in replays)
+    start = time.process_time()
+    mismatches = 0
+    for _ in range(args.repeat):
+        for r in replays:
+            if r.outcome and replay.play(r) != r.outcome:
+                mismatches += 1
+    cpu = (time.process_time() - start) / args.repeat
+    print(f"{len(replays)} replays, {ticks} ticks ({ticks / 60:.0f}s of play)\n")
+    print(f"{'bytes/tick':>11}{'ticks/s':>12}{'x realtime':>12}{'mismatches':>12}")
+    print(f"{size / ticks:>11.2f}{ticks / cpu:>12.0f}{ticks / cpu / 60:>12.0f}{mismatches:>12}")
+
+
+# --- SUITE: SERVER REPLAY VERIFICATION ---
+def bench_verify(args):
+    """Replays verified per second (and per core) by the server's process pool."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    import verifier
+    replays = _load_replays(args.files, args.count)
+    jobs = [(r.to_bytes(), r.outcome['score'] if r.outcome else 0, r.pilot) for r in replays]
+    ticks = sum(len(r.frames) for r in replays)
+    print(f"{len(jobs)} replays, {ticks / len(jobs):.0f} ticks each on average, {os.cpu_count()} cores\n")
+    print(f"{'workers':>8}{'replays/s':>11}{'per core':>10}{'ticks/s':>10}{'verified':>10}")
+    for workers in args.workers:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=verifier._init_worker) as pool:
+            # Warm-up: every process imported pygame and baked its assets
+            list(pool.map(verifier.verify_replay, [jobs[0][0]] * workers, [jobs[0][1]] * workers,
+                          [jobs[0][2]] * workers, [args.budget] * workers))
+            start = time.perf_counter()
+            results = list(pool.map(verifier.verify_replay, [d for d, _, _ in jobs], [s for _, s, _ in jobs],
+                                    [p for _, _, p in jobs], [args.budget] * len(jobs)))
+            elapsed = time.perf_counter() - start
+        ok = sum(1 for r in results if r['status'] == 'verified')
+        rate = len(jobs) / elapsed
+        print(f"{workers:>8}{rate:>11.1f}{rate / min(workers, os.cpu_count() or 1):>10.1f}{ticks / elapsed:>10.0f}{ok:>10}")
+
+
+# --- SUITE: SWARM STRESS SCENARIO ---
+def _swarm_run(ticks, spawn_per_tick, seed):
+    import pygame
+    import replay
+    from states import WarState
+    from settings import SCREEN_WIDTH, SCREEN_HEIGHT
+    from waves import SCENARIOS
+    cfg = SCENARIOS['swarm']
+    saved = cfg['spawn_per_tick']
+    cfg['spawn_per_tick'] = spawn_per_tick
+    try:
+        game = replay.HeadlessGame()
+        game.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        game.state = state = WarState(seed=seed, scenario='swarm')
+        updates, draws, spawning, peak = [], [], [], 0
+        for i in range(ticks):
+            state.queue_input(replay.InputFrame(SCREEN_WIDTH // 2 + (i % 240) - 120, False, False, i % 6 == 0, False))
+            releasing = bool(state.director.pending) or i == 0
+            start = time.perf_counter()
+            state.update(game)
+            mid = time.perf_counter()
+            state.draw(game)
+            updates.append(mid - start)
+            draws.append(time.perf_counter() - mid)
+            if releasing:
+                spawning.append(mid - start)
+            peak = max(peak, len(state.squadron.children) + len(state.obstacles))
+    finally:
+        cfg['spawn_per_tick'] = saved
+    return updates, draws, spawning, peak
+
+def bench_swarm(args):
+    """Frame cost with thousands of entities: spread spawning vs the whole wave in one tick."""
+    import replay
+    replay.init_headless()
+    from waves import SCENARIOS
+    director_cfg = SCENARIOS['swarm']
+    print(f"swarm scenario, {args.ticks} ticks, wave 1 = {director_cfg['count'][0] + int(director_cfg['count'][1])} enemies,"
+          f" median of {args.runs} runs\n")
+    print(f"{'spawning':>14}{'peak ents':>11}{'spawn max':>11}{'upd p50':>9}{'upd p99':>9}{'upd max':>9}{'draw p50':>10}")
+    pct = lambda xs, q: xs[min(len(xs) - 1, int(len(xs) * q))] * 1000
+    for label, per_tick in (('spread', director_cfg['spawn_per_tick']), ('burst', None)):
+        # Single-core timings are noisy: each column is the median over the runs
+        rows = []
+        for _ in range(args.runs):
+            updates, draws, spawning, peak = _swarm_run(args.ticks, per_tick, args.seed)
+            updates.sort()
+            draws.sort()
+            rows.append((peak, max(spawning) * 1000, pct(updates, 0.5), pct(updates, 0.99),
+                         updates[-1] * 1000, pct(draws, 0.5)))
+        peak, spawn_max, p50, p99, top, draw = [statistics.median(col) for col in zip(*rows)]
+        name = f"{label} ({per_tick or 'all'})"
+        print(f"{name:>14}{peak:>11.0f}{spawn_max:>11.2f}{p50:>9.2f}{p99:>9.2f}{top:>9.2f}{draw:>10.2f}")
+    print("\n(ms per tick; the frame budget at 60 FPS is 16.7 ms. 'spawn max' is the worst tick\n"
+          " while the wave is being released; the other columns are dominated by the ticks\n"
+          " with the whole wave alive, which cost the same in both modes)")
+
+
+# --- SUITE: ENTITY POOLS ---
+def _pool_run(ticks, seed, pooled, tuple_frames=False):
+    import gc
+    import replay
+    from states import WarState
+    from settings import SCREEN_WIDTH
+    from entities import POOLS
+    from pools import Pool
+    release = Pool.release
+    record = replay.ReplayRecorder.record
+    if not pooled:
+        Pool.release = lambda self, obj: None # Dropped entities are left to the GC
+    if tuple_frames:
+        # The recorder as it was: one InputFrame kept alive per tick
+        kept = []
+        replay.ReplayRecorder.record = lambda self, frame: (kept.append(frame), record(self, frame))
+    for pool in POOLS.values():
+        pool.free.clear()
+        pool.created = pool.reused = 0
+    gen0 = [0]
+    def count(phase, info):
+        if phase == 'start' and info['generation'] == 0:
+            gen0[0] += 1
+    try:
+        game = replay.HeadlessGame()
+        state = WarState(seed=seed, headless=True, scenario='endless')
+        state.player.lives = 10 ** 6 # Keep the bot alive for the whole run
+        bot = random.Random(seed)
+        gc.collect()
+        gc.callbacks.append(count)
+        start = time.process_time()
+        for i in range(ticks):
+            state.queue_input(replay.InputFrame(bot.randint(1, SCREEN_WIDTH - 1), False, False, 1, False))
+            state.update(game)
+            if game.finished:
+                break
+        cpu = time.process_time() - start
+    finally:
+        gc.callbacks.remove(count)
+        Pool.release = release
+        replay.ReplayRecorder.record = record
+    created = sum(pool.created for pool in POOLS.values())
+    reused = sum(pool.reused for pool in POOLS.values())
+    return state.wave, created, reused, gen0[0], cpu
+
+def bench_pools(args):
+    """Entity allocations and gen-0 GC runs over a long endless game: pooling, replay frame storage."""
+    import replay
+    replay.init_headless()
+    print(f"endless scenario, {args.ticks} ticks ({args.ticks / 60 / 60:.1f} min of play)\n")
+    print(f"{'entities':>9}{'replay':>8}{'wave':>6}{'allocated':>11}{'reused':>9}{'gen0 GCs':>10}{'cpu s':>8}")
+    for pooled, tuple_frames in ((False, True), (False, False), (True, False)):
+        wave, created, reused, gen0, cpu = _pool_run(args.ticks, args.seed, pooled, tuple_frames)
+        print(f"{'pooled' if pooled else 'new':>9}{'tuples' if tuple_frames else 'packed':>8}"
+              f"{wave:>6}{created:>11}{reused:>9}{gen0:>10}{cpu:>8.2f}")
+    print("\n(gen-0 runs are triggered by objects that stay alive; a killed entity is freed at\n"
+          " once either way, so pooling saves constructions, not collections)")
+
+
+# --- SUITE: COLLISION MASKS ---
+def bench_collide(args):
+    """Rect-only vs rect broadphase + mask narrowphase: hit counts and cost per test."""
+    import pygame
+    import replay
+    replay.init_headless()
+    from entities import Drone, Hunter, Heavy, Asteroid, FighterJet, collide
+    rng = random.Random(args.seed)
+    player = FighterJet()
+    player.rect.center = (420, 320)
+    print(f"{args.pairs} random pairs per row, positions within 80px\n")
+    print(f"{'pair':>16}{'rect hits':>11}{'mask hits':>11}{'false hits':>12}{'rect ns':>9}{'r+mask ns':>11}")
+    for label, make, bullets in (('bullet/Drone', lambda x, y: Drone(x, y), True),
+                                 ('bullet/Asteroid', lambda x, y: Asteroid(x, y, rng=rng), True),
+                                 ('jet/Drone', lambda x, y: Drone(x, y), False),
+                                 ('jet/Hunter', lambda x, y: Hunter(x, y), False),
+                                 ('jet/Heavy', lambda x, y: Heavy(x, y), False),
+                                 ('jet/Asteroid', lambda x, y: Asteroid(x, y, rng=rng), False)):
+        pairs = []
+        for _ in range(args.pairs):
+            target = make(400 + rng.randint(-80, 80), 300 + rng.randint(-80, 80))
+            if bullets:
+                other = pygame.Rect(400 + rng.randint(-30, 60), 300 + rng.randint(-30, 60), 4, 15)
+            else:
+                other = player
+            pairs.append((other, target))
+        rect_of = (lambda o: o) if bullets else (lambda o: o.rect)
+        start = time.perf_counter()
+        rect_hits = sum(1 for o, t in pairs if rect_of(o).colliderect(t.rect))
+        rect_ns = (time.perf_counter() - start) / len(pairs) * 1e9
+        start = time.perf_counter()
+        mask_hits = sum(1 for o, t in pairs if rect_of(o).colliderect(t.rect) and collide(o, t))
+        mask_ns = (time.perf_counter() - start) / len(pairs) * 1e9
+        false_pct = (rect_hits - mask_hits) / max(1, rect_hits) * 100
+        print(f"{label:>16}{rect_hits:>11}{mask_hits:>11}{false_pct:>11.0f}%{rect_ns:>9.0f}{mask_ns:>11.0f}")
+
+
+def bench_resolution(args):
+    """Menu backdrop (stars + grid + upscale) per user-selectable render resolution."""
+    import pygame
+    import replay
+    replay.init_headless()
+    from settings import SCREEN_WIDTH, SCREEN_HEIGHT, RENDER_RESOLUTIONS
+    from render import RENDER
+    from states import StarField, draw_grid
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    stars = StarField()
+    saved = RENDER.resolution
+    print(f"menu backdrop, {args.frames} frames, window {SCREEN_WIDTH}x{SCREEN_HEIGHT}\n")
+    print(f"{'resolution':>12}{'internal px':>13}{'blended px':>12}{'ms/frame':>10}{'vs native':>11}")
+    native = None
+    try:
+        for name, scale in RENDER_RESOLUTIONS:
+            RENDER.set_resolution(name)
+            scale = RENDER.internal_scale
+            stars.draw(screen, draw_grid)  # Bake this scale's layers/grid outside the timing
+            start = time.perf_counter()
+            for _ in range(args.frames):
+                stars.update()
+                stars.draw(screen, draw_grid)
+            ms = (time.perf_counter() - start) / args.frames * 1000
+            native = native or ms
+            w, h = int(SCREEN_WIDTH * scale), int(SCREEN_HEIGHT * scale)
+            # Per frame: the fill, two blits per star layer and the grid, all at internal size
+            blended = w * h * (1 + 2 * RENDER.star_layers) + w * int((SCREEN_HEIGHT + 50) * scale)
+            print(f"{name:>12}{w * h:>13}{blended:>12}{ms:>10.2f}{native / ms:>10.1f}x")
+    finally:
+        RENDER.set_resolution(saved)
+
+
+# --- SUITE: SFX VOICES ---
+def _tone(ms, hz):
+    """Synthetic stand-in for the .wav effects (the repo ships without them)."""
+    import array
+    import math
+    import pygame
+    rate, _, channels = pygame.mixer.get_init()
+    samples = (int(6000 * math.sin(i * hz * 2 * math.pi / rate)) for i in range(rate * ms // 1000))
+    return pygame.mixer.Sound(buffer=array.array('h', (s for s in samples for _ in range(channels))).tobytes())
+
+def _sfx_run(seconds, seed, managed):
+    import pygame
+    import replay
+    from states import WarState
+    from settings import SCREEN_WIDTH, SIM_DT
+    from entities import AUDIO
+    from sfx import SFX
+    stats = {name: [0, 0] for name in ('shoot', 'explosion')}  # name -> [played, failed]
+    play = SFX.play
+    def unmanaged(name, sound):
+        # pygame's own channel search: None = nothing free, the sound is lost
+        stats[name][sound.play() is None] += 1
+    if not managed:
+        SFX.play = unmanaged
+        pygame.mixer.set_reserved(0)
+        pygame.mixer.set_num_channels(8) # pygame's default layout
+    saved = dict(AUDIO._sounds)
+    AUDIO._sounds.update(shoot=_tone(250, 880), explosion=_tone(600, 110))
+    try:
+        game = replay.HeadlessGame()
+        state = WarState(seed=seed, headless=True, scenario='endless')
+        state.player.lives = 10 ** 6
+        bot = random.Random(seed)
+        peak, ticks = 0, int(seconds / SIM_DT)
+        next_tick = time.perf_counter()
+        for _ in range(ticks):
+            # Rapid clicking: up to 3 shots per tick, each a triple shot's worth of sound requests
+            state.queue_input(replay.InputFrame(bot.randint(1, SCREEN_WIDTH - 1), False, False, bot.randint(0, 3), False))
+            state.update(game)
+            busy = sum(pygame.mixer.Channel(i).get_busy() for i in range(pygame.mixer.get_num_channels()))
+            peak = max(peak, busy)
+            next_tick += SIM_DT # Real time, so voices finish as they would in play
+            time.sleep(max(0.0, next_tick - time.perf_counter()))
+    finally:
+        SFX.play = play
+        AUDIO._sounds.clear()
+        AUDIO._sounds.update(saved)
+        pygame.mixer.stop()
+        if not managed:
+            SFX.groups.clear()
+            SFX.setup()
+    if managed:
+        return SFX.stats(), peak
+    return {name: (played, failed, 0) for name, (played, failed) in stats.items()}, peak
+
+def bench_sfx(args):
+    """
+    Sound requests vs voices actually mixed under heavy fire, pygame default vs SFX groups.
+    Mixing cost grows with the voices playing at once, so 'peak voices' bounds mixer CPU.
+    Default 'dropped' = plays that found no free channel and failed silently.
+    """
+    import replay
+    replay.init_headless()
+    print(f"endless scenario, {args.seconds:.0f} s real time, rapid fire\n")
+    print(f"{'channels':>10}{'sound':>11}{'requests':>10}{'played':>8}{'dropped':>9}{'stolen':>8}{'peak voices':>13}")
+    for managed in (False, True):
+        stats, peak = _sfx_run(args.seconds, args.seed, managed)
+        label = 'SFX groups' if managed else 'default'
+        for name, (played, dropped, stolen) in stats.items():
+            print(f"{label:>10}{name:>11}{played + dropped:>10}{played:>8}{dropped:>9}{stolen:>8}{peak:>13}")
+            label, peak = '', ''
+
+
+# --- SUITE: ASSET PACK ---
+def bench_assets(args):
+    """Sprite images: loose files (decode + convert + scale) vs the mmap'd pack (lookup + frombuffer)."""
+    import replay
+    replay.init_headless()
+    import build_assets
+    from asset_pack import AssetPack, image_key
+    from entities import SPRITE_IMAGES, load_image
+    tmp_dir = tempfile.mkdtemp(prefix='defender_pack_')
+    try:
+        path = os.path.join(tmp_dir, 'assets.pak')
+        entries = build_assets.build(path)
+        images = list(SPRITE_IMAGES.values())
+        loose = _timeit(lambda: [load_image(p, size) for p, size in images], args.repeat)
+        opened = _timeit(lambda: AssetPack(path), args.repeat)
+        pack = AssetPack(path)
+        lookup = _timeit(lambda: [pack.image(image_key(p, size)) for p, size in images], args.repeat)
+        print(f"\n{len(images)} sprite images, {len(entries)} packed assets, {os.path.getsize(path)} bytes\n")
+        print(f"{'source':>14}{'ms per load':>13}")
+        print(f"{'loose files':>14}{loose * 1000:>13.3f}")
+        print(f"{'pack open':>14}{opened * 1000:>13.3f}")
+        print(f"{'pack lookups':>14}{lookup * 1000:>13.3f}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+# --- SUITE: ALLOCATIONS / GC ---
+def _frame_driver(state, game, tick):
+    """One frame of a state as WarGame.run would do it (bot input for WarState)."""
+    from states import WarState
+    import replay
+    if isinstance(state, WarState):
+        state.queue_input(replay.InputFrame(300 + (tick * 7) % 700, False, False, tick % 10 == 0, False))
+    else:
+        state.handle_input([], game)
+    state.update(game)
+    state.draw(game)
+
+def _headless_states(seed):
+    import pygame
+    import replay
+    from settings import SCREEN_WIDTH, SCREEN_HEIGHT
+    from states import MenuState, OptionsState, WarState, PauseState
+    game = replay.HeadlessGame()
+    game.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    war = WarState(seed=seed)
+    war.headless = True # Draws like the game, but doesn't save a replay file at the end
+    war.player.lives = 10 ** 6
+    return game, [('MenuState', MenuState()), ('OptionsState', OptionsState(None)),
+                  ('WarState', war), ('PauseState', PauseState(war))]
+
+def bench_alloc(args):
+    """
+    tracemalloc harness: per-frame allocations and top allocation sites, by state.
+    Runs with the collector off, so whatever a frame leaves behind stays visible:
+      gc objs   container objects added to gen 0 (what schedules collections)
+      blocks    memory blocks still alive after the frame (garbage cycles + growth)
+      peak KB   transient memory within the frame (freed by refcounting before it ends)
+    """
+    import gc
+    import tracemalloc
+    import replay
+    replay.init_headless()
+    game, states = _headless_states(args.seed)
+    own_code = [tracemalloc.Filter(True, os.path.join(BASE_DIR, '*')),
+                tracemalloc.Filter(False, __file__)]
+    print(f"{args.frames} frames per state, collector disabled while measuring\n")
+    sites = {}
+    print(f"{'state':>14}{'gc objs/f':>11}{'blocks/f':>10}{'peak KB/f':>11}")
+    for name, state in states:
+        for tick in range(10):  # Warm caches (text, panels, backdrops) first
+            _frame_driver(state, game, tick)
+        gc.collect()
+        gc.disable()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            gen0, peaks = 0, 0
+            for tick in range(args.frames):
+                count = gc.get_count()[0]
+                current = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                _frame_driver(state, game, tick)
+                peaks += tracemalloc.get_traced_memory()[1] - current
+                gen0 += gc.get_count()[0] - count
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+            gc.enable()
+        diff = after.filter_traces(own_code).compare_to(before.filter_traces(own_code), 'lineno')
+        blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+        diff.sort(key=lambda stat: stat.count_diff, reverse=True)
+        sites[name] = [stat for stat in diff if stat.count_diff > 0][:args.top]
+        print(f"{name:>14}{gen0 / args.frames:>11.1f}{blocks / args.frames:>10.1f}{peaks / args.frames / 1024:>11.1f}")
+    for name, stats in sites.items():
+        print(f"\n{name}: top allocation sites (blocks left over {args.frames} frames)")
+        for stat in stats:
+            frame = stat.traceback[0]
+            print(f"  {stat.count_diff:>7}  {os.path.relpath(frame.filename, BASE_DIR)}:{frame.lineno}")
+
+def _gc_run(ticks, seed, managed):
+    import gc
+    import replay
+    from gc_control import GCController
+    from settings import GC_THRESHOLDS, RENDER_FPS
+    game, states = _headless_states(seed)
+    war = dict(states)['WarState']
+    pauses = {0: [], 1: [], 2: []}
+    started = [0.0]
+    def timer(phase, info):
+        if phase == 'start':
+            started[0] = time.perf_counter()
+        else:
+            pauses[info['generation']].append(time.perf_counter() - started[0])
+    saved = gc.get_threshold()
+    controller = GCController()
+    controller.managed, controller.frozen = managed, False
+    controller.setup()
+    controller.freeze()
+    gc.callbacks.append(timer)
+    frames = []
+    try:
+        for tick in range(ticks):
+            start = time.perf_counter()
+            _frame_driver(war, game, tick)
+            work = time.perf_counter() - start
+            frames.append(work)
+            controller.idle(1.0 / RENDER_FPS - work)
+    finally:
+        gc.callbacks.remove(timer)
+        gc.set_threshold(*saved)
+        gc.unfreeze()
+    frames.sort()
+    return pauses, frames
+
+def bench_gc(args):
+    """Frame times and collector pauses in a long WarState, default GC vs gc_control's managed mode."""
+    import gc
+    import replay
+    replay.init_headless()
+    _headless_states(args.seed)
+    full = _timeit(gc.collect, 20)
+    gc.freeze()
+    frozen = _timeit(gc.collect, 20)
+    gc.unfreeze()
+    print(f"full collection with assets loaded: {full * 1000:.2f} ms, after gc.freeze(): {frozen * 1000:.2f} ms\n")
+    print(f"WarState, {args.ticks} frames (update + draw)\n")
+    print(f"{'gc mode':>9}{'gen0':>6}{'gen1':>6}{'gen2':>6}{'gen2 max ms':>13}{'frame p50':>11}{'p99':>7}{'max':>7}")
+    for managed in (False, True):
+        pauses, frames = _gc_run(args.ticks, args.seed, managed)
+        gen2_max = max(pauses[2], default=0.0) * 1000
+        p = lambda q: frames[min(len(frames) - 1, int(len(frames) * q))] * 1000
+        print(f"{'managed' if managed else 'default':>9}{len(pauses[0]):>6}{len(pauses[1]):>6}{len(pauses[2]):>6}"
+              f"{gen2_max:>13.2f}{p(0.5):>11.2f}{p(0.99):>7.2f}{frames[-1] * 1000:>7.2f}")
+
+
+SUITES = {
+    'wire': bench_wire,
+    'boot': bench_boot,
+    'startup': bench_startup,
+    'logging': bench_logging,
+    'replay': bench_replay,
+    'verify': bench_verify,
+    'swarm': bench_swarm,
+    'pools': bench_pools,
+    'collide': bench_collide,
+    'resolution': bench_resolution,
+    'sfx': bench_sfx,
+    'assets': bench_assets,
+    'alloc': bench_alloc,
+    'gc': bench_gc,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="DEFENDER-107 benchmarks")
+    sub = parser.add_subparsers(dest='suite', required=True)
+
+    p = sub.add_parser('wire', help="log batch encoding size and parse cost")
+    p.add_argument('--batches', type=int, default=200)
+    p.add_argument('--batch-size', type=int, default=10)
+    p.add_argument('--repeat', type=int, default=20)
+
+    p = sub.add_parser('boot', help="gunicorn worker boot time, with and without --preload")
+    p.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    p.add_argument('--repeat', type=int, default=3)
+
+    p = sub.add_parser('startup', help="game time-to-first-frame and asset baking, serial vs pooled")
+    p.add_argument('--workers', type=int, nargs='+', default=[0, 4])
+    p.add_argument('--repeat', type=int, default=5)
+
+    p = sub.add_parser('logging', help="client log aggregation: records, bytes and CPU per game")
+    p.add_argument('--events', type=int, default=2000)
+    p.add_argument('--flips-per-sec', type=float, default=5.0, help="synthetic pilot idle/moving flips")
+    p.add_argument('--repeat', type=int, default=10)
+
+    p = sub.add_parser('replay', help="replay size and headless re-simulation speed")
+    p.add_argument('files', nargs='*', help="replay files (default: replays/ or bot games)")
+    p.add_argument('--count', type=int, default=10)
+    p.add_argument('--repeat', type=int, default=3)
+
+    p = sub.add_parser('verify', help="server-side replay verification throughput")
+    p.add_argument('files', nargs='*', help="replay files (default: replays/ or bot games)")
+    p.add_argument('--count', type=int, default=40)
+    p.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    p.add_argument('--budget', type=float, default=2.0, help="CPU seconds per replay")
+
+    p = sub.add_parser('swarm', help="update/draw cost of the swarm stress scenario")
+    p.add_argument('--ticks', type=int, default=600)
+    p.add_argument('--runs', type=int, default=3)
+    p.add_argument('--seed', type=int, default=107)
+
+    p = sub.add_parser('pools', help="entity allocations and gen-0 GC runs, pooled vs unpooled")
+    p.add_argument('--ticks', type=int, default=60 * 60 * 10)
+    p.add_argument('--seed', type=int, default=107)
+
+    p = sub.add_parser('collide', help="rect-only vs pixel-mask collision: false hits and cost")
+    p.add_argument('--pairs', type=int, default=20000)
+    p.add_argument('--seed', type=int, default=107)
+
+    p = sub.add_parser('resolution', help="menu backdrop fill cost per internal render resolution")
+    p.add_argument('--frames', type=int, default=300)
+
+    p = sub.add_parser('sfx', help="sound requests vs mixed voices under heavy fire")
+    p.add_argument('--seconds', type=float, default=10.0)
+    p.add_argument('--seed', type=int, default=107)
+
+    p = sub.add_parser('assets', help="sprite load time, loose files vs memory-mapped asset pack")
+    p.add_argument('--repeat', type=int, default=200)
+
+    p = sub.add_parser('alloc', help="tracemalloc: per-frame allocations and top allocation sites by state")
+    p.add_argument('--frames', type=int, default=300)
+    p.add_argument('--top', type=int, default=5)
+    p.add_argument('--seed', type=int, default=107)
+
+    p = sub.add_parser('gc', help="collector pauses and frame times, default vs managed GC")
+    p.add_argument('--ticks', type=int, default=60 * 60 * 2)
+    p.add_argument('--seed', type=int, default=107)
+
+    args = parser.parse_args()
+    SUITES[args.suite](args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# build_assets.py
+# Packs the game's images, sound effects and music into assets.pak (see asset_pack.py).
+# Run it before pyinstaller / pygbag; the game falls back to the loose files without it.
+# Usage: python build_assets.py [--out assets.pak]
+import argparse
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+import pygame
+
+from asset_pack import (write_pack, resource_path, image_key, KIND_IMAGE, KIND_PCM, KIND_RAW,
+                        PIXEL_FORMAT)
+from settings import ASSET_PACK_FILE, SFX_GROUPS
+
+MUSIC_FILES = ('music.mp3',)
+
+
+def collect_entries():
+    """[(name, kind, meta, payload)] for every asset file present in the source tree."""
+    # Same conversion as the runtime loader, so packed pixels (and sprite masks) match it
+    from entities import SPRITE_IMAGES, load_image
+    entries, seen = [], set()
+    for path, size in SPRITE_IMAGES.values():
+        key = image_key(path, size)
+        if key in seen:
+            continue
+        seen.add(key)
+        surf = load_image(path, size)
+        if surf is None:
+            print(f"PACK: [SKIP] {path} not found")
+            continue
+        entries.append((key, KIND_IMAGE, {'size': size}, pygame.image.tobytes(surf, PIXEL_FORMAT)))
+
+    rate, sample_format, channels = pygame.mixer.get_init()
+    for cfg in SFX_GROUPS.values():
+        path = resource_path(cfg['file'])
+        if not os.path.exists(path):
+            print(f"PACK: [SKIP] {cfg['file']} not found")
+            continue
+        pcm = pygame.mixer.Sound(path).get_raw()
+        entries.append((cfg['file'], KIND_PCM,
+                        {'format': sample_format, 'channels': channels, 'rate': rate}, pcm))
+
+    for file in MUSIC_FILES:
+        path = resource_path(file)
+        if not os.path.exists(path):
+            print(f"PACK: [SKIP] {file} not found")
+            continue
+        with open(path, 'rb') as f:
+            entries.append((file, KIND_RAW, {}, f.read())) # Streamed, so kept encoded
+    return entries
+
+def build(out):
+    pygame.init()
+    pygame.display.set_mode((1, 1)) # convert_alpha() needs a display
+    if not pygame.mixer.get_init():
+        pygame.mixer.init()          # Default format = the game's (WarGame calls mixer.init())
+    entries = collect_entries()
+    size = write_pack(out, entries)
+    for name, kind, meta, payload in entries:
+        print(f"PACK: {name:<32} {len(payload):>9} bytes")
+    print(f"PACK: wrote {out} ({len(entries)} assets, {size} bytes)")
+    return entries
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the DEFENDER-107 asset pack")
+    parser.add_argument('--out', default=resource_path(ASSET_PACK_FILE))
+    build(parser.parse_args().out)
+
+if __name__ == "__main__":
+    main()
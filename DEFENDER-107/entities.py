@@ -4,50 +4,40 @@ import pygame
 import math
 import random
 from abc import ABC, abstractmethod
+from collections import deque
+from itertools import islice
 from settings import *
 from api_logger import APILogger
+from render import RENDER
+from ui import UI
+from asset_baker import AssetBaker
+from scheduler import SCHEDULER
+from pools import Pool, ActiveList
+from sfx import SFX
 
 # --- ASSETS & AUDIO MANAGER ---
+import io
 import os
-import sys
+from asset_pack import ASSET_PACK, resource_path, image_key
 
-def load_image_fallback(path, fallback_func, size):
-    """Try to load an image, fallback to procedural drawing if it fails."""
-    # Robust path construction: relative to this file
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # Handle PyInstaller _MEIPASS for bundled resources
-    if hasattr(sys, '_MEIPASS'):
-        base_dir = sys._MEIPASS
+def load_image(path, size):
+    """Image file scaled to `size` (what build_assets.py packs), or None if missing."""
+    norm_path = resource_path(path)
+    if not os.path.exists(norm_path):
+        return None
+    return pygame.transform.scale(pygame.image.load(norm_path).convert_alpha(), size)
 
-    # Construct the absolute path
-    # NOTE: We use *path.replace to handle mixed slashes from different OS inputs
-    norm_path = os.path.join(base_dir, *path.replace('\\', '/').split('/'))
-    
+def load_image_fallback(path, fallback_func, size):
+    """Packed pixels (assets.pak), else the loose file, else procedural drawing."""
     try:
-        # 1. Try the exact path first
-        if os.path.exists(norm_path):
-            img = pygame.image.load(norm_path).convert_alpha()
-            print(f"LOADER: [SUCCESS] Loaded Image from {norm_path}")
-            return pygame.transform.scale(img, size)
-        
-        # Try a sibling match (same name, different extension)
-        base_no_ext, ext = os.path.splitext(norm_path)
-        for alt_ext in ['.png', '.jpg', '.jpeg', '.bmp']:
-            if alt_ext.lower() != ext.lower():
-                alt_path = base_no_ext + alt_ext
-                if os.path.exists(alt_path):
-                    img = pygame.image.load(alt_path).convert_alpha()
-                    print(f"LOADER: [SUCCESS] Found Image with alt extension: {alt_path}")
-                    return pygame.transform.scale(img, size)
-                
-        # Try looking in the root directory (one level up from assets folder)
-        root_match = os.path.join(base_dir, os.path.basename(path))
-        if os.path.exists(root_match):
-            img = pygame.image.load(root_match).convert_alpha()
-            print(f"LOADER: [SUCCESS] Found Image in root directory: {root_match}")
-            return pygame.transform.scale(img, size)
-            
+        # O(1): the pack holds this exact image at this exact size, already converted
+        surf = ASSET_PACK.image(image_key(path, size))
+        if surf is not None:
+            return surf
+        surf = load_image(path, size)
+        if surf is not None:
+            print(f"LOADER: [SUCCESS] Loaded Image from {path}")
+            return surf
     except Exception as e:
         print(f"LOADER: [ERROR] Failed to load asset {path}: {e}")
 
@@ -60,8 +50,8 @@ def load_image_fallback(path, fallback_func, size):
 def draw_circular_timer(screen, center, progress, color, radius=15):
     """Draws a circular 'clock' timer representing power-up progress."""
     rect = pygame.Rect(center[0] - radius, center[1] - radius, radius * 2, radius * 2)
-    # Background circle (dim)
-    pygame.draw.circle(screen, (50, 50, 50, 150), center, radius)
+    # Background circle (dim, cached alpha disc)
+    screen.blit(UI.circle(radius, (50, 50, 50, 150)), (center[0] - radius, center[1] - radius))
     # Arc representing remaining time
     # progress is 0.0 (full) to 1.0 (empty) or vice versa? 
     # Let's say progress is 1.0 -> 0.0 (time left)
@@ -75,6 +65,7 @@ class AudioManager:
     _sounds = {}
     _music_on = True
     _sound_on = True
+    _music_file = None
 
     def __new__(cls):
         if cls._instance is None:
@@ -89,35 +80,41 @@ class AudioManager:
         except:
             print("Audio Mixer failed to initialize.")
 
-    def _get_abs_path(self, file):
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        if hasattr(sys, '_MEIPASS'):
-            base_dir = sys._MEIPASS
-        return os.path.join(base_dir, file)
-
     def load_sounds(self):
-        """Lazy loading of sounds with absolute paths"""
-        sound_files = {
-            'shoot': 'shoot.wav',
-            'explosion': 'explosion.wav'
-        }
-        for name, file in sound_files.items():
-            abs_p = self._get_abs_path(file)
+        """Decodes the sounds once per process (no-op if the asset pipeline already did)"""
+        if not self._sounds:
+            self.install_sounds(self.decode_sounds())
+
+    def install_sounds(self, sounds):
+        self._sounds.update(sounds)
+        SFX.setup()
+
+    def decode_sounds(self):
+        """Decodes the sound files and returns {name: Sound or None}. Safe off the main thread."""
+        sounds = {}
+        for name, cfg in SFX_GROUPS.items():
+            file = cfg['file']
+            abs_p = resource_path(file)
             try:
-                if os.path.exists(abs_p):
-                    self._sounds[name] = pygame.mixer.Sound(abs_p)
-                    if name == 'shoot': self._sounds[name].set_volume(0.4)
-                    if name == 'explosion': self._sounds[name].set_volume(0.5)
+                sound = ASSET_PACK.sound(file) # Pre-decoded PCM, no WAV parsing
+                if sound is None and os.path.exists(abs_p):
+                    sound = pygame.mixer.Sound(abs_p)
+                if sound is not None:
+                    sounds[name] = sound
+                    sound.set_volume(cfg['volume'])
                 else:
                     print(f"DEBUG: Sound file not found: {abs_p}")
-                    self._sounds[name] = None
+                    sounds[name] = None
             except Exception as e:
-                self._sounds[name] = None
+                sounds[name] = None
                 print(f"Warning: Could not load sound {file}: {e}")
+        return sounds
 
     def play_sound(self, name):
-        if self._sound_on and name in self._sounds and self._sounds[name]:
-            self._sounds[name].play()
+        # Through the SFX voice groups: capped voices per sound, bursts thinned out
+        sound = self._sounds.get(name)
+        if self._sound_on and sound:
+            SFX.play(name, sound)
 
     def toggle_sound(self):
         self._sound_on = not self._sound_on
@@ -125,11 +122,19 @@ class AudioManager:
 
     def play_music(self, file, loop=-1):
         if not self._music_on: return
-        abs_p = self._get_abs_path(file)
+        if self._music_file == file and pygame.mixer.music.get_busy():
+            return # Already streaming: returning to the menu doesn't restart the track
+        abs_p = resource_path(file)
         try:
-            if os.path.exists(abs_p):
+            packed = ASSET_PACK.raw(file)
+            if packed is not None:
+                pygame.mixer.music.load(io.BytesIO(packed))
+                pygame.mixer.music.play(loop)
+                self._music_file = file
+            elif os.path.exists(abs_p):
                 pygame.mixer.music.load(abs_p)
                 pygame.mixer.music.play(loop)
+                self._music_file = file
             else:
                 print(f"DEBUG: Music file not found: {abs_p}")
         except Exception as e:
@@ -137,6 +142,7 @@ class AudioManager:
 
     def stop_music(self):
         pygame.mixer.music.stop()
+        self._music_file = None
 
 # Initialize global instance
 AUDIO = AudioManager()
@@ -158,74 +164,138 @@ SHIELD_AURA_SURF = DUMMY_SURF
 GLOW_SURFACES_LIFE = [DUMMY_SURF] * 10
 GLOW_SURFACES_SHIELD = [DUMMY_SURF] * 10
 GLOW_SURFACES_RAPID = [DUMMY_SURF] * 10
-
-def cache_particles():
-    global PARTICLE_SURFACES
-    PARTICLE_SURFACES = []
+# Collision masks, baked with their sprites: global sprite name -> pygame.mask.Mask
+SPRITE_MASKS = {}
+ASTEROID_MASK_STEP = 5 # Degrees of rotation per asteroid mask (see Asteroid.hit_shape)
+
+# Builders return the finished surfaces without touching the globals, so they can
+# run on the AssetBaker's threads; the cache_* functions install them directly.
+def build_particles():
+    surfaces = []
     for i in range(1, 21): 
         r = 10 + (20 - i)
         s = pygame.Surface((r*2, r*2), pygame.SRCALPHA)
         alpha = int((i / 20) * 255)
         color = (255, int(i * 10), 0)
         pygame.draw.circle(s, (*color, alpha), (r, r), r)
-        PARTICLE_SURFACES.append(s)
+        surfaces.append(s)
+    return surfaces
 
-def cache_glows():
-    global GLOW_SURFACES_LIFE, GLOW_SURFACES_SHIELD, GLOW_SURFACES_RAPID
-    GLOW_SURFACES_LIFE = []
-    GLOW_SURFACES_SHIELD = []
-    GLOW_SURFACES_RAPID = []
+def build_glows():
+    life, shield, rapid = [], [], []
     for i in range(10):
         size = int(30 + i * 2) 
         s_life = pygame.Surface((size*2, size*2), pygame.SRCALPHA)
         pygame.draw.circle(s_life, (0, 255, 0, 50), (size, size), size)
-        GLOW_SURFACES_LIFE.append(s_life)
+        life.append(s_life)
         s_shield = pygame.Surface((size*2, size*2), pygame.SRCALPHA)
         pygame.draw.circle(s_shield, (0, 100, 255, 50), (size, size), size)
-        GLOW_SURFACES_SHIELD.append(s_shield)
+        shield.append(s_shield)
         
         s_rapid = pygame.Surface((size*2, size*2), pygame.SRCALPHA)
         pygame.draw.circle(s_rapid, (255, 255, 0, 50), (size, size), size)
-        GLOW_SURFACES_RAPID.append(s_rapid)
+        rapid.append(s_rapid)
+    return life, shield, rapid
 
-def cache_static_assets():
-    global HEART_SURFACE, SHIELD_EMBLEM_SURFACE, DRONE_SURFACE, HUNTER_SURFACE, HEAVY_SURFACE, JET_SURFACE, JET_FLAME_SURFACE, RAPID_SURFACE
-    # Heart
-    HEART_SURFACE = pygame.Surface((40, 40), pygame.SRCALPHA)
-    draw_heart_procedural(HEART_SURFACE, 20, 15, 25)
-    
-    # Shield
-    SHIELD_EMBLEM_SURFACE = pygame.Surface((40, 40), pygame.SRCALPHA)
-    draw_shield_emblem_procedural(SHIELD_EMBLEM_SURFACE, 20, 20, 25)
-    
+def build_heart():
+    surf = pygame.Surface((40, 40), pygame.SRCALPHA)
+    draw_heart_procedural(surf, 20, 15, 25)
+    return surf
+
+def build_shield_emblem():
+    surf = pygame.Surface((40, 40), pygame.SRCALPHA)
+    draw_shield_emblem_procedural(surf, 20, 20, 25)
+    return surf
+
+def build_jet_flame():
+    surf = pygame.Surface((20, 40), pygame.SRCALPHA)
+    pygame.draw.polygon(surf, (255, 150, 0), [(0, 0), (20, 0), (10, 30)])
+    pygame.draw.polygon(surf, (255, 255, 0), [(5, 0), (15, 0), (10, 15)])
+    return surf
+
+def build_rapid_icon():
+    surf = pygame.Surface((30, 30), pygame.SRCALPHA)
+    for i in range(-1, 2):
+        pygame.draw.rect(surf, (255, 255, 0), (15 + i*8 - 2, 10, 4, 10))
+    return surf
+
+def build_shield_aura():
+    surf = pygame.Surface((120, 120), pygame.SRCALPHA)
+    pygame.draw.circle(surf, (0, 255, 255, 80), (60, 60), 50)
+    pygame.draw.circle(surf, (0, 255, 255, 255), (60, 60), 50, 2)
+    return surf
+
+# Image sprites: global name -> (file, size it is drawn at). build_assets.py packs exactly these.
+SPRITE_IMAGES = {
+    'DRONE_SURFACE': ('img/enemy1.png', (60, 60)),
+    'HUNTER_SURFACE': ('img/enemy1.png', (40, 40)),
+    'HEAVY_SURFACE': ('img/enemy1.png', (60, 60)),
+    'JET_SURFACE': ('img/player_ship.jpg', (60, 80)),
+}
+
+def _sprite_image(name, fallback_func):
+    path, size = SPRITE_IMAGES[name]
+    return load_image_fallback(path, fallback_func, size)
+
+# Global name -> builder, one independent job each
+STATIC_ASSET_BUILDERS = {
+    'HEART_SURFACE': build_heart,
+    'SHIELD_EMBLEM_SURFACE': build_shield_emblem,
     # Enemies (Images + Fallback)
-    DRONE_SURFACE = load_image_fallback('img/enemy1.png', lambda s, x, y: draw_drone_procedural(s, x, y), (60, 60))
-    # Try specific images for Hunter and Heavy if they exist, otherwise fallback to enemy1 or procedural
-    HUNTER_SURFACE = load_image_fallback('img/enemy1.png', 
-                                         lambda s, x, y: load_image_fallback('img/enemy1.png', 
-                                                                            lambda s2, x2, y2: pygame.draw.circle(s2, (255, 50, 50), (x2, y2), 18), (40, 40)), (40, 40))
-    HEAVY_SURFACE = load_image_fallback('img/enemy1.png', 
-                                         lambda s, x, y: load_image_fallback('img/enemy1.png', 
-                                                                            lambda s2, x2, y2: pygame.draw.circle(s2, (150, 0, 200), (x2, y2), 28), (60, 60)), (60, 60))
-    
+    'DRONE_SURFACE': lambda: _sprite_image('DRONE_SURFACE', lambda s, x, y: draw_drone_procedural(s, x, y)),
+    'HUNTER_SURFACE': lambda: _sprite_image('HUNTER_SURFACE', lambda s, x, y: pygame.draw.circle(s, (255, 50, 50), (x, y), 18)),
+    'HEAVY_SURFACE': lambda: _sprite_image('HEAVY_SURFACE', lambda s, x, y: pygame.draw.circle(s, (150, 0, 200), (x, y), 28)),
     # Jet (Player Ship) - Now with image loading and rounded fallback
-    JET_SURFACE = load_image_fallback('img/player_ship.jpg', lambda s, x, y: draw_jet_procedural(s, x, y), (60, 80))
-    
-    # Jet Flame
-    JET_FLAME_SURFACE = pygame.Surface((20, 40), pygame.SRCALPHA)
-    pygame.draw.polygon(JET_FLAME_SURFACE, (255, 150, 0), [(0, 0), (20, 0), (10, 30)])
-    pygame.draw.polygon(JET_FLAME_SURFACE, (255, 255, 0), [(5, 0), (15, 0), (10, 15)])
-    
-    # Rapid Fire Icon
-    RAPID_SURFACE = pygame.Surface((30, 30), pygame.SRCALPHA)
-    for i in range(-1, 2):
-        pygame.draw.rect(RAPID_SURFACE, (255, 255, 0), (15 + i*8 - 2, 10, 4, 10))
-    
-    # Shield Aura Surface
-    global SHIELD_AURA_SURF
-    SHIELD_AURA_SURF = pygame.Surface((120, 120), pygame.SRCALPHA)
-    pygame.draw.circle(SHIELD_AURA_SURF, (0, 255, 255, 80), (60, 60), 50)
-    pygame.draw.circle(SHIELD_AURA_SURF, (0, 255, 255, 255), (60, 60), 50, 2)
+    'JET_SURFACE': lambda: _sprite_image('JET_SURFACE', lambda s, x, y: draw_jet_procedural(s, x, y)),
+    'JET_FLAME_SURFACE': build_jet_flame,
+    'RAPID_SURFACE': build_rapid_icon,
+    'SHIELD_AURA_SURF': build_shield_aura,
+}
+
+# Sprites that collide: their mask is built in the same job as the surface
+MASKED_SPRITES = ('DRONE_SURFACE', 'HUNTER_SURFACE', 'HEAVY_SURFACE', 'JET_SURFACE')
+
+def _install_global(name):
+    def install(value):
+        globals()[name] = value
+    return install
+
+def sprite_mask(surf):
+    mask = pygame.mask.from_surface(surf)
+    w, h = mask.get_size()
+    if mask.count() == w * h:
+        # Opaque image (no alpha in the file): key out the corner colour as background
+        mask = pygame.mask.from_threshold(surf, surf.get_at((0, 0)), (24, 24, 24, 255))
+        mask.invert()
+    return mask
+
+def _with_mask(build):
+    def build_masked():
+        surf = build()
+        return surf, sprite_mask(surf)
+    return build_masked
+
+def _install_sprite(name):
+    def install(value):
+        globals()[name], SPRITE_MASKS[name] = value
+    return install
+
+def _install_glows(glows):
+    global GLOW_SURFACES_LIFE, GLOW_SURFACES_SHIELD, GLOW_SURFACES_RAPID
+    GLOW_SURFACES_LIFE, GLOW_SURFACES_SHIELD, GLOW_SURFACES_RAPID = glows
+
+def cache_particles():
+    global PARTICLE_SURFACES
+    PARTICLE_SURFACES = build_particles()
+
+def cache_glows():
+    _install_glows(build_glows())
+
+def cache_static_assets():
+    for name, build in STATIC_ASSET_BUILDERS.items():
+        globals()[name] = build()
+        if name in MASKED_SPRITES:
+            SPRITE_MASKS[name] = sprite_mask(globals()[name])
 
 def draw_heart_procedural(surf, x, y, size):
     r = size // 2
@@ -276,33 +346,124 @@ def draw_heart(screen, x, y, size=None):
 def draw_shield_emblem(screen, x, y, size=None):
     screen.blit(SHIELD_EMBLEM_SURFACE, (x - 20, y - 20))
 
-def initialize_entities():
+# Startup pipeline shared by the game (see asset_baker.py)
+ASSETS = AssetBaker(ASSET_WORKERS)
+
+def initialize_entities(wait=True):
     """
     Consolidated initialization for all procedurally generated assets.
     Call this AFTER pygame.init() and set_mode().
+    Jobs go to the ASSETS pool under the 'game' group; wait=False returns right away
+    and the game joins the group before the first WarState (NameInputState).
     """
-    cache_particles()
-    cache_glows()
-    cache_static_assets()
-    AUDIO.load_sounds()
+    ASSETS.add('particles', 'game', build_particles, _install_global('PARTICLE_SURFACES'))
+    ASSETS.add('glows', 'game', build_glows, _install_glows)
+    for name, build in STATIC_ASSET_BUILDERS.items():
+        if name in MASKED_SPRITES:
+            ASSETS.add(name, 'game', _with_mask(build), _install_sprite(name))
+        else:
+            ASSETS.add(name, 'game', build, _install_global(name))
+    ASSETS.add('sounds', 'game', AUDIO.decode_sounds, AUDIO.install_sounds)
+    if wait:
+        ASSETS.wait('game')
 
 # --- ABSTRACT BASE ---
 class GameEntity(ABC):
+    __slots__ = () # Pooled entities declare theirs (no per-instance __dict__)
+    SPRITE = None           # Global name of the sprite whose mask is the hit shape
+    SPRITE_OFFSET = (0, 0)  # Where draw() blits that sprite, relative to rect.topleft
     @abstractmethod
     def update(self): pass
     @abstractmethod
     def draw(self, screen): pass
 
+    def hit_shape(self):
+        """(x, y, mask) in world space; the plain rect until the sprite mask is baked."""
+        mask = SPRITE_MASKS.get(self.SPRITE)
+        if mask is None:
+            return self.rect.x, self.rect.y, solid_mask(self.rect.size)
+        return self.rect.x + self.SPRITE_OFFSET[0], self.rect.y + self.SPRITE_OFFSET[1], mask
+
+# --- COLLISION: RECT BROADPHASE, MASK NARROWPHASE ---
+# Callers test rects first (colliderect, in C) and only rect hits reach collide().
+# Sprite masks are baked once with the sprites (initialize_entities), never per frame;
+# each asteroid builds its own from its polygon, only when a rect hit reaches it.
+_SOLID_MASKS = {}
+
+def solid_mask(size):
+    mask = _SOLID_MASKS.get(size)
+    if mask is None:
+        mask = _SOLID_MASKS[size] = pygame.mask.Mask(size, fill=True)
+    return mask
+
+_POLYGON_SCRATCH = {}
+
+def _polygon_mask(points, degrees, size):
+    """Mask of `points` (relative to the centre) rotated by `degrees`, in a `size` box."""
+    surf = _POLYGON_SCRATCH.get(size)
+    if surf is None:
+        surf = _POLYGON_SCRATCH[size] = pygame.Surface(size, pygame.SRCALPHA)
+    surf.fill((0, 0, 0, 0))
+    rad = math.radians(degrees)
+    cos_r, sin_r = math.cos(rad), math.sin(rad)
+    cx, cy = size[0] / 2, size[1] / 2
+    pygame.draw.polygon(surf, (255, 255, 255), [(cx + dx * cos_r - dy * sin_r, cy + dx * sin_r + dy * cos_r)
+                                                for dx, dy in points])
+    return pygame.mask.from_surface(surf)
+
+def _hit_shape(obj):
+    if isinstance(obj, pygame.Rect):
+        return obj.x, obj.y, solid_mask(obj.size) # Bullets: solid boxes
+    return obj.hit_shape()
+
+def collide(a, b):
+    """Pixel-accurate narrowphase between entities/ships/Rects whose rects overlap."""
+    ax, ay, a_mask = _hit_shape(a)
+    bx, by, b_mask = _hit_shape(b)
+    aw, ah = a_mask.get_size()
+    bw, bh = b_mask.get_size()
+    # Bounding boxes first: most pairs stop here
+    if ax >= bx + bw or bx >= ax + aw or ay >= by + bh or by >= ay + ah:
+        return False
+    return a_mask.overlap(b_mask, (bx - ax, by - ay)) is not None
+
+# --- FIXED TIMESTEP: FLOAT MOTION + INTERPOLATION ---
+# Moving entities keep a float position (sub-pixel speeds accumulate instead of
+# being truncated by the int Rect) and the position of the previous tick.
+# rect stays the integer collision box; draw_rect() is where to draw it this frame,
+# interpolated by RENDER.alpha so motion stays smooth at any render rate.
+class Kinematic:
+    __slots__ = ('x', 'y', 'prev_x', 'prev_y')
+
+    def _init_motion(self, x, y):
+        self.x = self.prev_x = float(x)
+        self.y = self.prev_y = float(y)
+
+    def _begin_step(self):
+        self.prev_x, self.prev_y = self.x, self.y
+
+    def _sync_rect(self):
+        self.rect.x = round(self.x)
+        self.rect.y = round(self.y)
+
+    def draw_rect(self):
+        back = 1.0 - RENDER.alpha
+        return self.rect.move(round((self.prev_x - self.x) * back), round((self.prev_y - self.y) * back))
+
 # --- VISUALS: PARTICLE SYSTEM (Explosions) ---
 class Particle(GameEntity):
+    __slots__ = ('x', 'y', 'born')
+
     def __init__(self, x, y):
         self.x, self.y = x, y
-        self.life = 20
-        self.radius = 10
+        self.born = SCHEDULER.tick
+
+    @property
+    def life(self):
+        return PARTICLE_LIFE - (SCHEDULER.tick - self.born)
 
     def update(self):
-        self.life -= 1
-        self.radius += 1
+        pass # Ages on the game clock; EnemySquadron drops it via a timer
 
     def draw(self, screen):
         if self.life > 0:
@@ -316,94 +477,153 @@ class Particle(GameEntity):
 # EnemySquadron is the 'Composite' node that contains them.
 # This allows the Game Loop to treat a single enemy and a group of enemies identically.
 # Both inherit from GameEntity to ensure interface consistency.
-class Drone(GameEntity):
+class Drone(GameEntity, Kinematic):
+    __slots__ = ('rect', 'hp', 'speed', 'wobble', 'slot')
+    SPRITE, SPRITE_OFFSET = 'DRONE_SURFACE', (-10, -10)
+
     def __init__(self, x, y, speed_mod=0):
         self.rect = pygame.Rect(x, y, 40, 40)
+        self.reset(x, y, speed_mod)
+
+    def reset(self, x, y, speed_mod=0):
+        # Pool reuse: same state as a fresh instance, same Rect object
+        self.rect.topleft = (x, y)
+        self._init_motion(x, y)
         self.hp = 1
         self.speed = ENEMY_BASE_SPEED + speed_mod
         self.wobble = float(x) # For sine wave movement
 
     def update(self):
-        self.rect.y += self.speed
+        self._begin_step()
+        self.y += self.speed
         self.wobble += 0.1
-        self.rect.x += math.sin(self.wobble) * 2 # Real movement logic
+        self.x += math.sin(self.wobble) * 2 # Real movement logic
+        self._sync_rect()
 
     def draw(self, screen):
+        r = self.draw_rect()
         # Draw body from cache
-        screen.blit(DRONE_SURFACE, (self.rect.x - 10, self.rect.y - 10))
+        screen.blit(DRONE_SURFACE, (r.x - 10, r.y - 10))
         
         # Pulsing Red Eye
         pulse = abs(math.sin(pygame.time.get_ticks() * 0.005)) * 100
         eye_color = (155 + pulse, 0, 0)
-        cx, cy = self.rect.centerx, self.rect.centery
+        cx, cy = r.centerx, r.centery
         pygame.draw.circle(screen, eye_color, (cx, cy), 10)
         pygame.draw.circle(screen, (255, 255, 255), (cx-3, cy-3), 3) # Highlight
         
         # Laser sight (flickering)
-        if pygame.time.get_ticks() % 100 > 30:
+        if RENDER.laser_sights and pygame.time.get_ticks() % 100 > 30:
             pygame.draw.line(screen, (255, 0, 0, 100), (cx, cy), (cx, cy+40), 1)
 
-class Hunter(GameEntity):
+class Hunter(GameEntity, Kinematic):
+    __slots__ = ('rect', 'hp', 'speed', 'wobble', 'slot')
+    SPRITE = 'HUNTER_SURFACE'
+
     def __init__(self, x, y, speed_mod=0):
         self.rect = pygame.Rect(x, y, 40, 40)
+        self.reset(x, y, speed_mod)
+
+    def reset(self, x, y, speed_mod=0):
+        self.rect.topleft = (x, y)
+        self._init_motion(x, y)
         self.hp = 1
         self.speed = HUNTER_SPEED + speed_mod
         self.wobble = float(x)
 
     def update(self):
-        self.rect.y += self.speed
+        self._begin_step()
+        self.y += self.speed
         self.wobble += 0.15
-        self.rect.x += math.sin(self.wobble) * 4 # Faster wobble
+        self.x += math.sin(self.wobble) * 4 # Faster wobble
+        self._sync_rect()
 
     def draw(self, screen):
-        screen.blit(HUNTER_SURFACE, (self.rect.x, self.rect.y))
+        r = self.draw_rect()
+        screen.blit(HUNTER_SURFACE, (r.x, r.y))
         # Marker: Red Triangle floating above
-        tx, ty = self.rect.centerx, self.rect.top - 10
+        tx, ty = r.centerx, r.top - 10
         pygame.draw.polygon(screen, (255, 0, 0), [(tx, ty), (tx-5, ty-10), (tx+5, ty-10)])
 
-class Heavy(GameEntity):
+class Heavy(GameEntity, Kinematic):
+    __slots__ = ('rect', 'hp', 'speed', 'slot')
+    SPRITE = 'HEAVY_SURFACE'
+
     def __init__(self, x, y, speed_mod=0):
         self.rect = pygame.Rect(x, y, 60, 60)
+        self.reset(x, y, speed_mod)
+
+    def reset(self, x, y, speed_mod=0):
+        self.rect.topleft = (x, y)
+        self._init_motion(x, y)
         self.hp = 2 # 2 HP for Heavy
         self.speed = HEAVY_SPEED + speed_mod
 
     def update(self):
-        self.rect.y += self.speed
+        self._begin_step()
+        self.y += self.speed
+        self._sync_rect()
 
     def draw(self, screen):
-        screen.blit(HEAVY_SURFACE, (self.rect.x, self.rect.y))
+        r = self.draw_rect()
+        screen.blit(HEAVY_SURFACE, (r.x, r.y))
         # HP Bar (small)
-        pygame.draw.rect(screen, (255, 0, 0), (self.rect.x, self.rect.y - 5, 60, 4))
-        pygame.draw.rect(screen, (0, 255, 0), (self.rect.x, self.rect.y - 5, 30 * self.hp, 4))
+        pygame.draw.rect(screen, (255, 0, 0), (r.x, r.y - 5, 60, 4))
+        pygame.draw.rect(screen, (0, 255, 0), (r.x, r.y - 5, 30 * self.hp, 4))
 
 # --- NEW ENTITY: OBSTACLE (Asteroid) ---
-class Asteroid(GameEntity):
+# Unit vectors of the 8 rock vertices (every 45 degrees); only the radius is random
+ASTEROID_ANGLES = [(math.cos(math.radians(i * 45)), math.sin(math.radians(i * 45))) for i in range(8)]
+
+class Asteroid(GameEntity, Kinematic):
     """
     Static/Drifting obstacle. 
     Does not target the player but drifts across the screen.
     """
-    def __init__(self, x, y):
+    __slots__ = ('rect', 'speed_x', 'speed_y', 'rotation', 'rot_speed', 'points_relative', 'slot',
+                 'mask', 'mask_step')
+
+    def __init__(self, x, y, rng=random):
         self.rect = pygame.Rect(x, y, 50, 50)
-        self.speed_x = random.uniform(-1, 1)
-        self.speed_y = random.uniform(1, 3)
+        self.points_relative = [None] * len(ASTEROID_ANGLES)
+        self.mask = None
+        self.reset(x, y, rng)
+
+    def reset(self, x, y, rng=random):
+        self.rect.topleft = (x, y)
+        self._init_motion(x, y)
+        self.speed_x = rng.uniform(-1, 1)
+        self.speed_y = rng.uniform(1, 3)
         self.rotation = 0
-        self.rot_speed = random.uniform(1, 5)
-        # GENERATE POINTS ONCE
-        self.points_relative = []
-        for i in range(8):
-            angle = math.radians(i * 45)
-            r = 20 + random.randint(0, 5)
-            self.points_relative.append((math.cos(angle) * r, math.sin(angle) * r))
+        self.rot_speed = rng.uniform(1, 5)
+        # GENERATE POINTS ONCE (per spawn, into the same list)
+        points = self.points_relative
+        for i, (cos_a, sin_a) in enumerate(ASTEROID_ANGLES):
+            r = 20 + rng.randint(0, 5)
+            points[i] = (cos_a * r, sin_a * r)
+        self.mask_step = -1 # New shape: the cached mask is stale
 
     def update(self):
-        self.rect.x += self.speed_x
-        self.rect.y += self.speed_y
+        self._begin_step()
+        self.x += self.speed_x
+        self.y += self.speed_y
+        self._sync_rect()
         self.rotation += self.rot_speed
 
+    def hit_shape(self):
+        # This rock's own polygon, at its rotation rounded down to ASTEROID_MASK_STEP.
+        # Random radii break the 45-degree symmetry, so the full turn is covered; the
+        # mask is rebuilt only when the step changes, and only for rocks hit by a rect.
+        step = int(self.rotation % 360) // ASTEROID_MASK_STEP
+        if step != self.mask_step:
+            self.mask = _polygon_mask(self.points_relative, step * ASTEROID_MASK_STEP, self.rect.size)
+            self.mask_step = step
+        return self.rect.x, self.rect.y, self.mask
+
     def draw(self, screen):
-        cx, cy = self.rect.center
-        # Rotate pre-generated points
-        rad = math.radians(self.rotation)
+        cx, cy = self.draw_rect().center
+        # Rotate pre-generated points (interpolated like the position)
+        rad = math.radians(self.rotation - self.rot_speed * (1.0 - RENDER.alpha))
         cos_a = math.cos(rad)
         sin_a = math.sin(rad)
         
@@ -418,37 +638,40 @@ class Asteroid(GameEntity):
 
 class EnemySquadron(GameEntity):
     def __init__(self):
-        self.children = []
-        self.particles = []
+        self.children = ActiveList(POOLS) # Leaves, killed by index back into their pools
+        self.particles = deque() # Oldest first: every particle lives PARTICLE_LIFE ticks
 
     def add(self, entity):
-        self.children.append(entity)
+        self.children.add(entity)
         # Reduce logging frequency
         # APILogger().log("ENTITY_CREATE", f"Spawned {entity.__class__.__name__}")
 
     def add_explosion(self, x, y):
         self.particles.append(Particle(x, y))
+        SCHEDULER.call_later(PARTICLE_LIFE, self.particles.popleft)
         AUDIO.play_sound('explosion')
         # APILogger().log("COLLISION", "Explosion triggered at location")
 
     def update(self):
         for child in self.children:
             child.update()
-        for p in self.particles[:]:
-            p.update()
-            if p.life <= 0: self.particles.remove(p)
 
     def draw(self, screen):
         for child in self.children:
             child.draw(screen)
-        for p in self.particles:
+        # Lower quality tiers only draw the most recent explosions
+        limit = RENDER.max_particles
+        start = 0 if limit is None else max(0, len(self.particles) - limit)
+        for p in islice(self.particles, start, None):
             p.draw(screen)
 
 # --- PATTERN: DECORATOR ---
 # The abstract 'Ship' class defines the component interface.
 # 'FighterJet' is the Concrete Component (the base object).
 # 'RapidFireDecorator' and 'ShieldDecorator' are Concrete Decorators that wrap the ship.
-# KEY FEATURE: These decorators stack recursively (e.g., Shield(Rapid(Ship))).
+# Decorators still stack (Shield(Rapid(Ship))), but their state lives in the base
+# ship's EffectRegistry: a wrapper forwards straight to the base, so get_rect/move
+# and has_decorator cost the same however many power-ups are stacked.
 class Ship(ABC):
     @abstractmethod
     def update(self): pass
@@ -471,26 +694,70 @@ class Ship(ABC):
     @abstractmethod
     def remove_decorator(self, cls): pass
 
+class EffectRegistry:
+    """Active power-ups of one ship: decorator type -> decorator, in the order applied."""
+    def __init__(self):
+        self.active = {}
+        self.expired = False # Set by expiry timers, cleared by FighterJet.update
+
+    def add(self, effect):
+        self.active[type(effect)] = effect
+        effect.timer = SCHEDULER.call_at(effect.end_tick, self._expire, effect)
+
+    def get(self, cls):
+        return self.active.get(cls)
+
+    def remove(self, cls):
+        effect = self.active.pop(cls, None)
+        if effect is not None:
+            effect.timer.cancel()
+        return effect
+
+    def _expire(self, effect):
+        if self.active.get(type(effect)) is effect:
+            del self.active[type(effect)]
+            self.expired = True
+
+    def outermost(self):
+        """Most recently applied active effect, or None."""
+        for effect in reversed(self.active.values()):
+            return effect
+        return None
+
 class FighterJet(Ship):
     def __init__(self):
         self.rect = pygame.Rect(375, 500, 40, 50)
         self.lives = 3 # New: 3 Lives System
+        self.effects = EffectRegistry()
 
     def update(self): 
-        return None # Fighters don't expire
+        # Power-ups run out on scheduler timers; report it once. The jet itself never expires
+        if self.effects.expired:
+            self.effects.expired = False
+            return "EXPIRED"
+        return None
 
     def set_x(self, x):
         self.rect.centerx = x
         self.rect.x = max(0, min(self.rect.x, SCREEN_WIDTH - 40))
 
     def take_damage(self):
+        # Latest effect first, like the outermost wrapper of a decorator chain
+        for effect in reversed(self.effects.active.values()):
+            result = effect.absorb_damage()
+            if result is not None:
+                return result
         self.lives -= 1
-        APILogger().log("DAMAGE", f"Hull Integrity Critical. Lives: {self.lives}")
+        APILogger().log("DAMAGE", f"Hull Integrity Critical. Lives: {self.lives}", key="HULL", value=self.lives)
         return self.lives <= 0
 
     def get_base_ship(self): return self
-    def has_decorator(self, cls): return False
-    def remove_decorator(self, cls): return self
+    def has_decorator(self, cls): return cls in self.effects.active
+
+    def remove_decorator(self, cls):
+        # Returns the ship as wrapped by the effects still active
+        self.effects.remove(cls)
+        return self.effects.outermost() or self
 
     def move(self, dx):
         self.rect.x += dx
@@ -502,6 +769,8 @@ class FighterJet(Ship):
         bullets_list.append(b)
         AUDIO.play_sound('shoot')
         # APILogger().log("ACTION", "Cannon Fired")
+        for effect in self.effects.active.values():
+            effect.on_shoot(bullets_list)
 
     def draw(self, screen):
         cx, cy = self.rect.centerx, self.rect.centery
@@ -518,126 +787,135 @@ class FighterJet(Ship):
         # Scale flame height? No, just blit it
         screen.blit(JET_FLAME_SURFACE, (cx - 10, self.rect.bottom))
 
+        # Power-up overlays, innermost first
+        for effect in self.effects.active.values():
+            effect.on_draw(screen)
+
     def get_rect(self): return self.rect
 
-class RapidFireDecorator(Ship):
+    def hit_shape(self):
+        # Sprite is blitted at (x - 10, y - 15), see draw()
+        mask = SPRITE_MASKS.get('JET_SURFACE')
+        if mask is None:
+            return self.rect.x, self.rect.y, solid_mask(self.rect.size)
+        return self.rect.x - 10, self.rect.y - 15, mask
+
+class ShipDecorator(Ship):
+    """
+    Base for timed power-ups. Wrapping registers the effect on the base ship;
+    every Ship call goes to the base in one step, and the base calls back the
+    on_shoot / on_draw / absorb_damage hooks of its active effects.
+    """
+    def __init__(self, wrapped_ship):
+        self.base = wrapped_ship.get_base_ship()
+        self.start_tick = SCHEDULER.tick
+        self.duration = POWERUP_DURATION * SIM_HZ // 1000 # In ticks
+        self.end_tick = self.start_tick + self.duration
+        self.base.effects.add(self)
+
+    def remaining(self):
+        """Fraction of the duration left (1.0 when applied, 0.0 at expiry)."""
+        return max(0, (self.end_tick - SCHEDULER.tick) / self.duration)
+
+    def update(self): return self.base.update()
+    def shoot(self, bullets_list): self.base.shoot(bullets_list)
+    def draw(self, screen): self.base.draw(screen)
+    def move(self, dx): self.base.move(dx)
+    def set_x(self, x): self.base.set_x(x)
+    def take_damage(self): return self.base.take_damage()
+    def get_rect(self): return self.base.rect
+    def hit_shape(self): return self.base.hit_shape()
+    def get_base_ship(self): return self.base
+    def has_decorator(self, cls): return cls in self.base.effects.active
+    def remove_decorator(self, cls): return self.base.remove_decorator(cls)
+
+    # Effect hooks
+    def on_shoot(self, bullets_list): pass
+    def on_draw(self, screen): pass
+    def absorb_damage(self): return None # Non-None result replaces the hull hit
+
+class RapidFireDecorator(ShipDecorator):
     def __init__(self, wrapped_ship):
-        self.ship = wrapped_ship
-        self.start_time = pygame.time.get_ticks()
-        self.duration = POWERUP_DURATION
+        super().__init__(wrapped_ship)
         APILogger().log("UPGRADE", "Tactical Nuke/Rapid Fire Equipped")
 
-    def update(self):
-        # Propagate update and check for inner expiration
-        res = self.ship.update()
-        if res == "EXPIRED":
-             # Unwrap the expired inner decorator
-             # APILogger().log("DECORATOR_UNWRAP", f"Unwrapping {type(self.ship).__name__}")
-             self.ship = self.ship.remove_decorator(type(self.ship))
-        
-        if pygame.time.get_ticks() - self.start_time > self.duration:
-             return "EXPIRED"
-        return None
-
-    def move(self, dx): self.ship.move(dx)
-    def set_x(self, x): self.ship.set_x(x)
-    def take_damage(self): return self.ship.take_damage()
-    def get_rect(self): return self.ship.get_rect()
-    def get_base_ship(self): return self.ship.get_base_ship()
-    def has_decorator(self, cls): 
-        return isinstance(self, cls) or self.ship.has_decorator(cls)
-    def remove_decorator(self, cls):
-        if isinstance(self, cls): return self.ship
-        self.ship = self.ship.remove_decorator(cls)
-        return self
-
-    def shoot(self, bullets_list):
-        self.ship.shoot(bullets_list) # Middle shot
+    def on_shoot(self, bullets_list):
         # Wingman shots
-        b1 = pygame.Rect(self.ship.get_rect().left, self.ship.get_rect().top + 10, 4, 15)
-        b2 = pygame.Rect(self.ship.get_rect().right, self.ship.get_rect().top + 10, 4, 15)
-        bullets_list.append(b1)
-        bullets_list.append(b2)
+        rect = self.base.rect
+        bullets_list.append(pygame.Rect(rect.left, rect.top + 10, 4, 15))
+        bullets_list.append(pygame.Rect(rect.right, rect.top + 10, 4, 15))
 
-    def draw(self, screen):
-        self.ship.draw(screen)
+    def on_draw(self, screen):
         # Draw Energy Shield Aura
-        pygame.draw.circle(screen, (0, 255, 255), self.ship.get_rect().center, 40, 1)
+        pygame.draw.circle(screen, (0, 255, 255), self.base.rect.center, 40, 1)
 
-class ShieldDecorator(Ship):
+class ShieldDecorator(ShipDecorator):
     def __init__(self, wrapped_ship):
-        self.ship = wrapped_ship
-        self.start_time = pygame.time.get_ticks()
-        self.duration = POWERUP_DURATION
+        super().__init__(wrapped_ship)
         APILogger().log("UPGRADE", "Energy Shield Activated")
 
-    def update(self):
-        # Propagate update and check for inner expiration
-        res = self.ship.update()
-        if res == "EXPIRED":
-             self.ship = self.ship.remove_decorator(type(self.ship))
-
-        if pygame.time.get_ticks() - self.start_time > self.duration:
-             return "EXPIRED"
-        return None
-
-    def move(self, dx): self.ship.move(dx)
-    def set_x(self, x): self.ship.set_x(x)
-    def get_rect(self): return self.ship.get_rect()
-
-    def shoot(self, bullets_list):
-        self.ship.shoot(bullets_list)
-
-    def take_damage(self):
+    def absorb_damage(self):
         # Shield absorbs damage then breaks!
         APILogger().log("DECORATOR_REMOVE", "ShieldDecorator removed from Ship")
         return "BREAK_SHIELD" # Special signal to Controller to unwrap
-    
-    def get_base_ship(self): return self.ship.get_base_ship()
-    def has_decorator(self, cls): 
-        return isinstance(self, cls) or self.ship.has_decorator(cls)
-    def remove_decorator(self, cls):
-        if isinstance(self, cls): return self.ship
-        self.ship = self.ship.remove_decorator(cls)
-        return self
 
-    def draw(self, screen):
-        self.ship.draw(screen)
+    def on_draw(self, screen):
+        center = self.base.rect.center
+        if not RENDER.shield_aura:
+            # Cheap outline instead of the full-size alpha blit
+            pygame.draw.circle(screen, (0, 255, 255), center, 50, 2)
+            return
         # Use cached shield aura for efficiency
         # Pulsing effect
         pulse = abs(math.sin(pygame.time.get_ticks() * 0.01)) * 20
         # Scale? No, just draws at center
-        screen.blit(SHIELD_AURA_SURF, (self.ship.get_rect().centerx - 60, self.ship.get_rect().centery - 60))
+        screen.blit(SHIELD_AURA_SURF, (center[0] - 60, center[1] - 60))
         # Extra glow
         if pulse > 10:
-            pygame.draw.circle(screen, (0, 255, 255, 100), self.ship.get_rect().center, 52, 1)
+            pygame.draw.circle(screen, (0, 255, 255, 100), center, 52, 1)
 
 # --- PATTERN: FACTORY / STRATEGY ---
 # While simple, this acts as a factory creating different power-up types.
 # The 'type_name' determines the strategy used when the player picks it up.
-class PowerUp(GameEntity):
+class PowerUp(GameEntity, Kinematic):
+    __slots__ = ('rect', 'type', 'slot')
+
     def __init__(self, x, y, type_name):
         self.rect = pygame.Rect(x, y, 30, 30)
+        self.reset(x, y, type_name)
+
+    def reset(self, x, y, type_name):
+        self.rect.topleft = (x, y)
+        self._init_motion(x, y)
         self.type = type_name # 'SHIELD' or 'LIFE'
     
     def update(self):
-        self.rect.y += 3 # Fall down
+        self._begin_step()
+        self.y += 3 # Fall down
+        self._sync_rect()
         
     def draw(self, screen):
+        r = self.draw_rect()
         # Glow Effect using pre-rendered surfaces
         pulse_idx = int((math.sin(pygame.time.get_ticks() * 0.01) + 1) * 4.5) # 0 to 9 index
         pulse_idx = max(0, min(pulse_idx, 9))
         
         if self.type == 'LIFE':
-            surf = GLOW_SURFACES_LIFE[pulse_idx] if pulse_idx < len(GLOW_SURFACES_LIFE) else DUMMY_SURF
-            screen.blit(surf, (self.rect.centerx - surf.get_width()//2, self.rect.centery - surf.get_height()//2))
-            if HEART_SURFACE: draw_heart(screen, self.rect.centerx, self.rect.centery - 5, 20)
+            if RENDER.glows:
+                surf = GLOW_SURFACES_LIFE[pulse_idx] if pulse_idx < len(GLOW_SURFACES_LIFE) else DUMMY_SURF
+                screen.blit(surf, (r.centerx - surf.get_width()//2, r.centery - surf.get_height()//2))
+            if HEART_SURFACE: draw_heart(screen, r.centerx, r.centery - 5, 20)
         elif self.type == 'RAPID':
-            surf = GLOW_SURFACES_RAPID[pulse_idx] if pulse_idx < len(GLOW_SURFACES_RAPID) else DUMMY_SURF
-            screen.blit(surf, (self.rect.centerx - surf.get_width()//2, self.rect.centery - surf.get_height()//2))
-            if RAPID_SURFACE: screen.blit(RAPID_SURFACE, (self.rect.x, self.rect.y))
+            if RENDER.glows:
+                surf = GLOW_SURFACES_RAPID[pulse_idx] if pulse_idx < len(GLOW_SURFACES_RAPID) else DUMMY_SURF
+                screen.blit(surf, (r.centerx - surf.get_width()//2, r.centery - surf.get_height()//2))
+            if RAPID_SURFACE: screen.blit(RAPID_SURFACE, (r.x, r.y))
         else: 
             # SHIELD
-            surf = GLOW_SURFACES_SHIELD[pulse_idx] if pulse_idx < len(GLOW_SURFACES_SHIELD) else DUMMY_SURF
-            screen.blit(surf, (self.rect.centerx - surf.get_width()//2, self.rect.centery - surf.get_height()//2))
-            if SHIELD_EMBLEM_SURFACE: draw_shield_emblem(screen, self.rect.centerx, self.rect.centery, 25)
+            if RENDER.glows:
+                surf = GLOW_SURFACES_SHIELD[pulse_idx] if pulse_idx < len(GLOW_SURFACES_SHIELD) else DUMMY_SURF
+                screen.blit(surf, (r.centerx - surf.get_width()//2, r.centery - surf.get_height()//2))
+            if SHIELD_EMBLEM_SURFACE: draw_shield_emblem(screen, r.centerx, r.centery, 25)
+
+# One free list per pooled entity type (WarState collections spawn/kill through these)
+POOLS = {cls: Pool(cls) for cls in (Drone, Hunter, Heavy, Asteroid, PowerUp)}
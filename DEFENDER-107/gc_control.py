@@ -0,0 +1,66 @@
+# gc_control.py
+# Cyclic garbage collector policy for the frame loop. CPython's default thresholds
+# start a collection whenever 700 container objects have been allocated, wherever
+# that happens to fall; an occasional full (gen 2) pass over every asset surface,
+# mask and cached text then lands mid-frame as a spike.
+#
+# 'managed' mode (GC_MODE):
+#   - the startup assets are collected once and frozen (gc.freeze): they move to the
+#     permanent generation and no later collection traverses them,
+#   - automatic collections are rarer (GC_THRESHOLDS), and young generations are
+#     collected ahead of time on frames with spare budget,
+#   - full collections run on entering a non-gameplay screen (GC_COLLECT_STATES), where
+#     a few ms go unnoticed; pausing and resuming a game never pays for one.
+import gc
+
+from settings import GC_MODE, GC_THRESHOLDS, GC_IDLE_MIN_MS, GC_COLLECT_STATES
+
+
+# --- PATTERN: SINGLETON ---
+class GCController:
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(GCController, cls).__new__(cls)
+            cls._instance.managed = GC_MODE == 'managed'
+            cls._instance.frozen = False    # freeze() has run (a no-op in default mode)
+            cls._instance.runs = [0, 0, 0]  # Collections started here, per generation
+        return cls._instance
+
+    def setup(self):
+        if self.managed:
+            gc.set_threshold(*GC_THRESHOLDS)
+
+    def freeze(self):
+        """Call once the long-lived assets are installed. Later calls are no-ops."""
+        if self.frozen:
+            return
+        self.frozen = True
+        if self.managed:
+            gc.collect()
+            gc.freeze()
+
+    def on_transition(self, new_name):
+        """Full collection when a game ends or before one starts (the old state's cycles go here)."""
+        if self.managed and new_name in GC_COLLECT_STATES:
+            gc.collect()
+            self.runs[2] += 1
+
+    def idle(self, spare):
+        """
+        Frame finished with `spare` seconds of budget left: run the young collection
+        the allocator would otherwise start in the middle of a later frame.
+        """
+        if not self.managed or spare * 1000 < GC_IDLE_MIN_MS:
+            return
+        count0, count1, _ = gc.get_count()
+        threshold0, threshold1, _ = gc.get_threshold()
+        if count1 >= threshold1 - 1 and count0 >= threshold0 // 2:
+            gc.collect(1) # The next automatic pass would include gen 1
+            self.runs[1] += 1
+        elif count0 >= threshold0 // 2:
+            gc.collect(0)
+            self.runs[0] += 1
+
+GC = GCController()
@@ -0,0 +1,73 @@
+# gunicorn.conf.py
+# Production server settings, picked up automatically by `gunicorn server:app`.
+# The app is imported once in the master (preload) and workers are forked from it:
+# worker boot is a fork instead of a full re-import, and no worker runs DDL
+# (the schema is created by `flask --app server init-db` in the release step).
+import glob
+import importlib.util
+import os
+import tempfile
+import time
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+# Exported: the app sizes its replay verification pool by the worker count
+workers = int(os.environ.setdefault('WEB_CONCURRENCY', '2'))
+# gevent workers by default (requirements.txt): every menu holds one /leaderboard/stream
+# connection, and a greenlet per stream costs no thread. gthread stays the fallback
+# when gevent is missing; it caps open streams per worker (LEADERBOARD_STREAM_MAX) and
+# answers the rest with 503, after which the game polls /leaderboard instead.
+# Exported so the app (server.create_app) sizes its stream cap for the same class.
+worker_class = os.environ.setdefault('GUNICORN_WORKER_CLASS',
+                                     'gevent' if importlib.util.find_spec('gevent') else 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+if worker_class == 'gevent':
+    # Patch before the preloaded app creates its locks, threads and sockets; the
+    # workers inherit the patched modules when they are forked
+    from gevent import monkey
+    monkey.patch_all()
+
+# Optional: benchmark.py boot sets this to time each worker's start-up
+_BOOT_LOG = os.environ.get('DEFENDER_BOOT_LOG')
+
+# /metrics (see metrics.py) and /admin/slow-queries (query_log.py): each worker writes to
+# its own files in this directory and a read merges them. Set before the app is imported,
+# inherited by workers.
+_METRICS_DIR = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR',
+                                     os.path.join(tempfile.gettempdir(), f"defender_metrics_{os.getpid()}"))
+
+
+def _clear_metrics():
+    for pattern in ('metrics_*.db', 'slow_queries*'):
+        for path in glob.glob(os.path.join(_METRICS_DIR, pattern)):
+            os.remove(path)
+
+def on_starting(server):
+    # Counters start from zero with the server, not with whatever a previous run left
+    _clear_metrics()
+
+def on_exit(server):
+    _clear_metrics()
+    try:
+        os.rmdir(_METRICS_DIR)
+    except OSError:
+        pass # Shared with something else
+
+def pre_fork(server, worker):
+    # Never hand pooled DB connections to a child process
+    if preload_app:
+        import server as app_module
+        app_module.dispose_engine(app_module.app, close=True)
+
+def post_fork(server, worker):
+    if preload_app:
+        import server as app_module
+        # Forget (without closing) anything inherited from the master
+        app_module.dispose_engine(app_module.app, close=False)
+
+def post_worker_init(worker):
+    if _BOOT_LOG:
+        with open(_BOOT_LOG, 'a') as f:
+            f.write(f"{worker.pid} {time.time():.6f}\n")
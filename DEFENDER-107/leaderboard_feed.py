@@ -0,0 +1,180 @@
+# leaderboard_feed.py
+# Client side of the live leaderboard, kept up to date while a menu is on screen.
+#   'stream' (LEADERBOARD_FEED default): one /leaderboard/stream (SSE) connection per
+#            menu visit, the server pushes only the positions that change.
+#   'poll'   : conditional GET of /leaderboard every LEADERBOARD_POLL_SECONDS with
+#              If-None-Match; an unchanged board is an empty 304. Also the fallback
+#              while the server refuses streams (404 / 503), until its Retry-After.
+import json
+import socket
+import sys
+import threading
+import time
+
+import requests
+from settings import (LEADERBOARD_URL, LEADERBOARD_STREAM_URL, LEADERBOARD_FEED, LEADERBOARD_POLL_SECONDS,
+                      LEADERBOARD_STREAM_RETRY_SECONDS)
+
+
+def _retry_after(response):
+    try:
+        return max(1.0, float(response.headers.get('Retry-After', LEADERBOARD_STREAM_RETRY_SECONDS)))
+    except ValueError:
+        return LEADERBOARD_STREAM_RETRY_SECONDS
+
+
+# --- PATTERN: SINGLETON + OBSERVER ---
+# MenuState instances come and go, the feed stays. Every MenuState reads the same
+# `top_scores` list, which the feed thread patches in place. The menu starts the feed
+# on entry and stops it when it is left, so nothing is polled or held open in game.
+class LeaderboardFeed:
+    _instance = None
+    _is_web = sys.platform == 'emscripten'
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(LeaderboardFeed, cls).__new__(cls)
+            cls._instance._init()
+        return cls._instance
+
+    def _init(self):
+        self.top_scores = []
+        self.online = False
+        self.version = -1
+        self._thread = None
+        self._generation = 0     # Bumped by stop(): older threads exit on their next check
+        self._running = False
+        self._response = None
+        self._etag = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Open the feed if it isn't already running. Cheap to call on every menu visit."""
+        if self._is_web:
+            return
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._generation += 1
+            self._wake.clear()
+            self._thread = threading.Thread(target=self._run, args=(self._generation,), daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Close the connection and end the feed thread (leaving the menu)."""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            self._generation += 1
+        self._wake.set()
+        self._close_response()
+
+    def resync(self):
+        """Fetch a fresh board now (stream: reconnect and receive a new snapshot)."""
+        self._etag = None
+        self._wake.set()
+        self._close_response()
+        self.start()
+
+    def _close_response(self):
+        # response.close() would wait for the feed thread's read (up to a keepalive, 15s):
+        # shutting the socket down ends that read at once, and the thread closes the rest
+        response = self._response
+        if response is not None:
+            try:
+                response.raw.connection.sock.shutdown(socket.SHUT_RDWR)
+            except Exception:
+                pass
+
+    def _current(self, generation):
+        return self._generation == generation
+
+    def _sleep(self, seconds, generation):
+        """Interruptible by stop() / resync(). False once this thread is stale."""
+        self._wake.wait(seconds)
+        if self._current(generation):
+            self._wake.clear()
+        return self._current(generation)
+
+    def _run(self, generation):
+        stream = LEADERBOARD_FEED == 'stream'
+        retry_stream_at = None
+        backoff = 1
+        while self._current(generation):
+            if not stream:
+                self._poll_once()
+                if retry_stream_at is not None and time.monotonic() >= retry_stream_at:
+                    stream, retry_stream_at = True, None
+                    continue
+                if not self._sleep(LEADERBOARD_POLL_SECONDS, generation):
+                    break
+                continue
+            try:
+                # Read timeout > server keepalive interval (15s)
+                with requests.get(LEADERBOARD_STREAM_URL, stream=True, timeout=(5, 40)) as r:
+                    if r.status_code in (404, 503):
+                        # No push support, or its stream slots are full: poll until Retry-After
+                        stream = False
+                        retry_stream_at = time.monotonic() + _retry_after(r)
+                        continue
+                    r.raise_for_status()
+                    self._response = r
+                    backoff = 1
+                    self._consume(r)
+            except Exception:
+                pass
+            self._response = None
+            self.online = False
+            if not self._sleep(backoff, generation):
+                break
+            backoff = min(backoff * 2, 30)
+
+    def _poll_once(self):
+        headers = {'If-None-Match': self._etag} if self._etag else {}
+        try:
+            r = requests.get(LEADERBOARD_URL, headers=headers, timeout=5)
+            if r.status_code == 200:
+                self.top_scores[:] = r.json()
+                self._etag = r.headers.get('ETag')
+                self.online = True
+            elif r.status_code == 304:
+                self.online = True
+            else:
+                self.online = False
+        except Exception:
+            self.online = False
+
+    def _consume(self, response):
+        event, data = None, []
+        for raw in response.iter_lines(decode_unicode=True):
+            if raw is None:
+                continue
+            if raw == "":
+                # Blank line terminates an event
+                if event in ("snapshot", "diff") and data:
+                    self._apply(event, json.loads("\n".join(data)))
+                event, data = None, []
+            elif raw.startswith("event:"):
+                event = raw[6:].strip()
+            elif raw.startswith("data:"):
+                data.append(raw[5:].lstrip())
+            # ':' comments (keepalives) and 'retry:' need no handling
+
+    def _apply(self, event, payload):
+        board = self.top_scores
+        if event == "snapshot":
+            board[:] = [entry for _, entry in payload["set"]]
+        else:
+            size = payload["size"]
+            if len(board) > size:
+                del board[size:]
+            for index, entry in payload["set"]:
+                if index < len(board):
+                    board[index] = entry
+                else:
+                    board.append(entry)
+        self.version = payload["v"]
+        self.online = True
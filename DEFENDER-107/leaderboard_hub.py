@@ -0,0 +1,161 @@
+# leaderboard_hub.py
+# Server-side push for the leaderboard (/leaderboard/stream, Server-Sent Events).
+import hashlib
+import json
+import queue
+import threading
+import time
+
+
+# --- PATTERN: OBSERVER ---
+# Every open SSE connection subscribes a queue to the hub. When the top-N changes
+# the hub publishes only the changed positions to every subscriber, so idle menus
+# cost nothing instead of re-querying /leaderboard on every visit.
+#
+# Diff event payload: {"v": version, "size": n, "set": [[index, entry], ...]}
+# A client applies it by resizing its list to `size` and overwriting each index.
+class LeaderboardHub:
+    def __init__(self, fetch_board, resync_interval=5.0, queue_size=32, max_subscribers=None):
+        """
+        fetch_board: callable returning the current top-N as a list of dicts.
+        resync_interval: seconds between background re-reads while someone is
+        subscribed, so scores submitted to other server processes are picked up.
+        max_subscribers: open streams allowed at once (None = no limit).
+        """
+        self._fetch_board = fetch_board
+        self._resync_interval = resync_interval
+        self._queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._board = None
+        self._etag = None
+        self._read_at = 0.0    # monotonic time of the last re-read
+        self._version = 0
+        self._watcher = None
+        self._wake = threading.Event()
+
+    # --- Subscribers ---
+    def subscribe(self):
+        """
+        Returns (queue, snapshot event), or (None, None) when max_subscribers streams
+        are already open. The caller must unsubscribe() when done.
+        """
+        q = queue.Queue(maxsize=self._queue_size)
+        if self._board is None:
+            self.refresh()
+        with self._lock:
+            if self.max_subscribers is not None and len(self._subscribers) >= self.max_subscribers:
+                return None, None
+            self._subscribers.add(q)
+            self._ensure_watcher()
+        return q, self.snapshot_event()
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def snapshot_event(self):
+        with self._lock:
+            board = list(self._board or [])
+            version = self._version
+        return _sse("snapshot", {"v": version, "size": len(board), "set": list(enumerate(board))})
+
+    def current(self):
+        """
+        (board, etag) for /leaderboard, from memory. Re-read at most once per
+        resync_interval (or after notify_changed); while streams are open the
+        watcher keeps it fresh, so polls never touch the database.
+        """
+        with self._lock:
+            if self._board is not None and (self._subscribers or
+                                            time.monotonic() - self._read_at < self._resync_interval):
+                return self._board, self._etag
+        self.refresh()
+        with self._lock:
+            return self._board, self._etag
+
+    # --- Publishing ---
+    def refresh(self):
+        """Re-read the board and push a diff if anything moved. Safe to call from any thread."""
+        board = self._fetch_board()
+        with self._lock:
+            self._read_at = time.monotonic()
+            old = self._board or []
+            changed = [[i, entry] for i, entry in enumerate(board) if i >= len(old) or old[i] != entry]
+            if self._board is not None and not changed and len(board) == len(old):
+                return False
+            self._board = board
+            # From the content: every worker gives the same board the same tag
+            self._etag = hashlib.sha1(json.dumps(board, sort_keys=True).encode()).hexdigest()[:20]
+            self._version += 1
+            event = _sse("diff", {"v": self._version, "size": len(board), "set": changed})
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                # Slow consumer: drop its backlog and resend the full board instead
+                _drain(q)
+                try:
+                    q.put_nowait(self.snapshot_event())
+                except queue.Full:
+                    pass
+        return True
+
+    def notify_changed(self):
+        """Called after a score is committed in this process: refresh now, off the request thread."""
+        if self._subscribers:
+            self._wake.set()
+        else:
+            # Nobody is listening, just forget the cached board
+            with self._lock:
+                self._board = None
+
+    # --- Background watcher (one per process, started lazily so it is fork-safe) ---
+    def _ensure_watcher(self):
+        if self._watcher is None or not self._watcher.is_alive():
+            self._watcher = threading.Thread(target=self._watch, daemon=True)
+            self._watcher.start()
+
+    def _watch(self):
+        while True:
+            self._wake.wait(self._resync_interval)
+            self._wake.clear()
+            with self._lock:
+                if not self._subscribers:
+                    self._watcher = None
+                    self._board = None
+                    return
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"LeaderboardHub: refresh failed: {e}")
+
+    def stream(self, q, first_event, keepalive=15.0):
+        """Generator of SSE frames for one connection."""
+        try:
+            yield "retry: 3000\n\n"
+            yield first_event
+            while True:
+                try:
+                    yield q.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+        finally:
+            self.unsubscribe(q)
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+def _drain(q):
+    try:
+        while True:
+            q.get_nowait()
+    except queue.Empty:
+        pass
@@ -0,0 +1,267 @@
+# loadgen.py
+# Multi-client load generator for server.py.
+# Simulates N game clients with the same traffic mix as APILogger:
+#   - game events batched by 10 on /log/batch
+#   - an immediate /score post at the end of every game
+#   - /leaderboard polls whenever a client sits on the menu
+# By default it boots a local gunicorn server on a throwaway SQLite database.
+#
+# Usage: python loadgen.py --clients 50 --duration 30 --workers 4
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import wire_format
+from async_http import AsyncHTTPConnection
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+API_KEY = os.environ.get('API_KEY', 'Defender-gamo-pwd-2025')
+BATCH_SIZE = 10  # Same flush size as APILogger._worker_loop
+
+# Event mix of a real session (see instance/game_data.db), weighted by frequency
+EVENT_MIX = [
+    ("ENTITY_DESTROY", "{enemy} destroyed. Score: {score}", 40),
+    ("PICKUP", "Collected {powerup} PowerUp", 12),
+    ("DAMAGE", "Hull Integrity Critical. Lives: {lives}", 6),
+    ("GAME", "Wave {wave} Spawning", 5),
+    ("UPGRADE", "Energy Shield Activated", 4),
+    ("STATE_TRANSITION", "WarState -> PauseState", 4),
+    ("CHARACTER_STATE", "Pilot -> Moving", 2),
+]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, endpoint, seconds, ok):
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def report(self, elapsed):
+        rows = []
+        total = 0
+        for endpoint in sorted(self.latencies):
+            values = sorted(self.latencies[endpoint])
+            total += len(values)
+            rows.append({
+                "endpoint": endpoint,
+                "requests": len(values),
+                "errors": self.errors.get(endpoint, 0),
+                "rps": len(values) / elapsed,
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+            })
+        return {"elapsed_s": elapsed, "total_requests": total, "total_rps": total / elapsed, "endpoints": rows}
+
+
+class SimulatedClient:
+    """Reproduces one player's APILogger traffic: menu -> game -> score -> menu ..."""
+
+    def __init__(self, client_id, base_url, stats, args):
+        self.name = f"LOAD_{client_id}"
+        self.conn = AsyncHTTPConnection(base_url, timeout=args.timeout)
+        self.stats = stats
+        self.args = args
+        self.rng = random.Random(client_id)
+        self.batch = []
+        self.events = [(level, template) for level, template, _ in EVENT_MIX]
+        self.weights = [weight for _, _, weight in EVENT_MIX]
+
+    async def _call(self, endpoint, method, path, body=b"", headers=None):
+        start = time.perf_counter()
+        ok = False
+        try:
+            status, _ = await self.conn.request(method, path, body, headers)
+            ok = status < 400
+        except Exception:
+            pass
+        self.stats.record(endpoint, time.perf_counter() - start, ok)
+
+    def _encode(self, kind, payload):
+        headers = {"X-API-KEY": API_KEY}
+        if self.args.format == 'json':
+            headers["Content-Type"] = wire_format.JSON_CONTENT_TYPE
+            if kind == 'logs':
+                body = json.dumps([{"level": l, "message": m, "ts": t} for l, m, t in payload]).encode()
+            else:
+                body = json.dumps({"username": payload[0], "score": payload[1]}).encode()
+            return body, headers
+        if kind == 'logs':
+            body = wire_format.encode_log_batch(payload)
+            headers["Content-Type"] = wire_format.LOG_BATCH_CONTENT_TYPE
+        else:
+            body = wire_format.encode_score(*payload)
+            headers["Content-Type"] = wire_format.SCORE_CONTENT_TYPE
+        body, encoding = wire_format.compress(body, self.args.compression)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return body, headers
+
+    async def _log(self, level, message):
+        self.batch.append((level, message, int(time.time() * 1000)))
+        if len(self.batch) >= BATCH_SIZE:
+            body, headers = self._encode('logs', self.batch)
+            self.batch = []
+            await self._call("POST /log/batch", "POST", "/log/batch", body, headers)
+
+    async def _play_game(self, deadline):
+        score = 0
+        wave = 1
+        game_end = min(deadline, time.monotonic() + self.rng.uniform(*self.args.game_seconds))
+        interval = 1.0 / self.args.events_per_sec
+        await self._log("GAME_START", f"Mission Started by {self.name}")
+        while time.monotonic() < game_end:
+            await asyncio.sleep(self.rng.expovariate(1.0 / interval))
+            level, template = self.rng.choices(self.events, self.weights)[0]
+            if level == "ENTITY_DESTROY":
+                score += 100 * wave
+            elif level == "GAME":
+                wave += 1
+            await self._log(level, template.format(
+                enemy=self.rng.choice(("Drone", "Hunter", "Heavy")), score=score,
+                powerup=self.rng.choice(("SHIELD", "LIFE", "RAPID")),
+                lives=self.rng.randint(0, 3), wave=wave))
+        await self._log("DEATH", f"Game Over. Final Score: {score}")
+        # Priority 2 in APILogger: scores skip the batch
+        body, headers = self._encode('score', (self.name, score))
+        await self._call("POST /score", "POST", "/score", body, headers)
+
+    async def run(self, deadline):
+        # Stagger start-up so every client doesn't hit the menu at t=0
+        await asyncio.sleep(self.rng.uniform(0, self.args.ramp))
+        try:
+            while time.monotonic() < deadline:
+                # MenuState: one leaderboard fetch on entry, then a refresh (K_r) now and then
+                await self._call("GET /leaderboard", "GET", "/leaderboard")
+                menu_end = min(deadline, time.monotonic() + self.rng.uniform(*self.args.menu_seconds))
+                while True:
+                    remaining = menu_end - time.monotonic()
+                    if remaining <= self.args.poll_interval:
+                        await asyncio.sleep(max(0, remaining))
+                        break
+                    await asyncio.sleep(self.args.poll_interval)
+                    await self._call("GET /leaderboard", "GET", "/leaderboard")
+                if time.monotonic() >= deadline:
+                    break
+                await self._play_game(deadline)
+        finally:
+            await self.conn.close()
+
+
+# --- LOCAL SERVER ---
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_local_server(workers, db_dir):
+    """Boots server.py on a fresh SQLite file. gunicorn if available, Flask's server otherwise."""
+    port = _free_port()
+    env = dict(os.environ)
+    env['DATABASE_URL'] = f"sqlite:///{os.path.join(db_dir, 'load.db')}"
+    env['API_KEY'] = API_KEY
+    # Schema bootstrap is a one-off step, exactly like the Procfile release phase
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'server', 'init-db'],
+                   cwd=BASE_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+    if shutil.which('gunicorn'):
+        cmd = ['gunicorn', '-c', 'gunicorn.conf.py', 'server:app', '-w', str(workers),
+               '-b', f'127.0.0.1:{port}', '--log-level', 'warning']
+    else:
+        print("gunicorn not found, falling back to the Flask development server")
+        cmd = [sys.executable, '-m', 'flask', '--app', 'server', 'run', '--port', str(port), '--with-threads']
+    proc = subprocess.Popen(cmd, cwd=BASE_DIR, env=env)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("server exited during start-up")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return proc, url
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("server did not start within 30s")
+
+
+async def run_load(url, args):
+    stats = Stats()
+    deadline = time.monotonic() + args.duration
+    clients = [SimulatedClient(i, url, stats, args) for i in range(args.clients)]
+    start = time.monotonic()
+    await asyncio.gather(*(c.run(deadline) for c in clients))
+    return stats.report(time.monotonic() - start)
+
+
+def print_report(report, args):
+    print(f"\n{args.clients} clients, {report['elapsed_s']:.1f}s, "
+          f"{report['total_requests']} requests, {report['total_rps']:.1f} req/s")
+    print(f"{'endpoint':<20}{'reqs':>8}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for r in report['endpoints']:
+        print(f"{r['endpoint']:<20}{r['requests']:>8}{r['errors']:>8}{r['rps']:>9.1f}"
+              f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate N game clients against server.py")
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=30, help="seconds")
+    parser.add_argument('--url', help="target an already running server instead of starting one")
+    parser.add_argument('--workers', type=int, default=2, help="gunicorn workers for the local server")
+    parser.add_argument('--format', choices=('compact', 'json'), default='compact')
+    parser.add_argument('--compression', choices=('gzip', 'zstd', 'none'), default='gzip')
+    parser.add_argument('--events-per-sec', type=float, default=4.0, help="log events per client while in game")
+    parser.add_argument('--game-seconds', type=float, nargs=2, default=(20, 90))
+    parser.add_argument('--menu-seconds', type=float, nargs=2, default=(3, 15))
+    parser.add_argument('--poll-interval', type=float, default=5.0, help="leaderboard refresh while on the menu")
+    parser.add_argument('--ramp', type=float, default=2.0, help="spread client start over this many seconds")
+    parser.add_argument('--timeout', type=float, default=5.0)
+    parser.add_argument('--json', dest='json_out', help="also write the report to this file (for tracking across releases)")
+    args = parser.parse_args()
+    if args.compression == 'none':
+        args.compression = None
+
+    proc = None
+    tmp_dir = None
+    url = args.url
+    try:
+        if not url:
+            tmp_dir = tempfile.mkdtemp(prefix='defender-load-')
+            proc, url = start_local_server(args.workers, tmp_dir)
+        report = asyncio.run(run_load(url, args))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print_report(report, args)
+    if args.json_out:
+        report['config'] = {k: v for k, v in vars(args).items() if k != 'json_out'}
+        with open(args.json_out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,26 @@
 # main.py
+import os
 import random
+import time
 
 import pygame
 import sys
 from settings import *
-from states import MenuState
-from entities import initialize_entities
+from states import LoadingState
+from entities import initialize_entities, ASSETS
 from api_logger import APILogger
+from render import RENDER, QualityGovernor, QUALITY_TIERS
+from gc_control import GC
+from perf_telemetry import PERF
 
 # --- ASYNCIO FOR WEB ---
 # We use asyncio to make the game compatible with 'pygbag' for web deployment.
 # This allows the game loop to yield control to the browser's event loop.
 import asyncio
 
+# Optional: benchmark.py startup sets this to time the first frame and asset readiness
+_STARTUP_LOG = os.environ.get('DEFENDER_STARTUP_LOG')
+
 class WarGame:
     def __init__(self):
         pygame.init()
@@ -29,11 +37,16 @@ class WarGame:
         self.fullscreen = FULLSCREEN
         self.clock = pygame.time.Clock()
         self.player_name = "PILOT_X" # Default Name
+        # Steps effect quality down/up from measured frame times (see render.py)
+        self.governor = QualityGovernor()
+        GC.setup()
         
-        # Explicitly initialize procedurally generated assets
-        initialize_entities()
+        # Procedurally generated / decoded assets bake on the asset pool;
+        # the loading screen waits only for what the menu needs
+        initialize_entities(wait=False)
         
-        self.state = MenuState()
+        self.state = LoadingState()
+        self._startup_marks = set()
         
         APILogger().log("SYSTEM", "War Engine Initialized")
 
@@ -44,11 +57,37 @@ class WarGame:
         """
         old_name = self.state.__class__.__name__
         new_name = new_state.__class__.__name__
+        self.state.leave(self)
         self.state = new_state
+        new_state.enter(self)
         APILogger().log("STATE_TRANSITION", f"{old_name} -> {new_name}")
+        if new_name in PERF_FLUSH_STATES:
+            PERF.flush() # Session over: its frame-time summaries go out at low priority
+        GC.on_transition(new_name)
+
+    def _log_startup(self):
+        marks = [('first_frame', True), ('menu_ready', ASSETS.ready('menu')), ('assets_ready', ASSETS.ready())]
+        for name, reached in marks:
+            if reached and name not in self._startup_marks:
+                self._startup_marks.add(name)
+                with open(_STARTUP_LOG, 'a') as f:
+                    f.write(f"{name} {time.time():.6f}\n")
 
+    # --- FIXED TIMESTEP ---
+    # The simulation advances in SIM_DT ticks drained from an accumulator of real
+    # time; rendering happens once per loop at RENDER_FPS and interpolates between
+    # the last two ticks (RENDER.alpha). A slow frame costs a few catch-up ticks
+    # (at most MAX_CATCHUP_STEPS), never a slower game.
     async def run(self):
+        # Network delivery runs as tasks on this loop, between frames
+        APILogger().attach_loop()
+        accumulator = 0.0
+        last = time.perf_counter()
         while True:
+            now = time.perf_counter()
+            accumulator += min(now - last, MAX_FRAME_TIME)
+            last = now
+
             events = pygame.event.get()
             for e in events:
                 if e.type == pygame.KEYDOWN:
@@ -59,16 +98,39 @@ class WarGame:
 
                 if e.type == pygame.QUIT:
                     APILogger().log("SYSTEM", "Engine Shutdown")
+                    PERF.flush()
                     APILogger().shutdown()
                     pygame.quit()
                     sys.exit()
 
+            # Publish assets finished by the baking threads (between frames only)
+            ASSETS.poll()
+            if not GC.frozen and ASSETS.ready():
+                GC.freeze() # Everything baked at startup lives for the whole session
             self.state.handle_input(events, self)
-            self.state.update(self)
+            steps = 0
+            while accumulator >= SIM_DT and steps < MAX_CATCHUP_STEPS:
+                self.state.update(self)
+                accumulator -= SIM_DT
+                steps += 1
+            if steps == MAX_CATCHUP_STEPS:
+                # Too far behind: drop the backlog instead of spiralling
+                accumulator = min(accumulator, SIM_DT)
+            RENDER.alpha = accumulator / SIM_DT
             self.state.draw(self)
 
             pygame.display.flip()
-            self.clock.tick(FPS)
+            if _STARTUP_LOG:
+                self._log_startup()
+            work = time.perf_counter() - now
+            PERF.record(self.state.__class__.__name__, work, self.state.entity_count())
+            tier = self.governor.record(work)
+            if tier is not None:
+                APILogger().log("SYSTEM", f"Render quality -> {QUALITY_TIERS[tier]['name']}")
+            # Hand queued events to the network tasks (bounded time slice)
+            APILogger().pump()
+            GC.idle(1.0 / RENDER_FPS - work)
+            self.clock.tick(RENDER_FPS)
             # Yield control to the event loop (crucial for web/async compatibility)
             await asyncio.sleep(0) 
 
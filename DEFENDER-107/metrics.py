@@ -0,0 +1,255 @@
+# metrics.py
+# Server metrics in the Prometheus text format (/metrics), summed over every gunicorn
+# worker process.
+#
+# Multiprocess mode (PROMETHEUS_MULTIPROC_DIR set, see gunicorn.conf.py): each
+# process appends its samples to its own memory-mapped file in that directory, and
+# a /metrics request reads and sums the files of every worker, live or exited
+# (counters and histograms only, so summing is always correct). Without the
+# directory, values stay in process memory (development server).
+#
+# Per-process file layout (little endian):
+#   u32 used bytes, u32 reserved
+#   entries: u32 key length, key (JSON [sample name, [[label, value], ...]]) padded
+#            to 8 bytes, f64 value
+# A sample's offset never changes, so an update is one 8-byte write in place; a new
+# entry is written first and published by bumping `used`, so readers never see a
+# half-written entry.
+import bisect
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+
+MULTIPROC_DIR_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_HEADER = struct.Struct('<II')
+_KEY_LEN = struct.Struct('<I')
+_VALUE = struct.Struct('<d')
+_INITIAL_SIZE = 1 << 16
+
+# Latency buckets in seconds (requests and DB round trips)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class _MmapValues:
+    """This process's samples, in its own file of the multiprocess directory."""
+    def __init__(self, path):
+        self._f = open(path, 'a+b')
+        if os.fstat(self._f.fileno()).st_size == 0:
+            self._f.truncate(_INITIAL_SIZE)
+        self._size = os.fstat(self._f.fileno()).st_size
+        self._map = mmap.mmap(self._f.fileno(), self._size)
+        self._used = _HEADER.unpack_from(self._map, 0)[0] or _HEADER.size
+        self._offsets = {key: offset for key, _, offset in _read_entries(self._map, self._used)}
+
+    def add(self, key, amount):
+        offset = self._offsets.get(key)
+        if offset is None:
+            offset = self._append(key)
+        _VALUE.pack_into(self._map, offset, _VALUE.unpack_from(self._map, offset)[0] + amount)
+
+    def _append(self, key):
+        encoded = key.encode('utf-8')
+        padded = _KEY_LEN.size + len(encoded) + (-(_KEY_LEN.size + len(encoded)) % 8)
+        needed = self._used + padded + _VALUE.size
+        if needed > self._size:
+            self._grow(needed)
+        _KEY_LEN.pack_into(self._map, self._used, len(encoded))
+        self._map[self._used + _KEY_LEN.size:self._used + _KEY_LEN.size + len(encoded)] = encoded
+        offset = self._used + padded
+        _VALUE.pack_into(self._map, offset, 0.0)
+        self._used = needed
+        _HEADER.pack_into(self._map, 0, self._used, 0) # Publish the entry
+        self._offsets[key] = offset
+        return offset
+
+    def _grow(self, needed):
+        size = self._size
+        while size < needed:
+            size *= 2
+        self._map.close()
+        self._f.truncate(size)
+        self._size = size
+        self._map = mmap.mmap(self._f.fileno(), size)
+
+
+class _MemoryValues:
+    def __init__(self):
+        self.values = {}
+
+    def add(self, key, amount):
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+
+def _read_entries(data, used):
+    """Yields (key, value, value offset) for the published entries of one process file."""
+    pos = _HEADER.size
+    while pos < used:
+        length = _KEY_LEN.unpack_from(data, pos)[0]
+        key = bytes(data[pos + _KEY_LEN.size:pos + _KEY_LEN.size + length]).decode('utf-8')
+        pos += _KEY_LEN.size + length + (-(_KEY_LEN.size + length) % 8)
+        yield key, _VALUE.unpack_from(data, pos)[0], pos
+        pos += _VALUE.size
+
+
+# --- PATTERN: SINGLETON ---
+# One registry per process. Storage is opened on first use and re-opened after a
+# fork, so the gunicorn master (preload) and each worker never share a file.
+class MetricsRegistry:
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(MetricsRegistry, cls).__new__(cls)
+            cls._instance.metrics = []
+            cls._instance._lock = threading.Lock()
+            cls._instance._pid = None
+            cls._instance._values = None
+        return cls._instance
+
+    @property
+    def directory(self):
+        return os.environ.get(MULTIPROC_DIR_ENV)
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add(self, *updates):
+        """updates: (sample key, amount) pairs, applied under one lock."""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._open()
+            for key, amount in updates:
+                self._values.add(key, amount)
+
+    def _open(self):
+        self._pid = os.getpid()
+        directory = self.directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._values = _MmapValues(os.path.join(directory, f"metrics_{self._pid}.db"))
+        else:
+            self._values = _MemoryValues()
+
+    def collect(self):
+        """{key: value} summed over every process file (or this process's values)."""
+        directory = self.directory
+        if not directory:
+            with self._lock:
+                return dict(self._values.values) if self._values else {}
+        totals = {}
+        for path in glob.glob(os.path.join(directory, 'metrics_*.db')):
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except OSError:
+                continue
+            if len(data) < _HEADER.size:
+                continue
+            used = _HEADER.unpack_from(data, 0)[0]
+            for key, value, _ in _read_entries(data, min(used, len(data))):
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+    def exposition(self):
+        """Prometheus text format for every registered metric."""
+        samples = {}
+        for key, value in self.collect().items():
+            name, labels = json.loads(key)
+            samples.setdefault(name, []).append((tuple(map(tuple, labels)), value))
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.TYPE}")
+            lines.extend(metric.render(samples))
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+
+def _sample_key(name, labels):
+    return json.dumps([name, labels], separators=(',', ':'))
+
+def _label_pairs(labelnames, labels):
+    return [[k, str(labels[k])] for k in labelnames]
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"') for _, v in labels)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + '}'
+
+def _format_value(value):
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+class Counter:
+    TYPE = 'counter'
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry
+        self._keys = {}  # label values -> sample key (routes and statuses are few)
+        registry.register(self)
+
+    def inc(self, amount=1, **labels):
+        values = tuple(labels[k] for k in self.labelnames)
+        key = self._keys.get(values)
+        if key is None:
+            key = self._keys[values] = _sample_key(self.name + '_total', _label_pairs(self.labelnames, labels))
+        self.registry.add((key, amount))
+
+    def render(self, samples):
+        for labels, value in sorted(samples.get(self.name + '_total', ())):
+            yield f"{self.name}_total{_format_labels(labels)} {_format_value(value)}"
+
+
+class Histogram:
+    """Bucket counts are stored per bucket and made cumulative when rendered."""
+    TYPE = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(float(b) for b in buckets)
+        self.registry = registry
+        self._keys = {}  # label values -> ([bucket keys..., +Inf key], sum key, count key)
+        registry.register(self)
+
+    def observe(self, value, **labels):
+        values = tuple(labels[k] for k in self.labelnames)
+        keys = self._keys.get(values)
+        if keys is None:
+            pairs = _label_pairs(self.labelnames, labels)
+            les = [repr(b) for b in self.buckets] + ['+Inf']
+            keys = self._keys[values] = ([_sample_key(self.name + '_bucket', pairs + [['le', le]]) for le in les],
+                                         _sample_key(self.name + '_sum', pairs),
+                                         _sample_key(self.name + '_count', pairs))
+        buckets, sum_key, count_key = keys
+        # Only the bucket the value falls in; render() makes the counts cumulative
+        self.registry.add((buckets[bisect.bisect_left(self.buckets, value)], 1),
+                          (sum_key, value), (count_key, 1))
+
+    def render(self, samples):
+        counts = {}
+        for labels, value in samples.get(self.name + '_bucket', ()):
+            counts.setdefault(labels[:-1], {})[labels[-1][1]] = value
+        sums = dict(samples.get(self.name + '_sum', ()))
+        totals = dict(samples.get(self.name + '_count', ()))
+        for labels in sorted(totals):
+            per_bucket = counts.get(labels, {})
+            cumulative = 0.0
+            for bound in self.buckets:
+                cumulative += per_bucket.get(repr(bound), 0.0)
+                yield f"{self.name}_bucket{_format_labels(labels + (('le', repr(bound)),))} {_format_value(cumulative)}"
+            yield f"{self.name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {_format_value(totals[labels])}"
+            yield f"{self.name}_sum{_format_labels(labels)} {_format_value(sums.get(labels, 0.0))}"
+            yield f"{self.name}_count{_format_labels(labels)} {_format_value(totals[labels])}"
@@ -0,0 +1,123 @@
+# perf_telemetry.py
+# Client performance telemetry. WarGame.run reports every frame's work time (update +
+# draw + flip) under the current state's name; per state we keep a fixed histogram of
+# frame times, so percentiles cost no per-frame allocation and memory stays constant
+# however long the session runs.
+#
+# flush() turns the histograms into one compact summary per state
+#   {sid, build, platform, state, frames, p50, p95, p99, max, dropped, entities, mem_kb}
+# (times in ms; dropped = frames over the RENDER_FPS budget; entities = peak live
+# entities; mem_kb = peak resident memory of the process) and hands them to APILogger,
+# which sends them on its low-priority channel (see APILogger.report_perf).
+import platform
+import sys
+import uuid
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows, browsers: no peak memory figure
+
+from settings import PERF_TELEMETRY, PERF_MIN_FRAMES, BUILD_ID, RENDER_FPS
+from api_logger import APILogger
+
+FRAME_BIN_MS = 0.25  # Histogram resolution
+FRAME_BINS = 400     # 0..100 ms; slower frames land in the last bin (max_ms keeps the real value)
+
+
+class FrameStats:
+    """Frame-time histogram of one state since the last flush."""
+    __slots__ = ('bins', 'frames', 'dropped', 'max_ms', 'entities')
+
+    def __init__(self):
+        self.bins = [0] * FRAME_BINS
+        self.frames = 0
+        self.dropped = 0
+        self.max_ms = 0.0
+        self.entities = 0
+
+    def add(self, ms, budget_ms, entities):
+        index = int(ms / FRAME_BIN_MS)
+        self.bins[index if index < FRAME_BINS else FRAME_BINS - 1] += 1
+        self.frames += 1
+        if ms > budget_ms:
+            self.dropped += 1
+        if ms > self.max_ms:
+            self.max_ms = ms
+        if entities > self.entities:
+            self.entities = entities
+
+    def percentile(self, q):
+        """Upper edge of the bin holding the q-th fraction of frames (ms)."""
+        target = q * self.frames
+        seen = 0
+        for i, n in enumerate(self.bins):
+            seen += n
+            if seen >= target:
+                return min((i + 1) * FRAME_BIN_MS, self.max_ms)
+        return self.max_ms
+
+
+def peak_memory_kb():
+    if resource is None:
+        return 0
+    try:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except:
+        return 0
+    return peak // 1024 if sys.platform == 'darwin' else peak  # bytes on macOS, KB elsewhere
+
+def platform_tag():
+    """'linux-x86_64', 'win32-AMD64', 'emscripten-wasm32'..."""
+    return f"{sys.platform}-{platform.machine() or 'unknown'}"[:32]
+
+
+# --- PATTERN: SINGLETON ---
+class PerfTelemetry:
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(PerfTelemetry, cls).__new__(cls)
+            cls._instance.enabled = PERF_TELEMETRY
+            cls._instance.session = uuid.uuid4().hex[:16]  # New id after every flush
+            cls._instance.platform = platform_tag()
+            cls._instance.budget_ms = 1000.0 / RENDER_FPS
+            cls._instance.states = {}  # state name -> FrameStats
+        return cls._instance
+
+    def record(self, state, work, entities=0):
+        """One rendered frame of `state` (class name) that took `work` seconds."""
+        if not self.enabled:
+            return
+        stats = self.states.get(state)
+        if stats is None:
+            stats = self.states[state] = FrameStats()
+        stats.add(work * 1000.0, self.budget_ms, entities)
+
+    def summaries(self):
+        mem_kb = peak_memory_kb()
+        out = []
+        for state, stats in self.states.items():
+            if stats.frames < PERF_MIN_FRAMES:
+                continue
+            out.append({
+                'sid': self.session, 'build': BUILD_ID, 'platform': self.platform, 'state': state,
+                'frames': stats.frames,
+                'p50': stats.percentile(0.50), 'p95': stats.percentile(0.95), 'p99': stats.percentile(0.99),
+                'max': round(stats.max_ms, 2), 'dropped': stats.dropped,
+                'entities': stats.entities, 'mem_kb': mem_kb,
+            })
+        return out
+
+    def flush(self):
+        """End of a session: report every state seen long enough, then start over."""
+        if not self.enabled:
+            return
+        summaries = self.summaries()
+        self.states = {}
+        self.session = uuid.uuid4().hex[:16]
+        if summaries:
+            APILogger().report_perf(summaries)
+
+PERF = PerfTelemetry()
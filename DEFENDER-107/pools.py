@@ -0,0 +1,78 @@
+# pools.py
+# Object pools for short-lived game entities (enemies, asteroids, power-ups).
+# A finished entity goes back to its type's free list and is reset in place on the
+# next spawn, so long sessions stop allocating a new object + Rect per spawn.
+
+
+# --- PATTERN: OBJECT POOL ---
+class Pool:
+    """Free list for one entity class. The class must provide reset(*args) taking its __init__ args."""
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, *args, **kwargs):
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args, **kwargs)
+            self.reused += 1
+            return obj
+        self.created += 1
+        return self.cls(*args, **kwargs)
+
+    def release(self, obj):
+        self.free.append(obj)
+
+
+class ActiveList:
+    """
+    Live entities of one collection. Each entity stores its index in `slot`, so
+    kill() is O(1): the last entity is swapped into the hole (no list.remove scan),
+    and the killed one goes back to its pool.
+    """
+    def __init__(self, pools):
+        self.pools = pools  # entity class -> Pool
+        self.items = []
+
+    def spawn(self, cls, *args, **kwargs):
+        obj = self.pools[cls].acquire(*args, **kwargs)
+        self.add(obj)
+        return obj
+
+    def add(self, obj):
+        obj.slot = len(self.items)
+        self.items.append(obj)
+
+    def kill(self, obj):
+        if obj.slot < 0:
+            return # Already killed this frame: a second swap-remove would drop a live entity
+        items = self.items
+        last = items.pop()
+        if last is not obj:
+            items[obj.slot] = last
+            last.slot = obj.slot
+        obj.slot = -1
+        self.pools[type(obj)].release(obj)
+
+    def each(self):
+        """Newest to oldest. Safe to kill() the entity being visited (only visited ones move)."""
+        items = self.items
+        i = len(items) - 1
+        while i >= 0:
+            if i < len(items):
+                yield items[i]
+            i -= 1
+
+    def clear(self):
+        for obj in self.items:
+            obj.slot = -1
+            self.pools[type(obj)].release(obj)
+        self.items = []
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
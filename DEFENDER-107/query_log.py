@@ -0,0 +1,238 @@
+# query_log.py
+# Slow-query log for the server's database. server.py times every statement
+# (after_cursor_execute); the ones slower than the threshold are kept in a bounded
+# ring buffer with their query plan, readable from /admin/slow-queries.
+#
+# - Parameter values are never stored: each is replaced by its type ('<str>'), and
+#   literals written into the SQL text itself by '?'.
+# - Plans come from EXPLAIN QUERY PLAN (SQLite) or EXPLAIN (PostgreSQL), run on the
+#   same DB-API connection with the original parameters (EXPLAIN plans, it doesn't
+#   execute). The raw DB-API cursor fires no SQLAlchemy events, so this never recurses.
+# - One plan per statement is cached for `plan_ttl` seconds: a statement that is slow
+#   on every request pays for EXPLAIN once, and a plan that changes as the tables grow
+#   is captured again later.
+#
+# Under gunicorn (PROMETHEUS_MULTIPROC_DIR set, like metrics.py) every worker rewrites
+# its buffer to its own file in that directory after each slow statement, and a read
+# merges the files of every worker. clear() drops a marker file: entries older than
+# it are ignored by readers and discarded by each worker on its next write.
+# Without the directory the buffer is in process memory (development server).
+import glob
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from metrics import MULTIPROC_DIR_ENV
+
+EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+MAX_STATEMENT = 2000  # Characters kept per statement
+MAX_PLANS = 200       # Cached plans (distinct statements)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(statement):
+    """SQL text on one line, literals replaced by '?'."""
+    return _LITERALS.sub('?', _WHITESPACE.sub(' ', statement).strip())[:MAX_STATEMENT]
+
+def _is_many(parameters):
+    # Judged from the shape: SQLAlchemy's executemany flag is also set for
+    # "insertmanyvalues" batches, which pass one flat row
+    return (isinstance(parameters, (list, tuple)) and len(parameters) > 0
+            and isinstance(parameters[0], (dict, list, tuple)))
+
+def redact(parameters):
+    """Same shape as the DB-API parameters, values replaced by their type name."""
+    if _is_many(parameters):
+        return {'rows': len(parameters), 'first': redact(parameters[0])}
+    if isinstance(parameters, dict):
+        return {k: f"<{type(v).__name__}>" for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [f"<{type(v).__name__}>" for v in parameters]
+    return None
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms=100.0, size=50, explain=True, plan_ttl=300.0):
+        self.threshold = threshold_ms / 1000.0
+        self.explain = explain
+        self.plan_ttl = plan_ttl
+        self.size = size
+        self._entries = deque(maxlen=size)  # Oldest dropped first
+        self._plans = OrderedDict()         # statement -> (captured at, plan lines)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._cleared = ''                  # Marker timestamp this process has applied
+        self.seen = 0                       # This process's slow statements since the last clear
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    @property
+    def directory(self):
+        return os.environ.get(MULTIPROC_DIR_ENV)
+
+    def observe(self, cursor, dialect, statement, parameters, elapsed, source=None):
+        """Called for every statement; returns the entry if it was slow, else None."""
+        if not self.enabled or elapsed < self.threshold:
+            return None
+        entry = {
+            'timestamp': datetime.utcnow().isoformat(),
+            'ms': round(elapsed * 1000.0, 2),
+            'statement': normalize(statement),
+            'parameters': redact(parameters),
+            'dialect': dialect,
+            'source': source,
+            'plan': None,
+        }
+        if self.explain:
+            first = parameters[0] if _is_many(parameters) else parameters
+            entry['plan'] = self._plan(cursor, dialect, statement, first)
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: the parent's entries are in the parent's file
+                self._pid = os.getpid()
+                self._entries.clear()
+                self.seen = 0
+            directory = self.directory
+            if directory:
+                self._apply_clear(directory)
+            self.seen += 1
+            self._entries.append(entry)
+            if directory:
+                self._write(directory)
+        return entry
+
+    def _plan(self, cursor, dialect, statement, parameters):
+        words = statement.split(None, 1)
+        if not words or words[0].upper() not in EXPLAINABLE:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            cached = self._plans.get(statement)
+            if cached is not None and now - cached[0] < self.plan_ttl:
+                self._plans.move_to_end(statement)
+                return cached[1]
+        plan = explain(cursor.connection, dialect, statement, parameters)
+        with self._lock:
+            self._plans[statement] = (now, plan)
+            self._plans.move_to_end(statement)
+            while len(self._plans) > MAX_PLANS:
+                self._plans.popitem(last=False)
+        return plan
+
+    # --- Per-worker files ---
+    def _apply_clear(self, directory):
+        cleared = _read_marker(directory)
+        if cleared > self._cleared:
+            self._cleared = cleared
+            self._entries.clear()
+            self.seen = 0
+
+    def _write(self, directory):
+        path = os.path.join(directory, f"slow_queries_{self._pid}.json")
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(path + '.tmp', 'w') as f:
+                json.dump({'pid': self._pid, 'seen': self.seen, 'entries': list(self._entries)}, f)
+            os.replace(path + '.tmp', path) # Readers see the old file or the new one, never half
+        except OSError as e:
+            print(f"SLOW QUERY LOG: could not write {path}: {e}")
+
+    def snapshot(self):
+        """{'workers', 'seen', 'entries'}: every worker's buffer merged, newest first."""
+        directory = self.directory
+        if not directory:
+            with self._lock:
+                return {'workers': [os.getpid()], 'seen': self.seen, 'entries': list(reversed(self._entries))}
+        cleared = _read_marker(directory)
+        workers, seen, entries = [], 0, []
+        for path in glob.glob(os.path.join(directory, 'slow_queries_*.json')):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue # Removed by clear() or replaced while listing
+            fresh = [e for e in data['entries'] if e['timestamp'] > cleared]
+            if not fresh:
+                continue # Nothing since the last clear (the worker hasn't written since)
+            workers.append(data['pid'])
+            # A file holding older entries was written before the clear: count only the fresh ones
+            seen += data['seen'] if len(fresh) == len(data['entries']) else len(fresh)
+            entries.extend(fresh)
+        entries.sort(key=lambda e: e['timestamp'], reverse=True)
+        return {'workers': sorted(workers), 'seen': seen, 'entries': entries[:self.size]}
+
+    def entries(self):
+        """Newest first, every worker."""
+        return self.snapshot()['entries']
+
+    def clear(self):
+        """Empties the log of every worker (other workers drop theirs on their next write)."""
+        directory = self.directory
+        with self._lock:
+            self._entries.clear()
+            self._plans.clear()
+            self.seen = 0
+            if not directory:
+                return
+            self._cleared = datetime.utcnow().isoformat()
+            try:
+                os.makedirs(directory, exist_ok=True)
+                with open(os.path.join(directory, CLEAR_MARKER + '.tmp'), 'w') as f:
+                    f.write(self._cleared)
+                os.replace(os.path.join(directory, CLEAR_MARKER + '.tmp'), os.path.join(directory, CLEAR_MARKER))
+            except OSError as e:
+                print(f"SLOW QUERY LOG: could not clear: {e}")
+            for path in glob.glob(os.path.join(directory, 'slow_queries_*.json')):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+CLEAR_MARKER = 'slow_queries.cleared'
+
+def _read_marker(directory):
+    """ISO timestamp of the last clear(), '' if never cleared."""
+    try:
+        with open(os.path.join(directory, CLEAR_MARKER)) as f:
+            return f.read().strip()
+    except OSError:
+        return ''
+
+
+def explain(dbapi_connection, dialect, statement, parameters):
+    """Plan lines of `statement`, or ['<explain failed: ...>']."""
+    cursor = dbapi_connection.cursor()
+    try:
+        if dialect == 'sqlite':
+            cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters or ())
+            # (id, parent, notused, detail): indent each step under its parent
+            depth, lines = {0: -1}, []
+            for row in cursor.fetchall():
+                depth[row[0]] = depth.get(row[1], -1) + 1
+                lines.append("  " * depth[row[0]] + str(row[-1]))
+            return lines
+        if dialect == 'postgresql':
+            # A failed statement aborts a PostgreSQL transaction: keep EXPLAIN's failure local
+            cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute("EXPLAIN " + statement, parameters)
+                lines = [row[0] for row in cursor.fetchall()]
+            except Exception:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                raise
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return lines
+        return [f"<no EXPLAIN support for {dialect}>"]
+    except Exception as e:
+        return [f"<explain failed: {type(e).__name__}: {e}>"[:300]]
+    finally:
+        cursor.close()
@@ -0,0 +1,119 @@
+# render.py
+# Per-frame render context shared by every draw() implementation, and the
+# quality governor that picks how expensive those draws are allowed to be.
+from collections import deque
+
+from settings import (RENDER_FPS, QUALITY_AUTO, QUALITY_START, QUALITY_WINDOW,
+                      QUALITY_DOWNGRADE_RATIO, QUALITY_UPGRADE_RATIO, QUALITY_UPGRADE_HOLD,
+                      RENDER_RESOLUTIONS, RENDER_RESOLUTION)
+
+# Quality tiers, best first. draw() code reads these through RENDER:
+#   max_particles   explosion particles drawn per squadron (None = all)
+#   glows           PowerUp glow pulses
+#   shield_aura     ShieldDecorator's alpha aura (a plain outline otherwise)
+#   laser_sights    Drone laser lines
+#   star_layers     StarField parallax layers
+#   internal_scale  resolution of the full-screen backdrop (upscaled once per frame)
+QUALITY_TIERS = [
+    {'name': 'HIGH',    'max_particles': None, 'glows': True,  'shield_aura': True,
+     'laser_sights': True,  'star_layers': 2, 'internal_scale': 1.0},
+    {'name': 'MEDIUM',  'max_particles': 12,   'glows': True,  'shield_aura': True,
+     'laser_sights': False, 'star_layers': 2, 'internal_scale': 1.0},
+    {'name': 'LOW',     'max_particles': 6,    'glows': False, 'shield_aura': False,
+     'laser_sights': False, 'star_layers': 1, 'internal_scale': 1.0},
+    {'name': 'MINIMAL', 'max_particles': 3,    'glows': False, 'shield_aura': False,
+     'laser_sights': False, 'star_layers': 1, 'internal_scale': 0.5},
+]
+
+
+# --- PATTERN: SINGLETON ---
+# WarGame.run fills it in once per rendered frame; entities read it while drawing.
+class RenderContext:
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(RenderContext, cls).__new__(cls)
+            # Fraction of a simulation tick elapsed since the last update (0..1).
+            # Drawables interpolate between their previous and current tick positions.
+            # 1.0 = draw the latest simulated state (headless tools, screenshots).
+            cls._instance.alpha = 1.0
+            cls._instance.tier_scale = 1.0
+            cls._instance.set_resolution(RENDER_RESOLUTION)
+            cls._instance.set_quality(QUALITY_START)
+        return cls._instance
+
+    def set_quality(self, tier):
+        """Switch tier: copies the tier's settings onto the context (RENDER.glows, ...)."""
+        self.quality = max(0, min(tier, len(QUALITY_TIERS) - 1))
+        self.__dict__.update(QUALITY_TIERS[self.quality])
+        self.tier_scale = self.internal_scale
+        self._apply_scale()
+
+    def set_resolution(self, name):
+        """User-selected backdrop resolution (a RENDER_RESOLUTIONS name, see OPTIONS)."""
+        self.resolution = name
+        self.resolution_scale = dict(RENDER_RESOLUTIONS)[name]
+        self._apply_scale()
+
+    def cycle_resolution(self):
+        names = [name for name, _ in RENDER_RESOLUTIONS]
+        self.set_resolution(names[(names.index(self.resolution) + 1) % len(names)])
+        return self.resolution
+
+    def _apply_scale(self):
+        # The governor may drop below the user's choice, never above it
+        self.internal_scale = min(self.tier_scale, self.resolution_scale)
+
+RENDER = RenderContext()
+
+
+# --- QUALITY GOVERNOR ---
+# Watches how long each frame's work (update + draw + flip, not the idle sleep)
+# takes against the frame budget. Hysteresis keeps it from flapping:
+#   - downgrade one tier when the rolling mean of QUALITY_WINDOW frames uses more
+#     than QUALITY_DOWNGRADE_RATIO of the budget,
+#   - upgrade one tier only after QUALITY_UPGRADE_HOLD consecutive frames under
+#     QUALITY_UPGRADE_RATIO,
+#   - after any change, measure a whole fresh window before deciding again.
+class QualityGovernor:
+    def __init__(self, target_fps=RENDER_FPS, context=RENDER, enabled=QUALITY_AUTO):
+        self.budget = 1.0 / target_fps
+        self.context = context
+        self.enabled = enabled
+        self._samples = deque(maxlen=QUALITY_WINDOW)
+        self._total = 0.0
+        self._good_frames = 0
+
+    def record(self, work_time):
+        """Feed one frame's work time in seconds. Returns the new tier if it changed, else None."""
+        if len(self._samples) == self._samples.maxlen:
+            self._total -= self._samples[0]
+        self._samples.append(work_time)
+        self._total += work_time
+        if not self.enabled or len(self._samples) < self._samples.maxlen:
+            return None
+
+        load = self._total / len(self._samples) / self.budget
+        tier = self.context.quality
+        if load > QUALITY_DOWNGRADE_RATIO and tier < len(QUALITY_TIERS) - 1:
+            return self._switch(tier + 1)
+        if load < QUALITY_UPGRADE_RATIO and tier > 0:
+            self._good_frames += 1
+            if self._good_frames >= QUALITY_UPGRADE_HOLD:
+                return self._switch(tier - 1)
+        else:
+            self._good_frames = 0
+        return None
+
+    def _switch(self, tier):
+        self.context.set_quality(tier)
+        self._samples.clear()
+        self._total = 0.0
+        self._good_frames = 0
+        return tier
+
+    @property
+    def load(self):
+        """Mean share of the frame budget used over the current window."""
+        return self._total / len(self._samples) / self.budget if self._samples else 0.0
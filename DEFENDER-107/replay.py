@@ -0,0 +1,342 @@
+# replay.py
+# Deterministic input recording and headless re-simulation of WarState sessions.
+#
+# A replay is the RNG seed plus one InputFrame per simulation tick. Because every
+# random decision in WarState comes from its seeded RNG and every timer runs on
+# simulation time, feeding the same frames back through WarState.update reproduces
+# the session bit-exactly (same score, same wave, same final checksum).
+# The pilot name is part of the seed (WarState: Random(f"{seed}:{pilot}")), so a
+# replay re-labelled with another name plays a different game and fails to verify.
+#
+# Usage: python replay.py info  <file>
+#        python replay.py play  <file>     (headless re-run + verification)
+import os
+import sys
+import zlib
+from array import array
+from collections import namedtuple
+
+MAGIC = b"D7RP"
+VERSION = 9  # Bumped whenever the simulation changes: older replays no longer reproduce
+FILE_EXTENSION = ".d7r"
+
+# One tick of player input.
+#   mouse_x: pointer x inside the window, or None when it is outside
+#   left/right: arrow keys held; fire: shots requested this tick; pause: pause requested
+InputFrame = namedtuple('InputFrame', 'mouse_x left right fire pause')
+IDLE_FRAME = InputFrame(None, False, False, 0, False)
+
+# Per-tick flag byte
+_F_LEFT, _F_RIGHT, _F_MOUSE, _F_MOUSE_MOVED, _F_FIRE, _F_PAUSE = 1, 2, 4, 8, 16, 32
+_F_REPEAT = 128  # Run of ticks identical to the previous one (same keys/mouse, no events)
+MAX_FIRE_PER_TICK = 16  # More clicks than this in 1/60s is not a human (or a sane file)
+MAX_PILOT_BYTES = 50    # Score.username column
+
+# In-memory packing used by ReplayRecorder: one int per tick,
+#   bits 0-2 left/right/pause, bits 3-31 shots, bits 32+ mouse_x + 1 (0 = outside)
+def _pack(frame):
+    mouse = 0 if frame.mouse_x is None else frame.mouse_x + 1
+    return (mouse << 32) | (frame.fire << 3) | (frame.pause << 2) | (frame.right << 1) | frame.left
+
+def _unpack(value):
+    mouse = value >> 32
+    return InputFrame(mouse - 1 if mouse else None, bool(value & 1), bool(value & 2),
+                      (value >> 3) & 0x1FFFFFFF, bool(value & 4))
+
+
+class ReplayError(ValueError):
+    pass
+
+
+# --- VARINT HELPERS ---
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(buf, pos):
+    result = shift = 0
+    while True:
+        if pos >= len(buf):
+            raise ReplayError("truncated replay")
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return result, pos
+        shift += 7
+        if shift > 70:
+            raise ReplayError("varint too long")
+
+def _zigzag(n):
+    return (n << 1) if n >= 0 else ((-n << 1) - 1)
+
+def _unzigzag(n):
+    return (n >> 1) if not n & 1 else -((n + 1) >> 1)
+
+
+class Replay:
+    """Seed + scenario + pilot + per-tick inputs + the outcome the recording client observed."""
+    def __init__(self, seed, frames=None, outcome=None, scenario='campaign', pilot=''):
+        self.seed = seed
+        self.scenario = scenario
+        self.pilot = pilot
+        self.frames = frames if frames is not None else []
+        # {'score', 'wave', 'ticks', 'checksum'} once the game is over
+        self.outcome = outcome
+
+    # --- Encoding ---
+    # Layout:
+    #   MAGIC VERSION varint seed, varint len + scenario name, varint len + pilot (utf-8),
+    #   varint n_ticks
+    #   records until n_ticks are covered:
+    #     flags byte                       (_F_REPEAT: followed by varint run length)
+    #     [zigzag varint mouse x delta]    (_F_MOUSE_MOVED)
+    #     [varint shots]                   (_F_FIRE)
+    #   varint has_outcome [varint score, wave, ticks, checksum]
+    def to_bytes(self):
+        out = bytearray(MAGIC)
+        out.append(VERSION)
+        _write_varint(out, self.seed)
+        name = self.scenario.encode('ascii')
+        _write_varint(out, len(name))
+        out += name
+        pilot = self.pilot.encode('utf-8')
+        if len(pilot) > MAX_PILOT_BYTES:
+            raise ReplayError("pilot name too long")
+        _write_varint(out, len(pilot))
+        out += pilot
+        _write_varint(out, len(self.frames))
+        prev_x = 0
+        prev = IDLE_FRAME
+        run = 0
+        for frame in self.frames:
+            steady = (frame.mouse_x == prev.mouse_x and frame.left == prev.left
+                      and frame.right == prev.right and not frame.fire and not frame.pause)
+            if steady and prev is not IDLE_FRAME:
+                run += 1
+                continue
+            if run:
+                out.append(_F_REPEAT)
+                _write_varint(out, run)
+                run = 0
+            flags = (_F_LEFT if frame.left else 0) | (_F_RIGHT if frame.right else 0)
+            if frame.mouse_x is not None:
+                flags |= _F_MOUSE
+                if frame.mouse_x != prev_x:
+                    flags |= _F_MOUSE_MOVED
+            if frame.fire:
+                flags |= _F_FIRE
+            if frame.pause:
+                flags |= _F_PAUSE
+            out.append(flags)
+            if flags & _F_MOUSE_MOVED:
+                _write_varint(out, _zigzag(frame.mouse_x - prev_x))
+                prev_x = frame.mouse_x
+            if flags & _F_FIRE:
+                _write_varint(out, frame.fire)
+            prev = frame
+        if run:
+            out.append(_F_REPEAT)
+            _write_varint(out, run)
+        if self.outcome:
+            _write_varint(out, 1)
+            for key in ('score', 'wave', 'ticks', 'checksum'):
+                _write_varint(out, self.outcome[key])
+        else:
+            _write_varint(out, 0)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data, max_ticks=None):
+        buf = bytes(data)
+        if buf[:4] != MAGIC:
+            raise ReplayError("not a replay file")
+        if len(buf) < 5 or buf[4] != VERSION:
+            raise ReplayError(f"unsupported replay version {buf[4] if len(buf) > 4 else '?'}")
+        pos = 5
+        seed, pos = _read_varint(buf, pos)
+        length, pos = _read_varint(buf, pos)
+        if length > 32 or pos + length > len(buf):
+            raise ReplayError("bad scenario name")
+        scenario = buf[pos:pos + length].decode('ascii', errors='replace')
+        pos += length
+        length, pos = _read_varint(buf, pos)
+        if length > MAX_PILOT_BYTES or pos + length > len(buf):
+            raise ReplayError("bad pilot name")
+        pilot = buf[pos:pos + length].decode('utf-8', errors='replace')
+        pos += length
+        n_ticks, pos = _read_varint(buf, pos)
+        if max_ticks is not None and n_ticks > max_ticks:
+            raise ReplayError(f"replay too long ({n_ticks} ticks)")
+        frames = []
+        prev_x = 0
+        prev = IDLE_FRAME
+        while len(frames) < n_ticks:
+            if pos >= len(buf):
+                raise ReplayError("truncated replay")
+            flags = buf[pos]
+            pos += 1
+            if flags & _F_REPEAT:
+                run, pos = _read_varint(buf, pos)
+                if len(frames) + run > n_ticks:
+                    raise ReplayError("corrupt run length")
+                steady = prev._replace(fire=0, pause=False)
+                frames.extend([steady] * run)
+                continue
+            mouse_x = None
+            if flags & _F_MOUSE:
+                if flags & _F_MOUSE_MOVED:
+                    delta, pos = _read_varint(buf, pos)
+                    prev_x += _unzigzag(delta)
+                mouse_x = prev_x
+            fire = 0
+            if flags & _F_FIRE:
+                fire, pos = _read_varint(buf, pos)
+                if fire > MAX_FIRE_PER_TICK:
+                    raise ReplayError("too many shots in one tick")
+            prev = InputFrame(mouse_x, bool(flags & _F_LEFT), bool(flags & _F_RIGHT), fire, bool(flags & _F_PAUSE))
+            frames.append(prev)
+        has_outcome, pos = _read_varint(buf, pos)
+        outcome = None
+        if has_outcome:
+            outcome = {}
+            for key in ('score', 'wave', 'ticks', 'checksum'):
+                outcome[key], pos = _read_varint(buf, pos)
+        return cls(seed, frames, outcome, scenario, pilot)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+class ReplayRecorder:
+    """
+    Records one tick of input per WarState tick. Owned by the WarState it records.
+    Ticks are kept as packed ints in an array, not InputFrame tuples: a 10-minute game
+    would otherwise keep 36k new GC-tracked objects alive, enough on their own to
+    trigger a gen-0 collection every few hundred ticks.
+    """
+    def __init__(self, seed, scenario='campaign', pilot=''):
+        self.seed = seed
+        self.scenario = scenario
+        self.pilot = pilot
+        self._ticks = array('q')
+
+    def record(self, frame):
+        self._ticks.append(_pack(frame))
+
+    def finish(self, state):
+        # Unpacked once, when the game ends; identical ticks share one InputFrame
+        frames, prev, prev_value = [], None, None
+        for value in self._ticks:
+            if value != prev_value:
+                prev, prev_value = _unpack(value), value
+            frames.append(prev)
+        return Replay(self.seed, frames, outcome_of(state), self.scenario, self.pilot)
+
+
+def state_checksum(state):
+    """Cheap fingerprint of the simulation at the end of a run."""
+    base = state.player.get_base_ship()
+    parts = [state.score, state.wave, state.tick, base.lives, base.rect.x, base.rect.y]
+    for enemy in state.squadron.children:
+        parts.extend((enemy.rect.x, enemy.rect.y, enemy.hp))
+    for ast in state.obstacles:
+        parts.extend((ast.rect.x, ast.rect.y))
+    return zlib.crc32(",".join(map(str, parts)).encode())
+
+def outcome_of(state):
+    return {'score': state.score, 'wave': state.wave, 'ticks': state.tick,
+            'checksum': state_checksum(state)}
+
+
+# --- HEADLESS PLAYBACK ---
+class HeadlessGame:
+    """Stand-in for WarGame: just enough context for WarState to run without a window."""
+    def __init__(self, player_name="REPLAY"):
+        self.player_name = player_name
+        self.state = None
+        self.finished = False
+
+    def change_state(self, new_state):
+        # Only game over / victory can happen inside update(): either ends the run
+        self.finished = True
+
+
+_headless_ready = False
+
+def init_headless():
+    """pygame with dummy video/audio and the cached assets WarState expects. Idempotent."""
+    global _headless_ready
+    if _headless_ready:
+        return
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import pygame
+    pygame.init()
+    if pygame.display.get_surface() is None:
+        pygame.display.set_mode((1, 1))
+    from entities import initialize_entities
+    initialize_entities()
+    from api_logger import APILogger
+    APILogger.set_muted(True)
+    _headless_ready = True
+
+def play(replay, max_ticks=None, should_stop=None):
+    """
+    Re-simulates a replay through WarState.update without rendering.
+    should_stop: optional callable polled every 256 ticks (time budgets).
+    Returns the outcome dict of the re-simulated run.
+    """
+    init_headless()
+    from states import WarState
+    game = HeadlessGame(replay.pilot or "REPLAY")
+    from waves import SCENARIOS
+    if replay.scenario not in SCENARIOS:
+        raise ReplayError(f"unknown scenario {replay.scenario!r}")
+    state = WarState(seed=replay.seed, headless=True, scenario=replay.scenario, pilot=replay.pilot)
+    game.state = state
+    limit = len(replay.frames) if max_ticks is None else min(max_ticks, len(replay.frames))
+    for i in range(limit):
+        if should_stop is not None and not i & 255 and should_stop():
+            raise TimeoutError(f"replay stopped after {i} ticks")
+        state.queue_input(replay.frames[i])
+        state.update(game)
+        if game.finished:
+            # Sealed at the same point in update() as the recording was
+            return state.replay.outcome
+    return outcome_of(state)
+
+def verify(replay, **kwargs):
+    """True if re-simulating the replay reproduces the outcome it claims."""
+    if not replay.outcome:
+        return False
+    return play(replay, **kwargs) == replay.outcome
+
+
+def main(argv):
+    if len(argv) != 3 or argv[1] not in ('info', 'play'):
+        print("usage: python replay.py info|play <file>")
+        return 2
+    replay = Replay.load(argv[2])
+    size = os.path.getsize(argv[2])
+    print(f"seed={replay.seed} scenario={replay.scenario} pilot={replay.pilot!r} ticks={len(replay.frames)} size={size}B "
+          f"({size / max(1, len(replay.frames)):.2f} B/tick) outcome={replay.outcome}")
+    if argv[1] == 'play':
+        result = play(replay)
+        print(f"re-simulated: {result}")
+        if replay.outcome:
+            ok = result == replay.outcome
+            print("MATCH" if ok else "MISMATCH")
+            return 0 if ok else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
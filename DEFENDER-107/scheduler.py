@@ -0,0 +1,95 @@
+# scheduler.py
+# Game-time clock and timer scheduler. The clock counts simulation ticks
+# (advanced once per WarState tick, frozen while paused); timed logic (power-up
+# expiry, wave banners, explosion particles) registers a callback instead of
+# polling its own countdown every frame.
+from settings import SIM_HZ
+
+WHEEL_SLOTS = 256  # ~4 s of ticks; longer timers stay in their slot for extra turns
+
+
+class Timer:
+    __slots__ = ('due', 'callback', 'args')
+
+    def __init__(self, due, callback, args):
+        self.due = due
+        self.callback = callback
+        self.args = args
+
+    def cancel(self):
+        self.callback = None # Dropped when its slot comes round
+
+    @property
+    def active(self):
+        return self.callback is not None
+
+
+# --- PATTERN: SINGLETON ---
+# One game clock shared by WarState and the entities.
+# Timers live in a hashed timing wheel: scheduling appends to slot (due % WHEEL_SLOTS)
+# and each tick only visits the slot of the current tick, so both cost O(1) per timer
+# (a timer longer than the wheel is revisited once per turn until it is due).
+class GameScheduler:
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(GameScheduler, cls).__new__(cls)
+            cls._instance.reset()
+        return cls._instance
+
+    def reset(self):
+        """Back to tick 0 with no timers (new game / replay)."""
+        self.tick = 0
+        self.paused = False
+        self._wheel = [[] for _ in range(WHEEL_SLOTS)]
+        self._count = 0
+
+    # --- Clock ---
+    def now_ms(self):
+        return self.tick * 1000 // SIM_HZ
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    def advance(self):
+        """Move one tick forward and run every timer due on it, in scheduling order."""
+        if self.paused:
+            return
+        self.tick += 1
+        index = self.tick % WHEEL_SLOTS
+        slot = self._wheel[index]
+        if not slot:
+            return
+        self._wheel[index] = later = []
+        for timer in slot:
+            if timer.callback is None:
+                self._count -= 1
+            elif timer.due <= self.tick:
+                self._count -= 1
+                callback, timer.callback = timer.callback, None
+                callback(*timer.args)
+            else:
+                later.append(timer)
+
+    # --- Timers ---
+    def call_at(self, tick, callback, *args):
+        """Run callback(*args) during the advance() that reaches `tick` (next tick at the earliest)."""
+        timer = Timer(max(tick, self.tick + 1), callback, args)
+        self._wheel[timer.due % WHEEL_SLOTS].append(timer)
+        self._count += 1
+        return timer
+
+    def call_later(self, ticks, callback, *args):
+        return self.call_at(self.tick + ticks, callback, *args)
+
+    @property
+    def pending(self):
+        """Timers scheduled and not yet run (cancelled ones until their slot is visited)."""
+        return self._count
+
+
+SCHEDULER = GameScheduler()
@@ -1,24 +1,92 @@
 import os
-from flask import Flask, request, jsonify
+import json
+import time
+import base64
+import binascii
+import hmac
+import math
+import click
+from flask import Blueprint, Flask, Response, current_app, g, has_request_context, request, jsonify
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from sqlalchemy import case, event, func
+from sqlalchemy.engine import Engine
+from datetime import datetime, timedelta
+import wire_format
+import metrics
+from leaderboard_hub import LeaderboardHub
+from verifier import ReplayVerifier
+from query_log import SlowQueryLog
 
-# Initialize Flask App
-app = Flask(__name__)
+# Security: API Key
+API_KEY = os.environ.get('API_KEY', 'Defender-gamo-pwd-2025') # Default for dev
+# Admin endpoints (/admin/...) are disabled unless ADMIN_KEY is set; the game's key never opens them
+ADMIN_KEY = os.environ.get('ADMIN_KEY')
 
-# --- Configuration ---
-# Use environment variable for DB URL (Render/Heroku compatible), or default to local SQLite
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///game_data.db')
-# Fix for some postgres URLs starting with "postgres://" instead of "postgresql://"
-if app.config['SQLALCHEMY_DATABASE_URI'].startswith("postgres://"):
-    app.config['SQLALCHEMY_DATABASE_URI'] = app.config['SQLALCHEMY_DATABASE_URI'].replace("postgres://", "postgresql://", 1)
+# --- PATTERN: FACTORY (Application Factory) ---
+# Extensions and routes are declared unbound and attached in create_app().
+# Nothing touches the database at import time, so `gunicorn --preload` can
+# import the app once in the master and fork workers from it safely.
+db = SQLAlchemy()
+api = Blueprint('api', __name__)
 
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# --- Metrics (/metrics, Prometheus text format summed over all workers: see metrics.py) ---
+REQUEST_SECONDS = metrics.Histogram('defender_http_request_duration_seconds',
+                                    'Request handling time (SSE: until the stream starts)', ('method', 'route'))
+REQUESTS = metrics.Counter('defender_http_requests', 'Requests answered, by status', ('method', 'route', 'status'))
+REJECTED = metrics.Counter('defender_http_rejected_requests', 'Requests answered 4xx', ('route', 'status'))
+DB_QUERY_SECONDS = metrics.Histogram('defender_db_query_duration_seconds',
+                                     'SQL statement execution time', ('statement',))
+DB_COMMIT_SECONDS = metrics.Histogram('defender_db_commit_duration_seconds', 'Session commit time')
+LOGS_INGESTED = metrics.Counter('defender_logs_ingested', 'Game log records stored', ('endpoint',))
+PERF_INGESTED = metrics.Counter('defender_perf_summaries_ingested', 'Client frame-time summaries stored')
+LOG_BATCH_SIZE = metrics.Histogram('defender_log_batch_size', 'Records per /log/batch request',
+                                   buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500))
+SLOW_QUERY_COUNT = metrics.Counter('defender_db_slow_queries', 'Statements over SLOW_QUERY_MS', ('statement',))
+_STATEMENT_KINDS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
 
-# Security: API Key
-API_KEY = os.environ.get('API_KEY', 'Defender-gamo-pwd-2025') # Default for dev
+# Slow-query log (see query_log.py): statements over SLOW_QUERY_MS with their plan, all workers
+SLOW_QUERIES = SlowQueryLog(threshold_ms=float(os.environ.get('SLOW_QUERY_MS', 100)),
+                            size=int(os.environ.get('SLOW_QUERY_LOG_SIZE', 50)),
+                            explain=os.environ.get('SLOW_QUERY_EXPLAIN', '1') == '1')
+
+# Engine-wide hooks: every engine (app, CLI, background threads) is timed
+@event.listens_for(Engine, 'before_cursor_execute')
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    kind = statement.lstrip()[:6].upper()
+    kind = kind if kind in _STATEMENT_KINDS else 'OTHER'
+    DB_QUERY_SECONDS.observe(elapsed, statement=kind)
+    if SLOW_QUERIES.enabled and elapsed >= SLOW_QUERIES.threshold:
+        SLOW_QUERIES.observe(cursor, conn.dialect.name, statement, parameters, elapsed, source=_query_source())
+        SLOW_QUERY_COUNT.inc(statement=kind)
 
-db = SQLAlchemy(app)
+def _query_source():
+    """Route that issued the statement ('POST /log/batch'), or None outside requests."""
+    if has_request_context() and request.url_rule is not None:
+        return f"{request.method} {request.url_rule.rule}"
+    return None
+
+@event.listens_for(Engine, 'handle_error')
+def _query_failed(context):
+    if context.connection is not None and context.connection.info.get('query_started'):
+        context.connection.info['query_started'].pop()
+
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+def _record_request(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched' # Bounded label set
+    started = g.pop('request_started', None)
+    if started is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method, route=route)
+    REQUESTS.inc(method=request.method, route=route, status=response.status_code)
+    if 400 <= response.status_code < 500:
+        REJECTED.inc(route=route, status=response.status_code)
+    return response
 
 # --- Models ---
 class GameLog(db.Model):
@@ -48,7 +116,111 @@ class Score(db.Model):
             'timestamp': self.timestamp.isoformat()
         }
 
+class PlayerBest(db.Model):
+    """
+    One row per pilot holding their best score, maintained by upsert in submit_score.
+    The (score, username) index turns rank queries into an indexed range count
+    instead of a scan over every game ever played.
+    """
+    __tablename__ = 'player_best'
+    username = db.Column(db.String(50), primary_key=True)
+    score = db.Column(db.Integer, nullable=False)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (db.Index('ix_player_best_score_username', 'score', 'username'),)
+
+    def to_dict(self, rank=None):
+        d = {
+            'username': self.username,
+            'score': self.score,
+            'timestamp': self.timestamp.isoformat()
+        }
+        if rank is not None:
+            d['rank'] = rank
+        return d
+
+class VerifiedScore(db.Model):
+    """
+    Scores whose replay was re-simulated by the server and reproduced the claimed
+    result. Kept apart from Score (self-reported) so the two boards never mix.
+    One row per replay: resubmitting the same game can't be counted twice.
+    """
+    __tablename__ = 'verified_score'
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(50), nullable=False)
+    score = db.Column(db.Integer, nullable=False, index=True)
+    wave = db.Column(db.Integer, nullable=False)
+    ticks = db.Column(db.Integer, nullable=False)
+    replay_hash = db.Column(db.String(64), nullable=False, unique=True)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'username': self.username,
+            'score': self.score,
+            'wave': self.wave,
+            'timestamp': self.timestamp.isoformat()
+        }
+
+class PerfSummary(db.Model):
+    """
+    Client frame-time summary: one row per game state per session (perf_telemetry.py).
+    Times in ms. /perf/summary aggregates them by build, platform and state.
+    """
+    __tablename__ = 'perf_summary'
+    id = db.Column(db.Integer, primary_key=True)
+    session = db.Column(db.String(32), nullable=False)
+    build = db.Column(db.String(32), nullable=False)
+    platform = db.Column(db.String(32), nullable=False)
+    state = db.Column(db.String(32), nullable=False)
+    frames = db.Column(db.Integer, nullable=False)
+    p50 = db.Column(db.Float, nullable=False)
+    p95 = db.Column(db.Float, nullable=False)
+    p99 = db.Column(db.Float, nullable=False)
+    max_ms = db.Column(db.Float, nullable=False)
+    dropped = db.Column(db.Integer, nullable=False)
+    entities = db.Column(db.Integer, nullable=False)
+    mem_kb = db.Column(db.Integer, nullable=False)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    __table_args__ = (db.Index('ix_perf_summary_build_platform', 'build', 'platform', 'state'),)
+
+    # Client record key -> (column, type)
+    FIELDS = {
+        'sid': ('session', str), 'build': ('build', str), 'platform': ('platform', str),
+        'state': ('state', str), 'frames': ('frames', int),
+        'p50': ('p50', float), 'p95': ('p95', float), 'p99': ('p99', float), 'max': ('max_ms', float),
+        'dropped': ('dropped', int), 'entities': ('entities', int), 'mem_kb': ('mem_kb', int),
+    }
+
+    @classmethod
+    def from_record(cls, record):
+        """Row from one client summary; ValueError if a field is missing or malformed."""
+        if not isinstance(record, dict):
+            raise ValueError("summary must be an object")
+        values = {}
+        for key, (column, kind) in cls.FIELDS.items():
+            if key not in record:
+                raise ValueError(f"missing {key}")
+            try:
+                value = kind(record[key])
+            except (TypeError, ValueError, OverflowError):
+                raise ValueError(f"invalid {key}")
+            # json accepts NaN/Infinity: NaN fails the NOT NULL insert, Infinity breaks the JSON out
+            if kind is not str and (not math.isfinite(value) or value < 0):
+                raise ValueError(f"invalid {key}")
+            values[column] = value[:32] if kind is str else value
+        if values['frames'] <= 0:
+            raise ValueError("invalid frames")
+        return cls(**values)
+
 # --- Helper Functions ---
+def commit():
+    """db.session.commit(), timed for /metrics."""
+    started = time.perf_counter()
+    try:
+        db.session.commit()
+    finally:
+        DB_COMMIT_SECONDS.observe(time.perf_counter() - started)
+
 def check_api_key():
     """Simple API Key check. Returns True if valid, False otherwise."""
     # Check header or query param or json body
@@ -57,26 +229,122 @@ def check_api_key():
         return False
     return key == API_KEY
 
+def check_admin_key():
+    key = request.headers.get('X-ADMIN-KEY')
+    return bool(ADMIN_KEY) and bool(key) and hmac.compare_digest(key, ADMIN_KEY)
+
+def read_payload(compact_decoder):
+    """
+    CONTENT NEGOTIATION: decodes the request body according to its Content-Type.
+    The compact binary format is used when the client sends it, JSON stays the fallback.
+    Returns the decoded data, or None if the body is unreadable.
+    """
+    content_type = request.mimetype
+    try:
+        if content_type in (wire_format.LOG_BATCH_CONTENT_TYPE, wire_format.SCORE_CONTENT_TYPE):
+            body = wire_format.decompress(request.get_data(), request.content_encoding)
+            return compact_decoder(body)
+        if request.content_encoding:
+            body = wire_format.decompress(request.get_data(), request.content_encoding)
+            return json.loads(body)
+        return request.get_json(silent=True)
+    except (wire_format.WireFormatError, ValueError, OSError, EOFError):
+        return None
+
+def _is_supported_type(compact_type):
+    return request.mimetype in (wire_format.JSON_CONTENT_TYPE, compact_type)
+
+def _client_timestamp(ts_ms):
+    """Client event time (ms since epoch) -> naive UTC datetime, server time if missing."""
+    if ts_ms is None:
+        return datetime.utcnow()
+    try:
+        return datetime.utcfromtimestamp(ts_ms / 1000.0)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return datetime.utcnow()
+
+def upsert_player_best(username, score):
+    """Keep the best score per pilot. Single statement on SQLite/PostgreSQL, read-modify-write elsewhere."""
+    now = datetime.utcnow()
+    dialect = db.engine.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(PlayerBest).values(username=username, score=score, timestamp=now)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PlayerBest.username],
+            set_={'score': stmt.excluded.score, 'timestamp': stmt.excluded.timestamp},
+            where=PlayerBest.score < stmt.excluded.score,
+        )
+        db.session.execute(stmt)
+        return
+    best = db.session.get(PlayerBest, username)
+    if best is None:
+        db.session.add(PlayerBest(username=username, score=score, timestamp=now))
+    elif score > best.score:
+        best.score = score
+        best.timestamp = now
+
+def pilot_total():
+    """
+    Number of pilots on the best-score board. A count is O(pilots) and the number only
+    grows when a new pilot posts a first score, so each worker re-counts at most every
+    RANK_TOTAL_TTL seconds (default 5) instead of on every /rank request.
+    """
+    cache = current_app.extensions['pilot_total']
+    now = time.monotonic()
+    if cache['value'] is None or now - cache['at'] > cache['ttl']:
+        cache['value'] = db.session.query(db.func.count(PlayerBest.username)).scalar()
+        cache['at'] = now
+    return cache['value']
+
+def _higher_ranked():
+    """Ordering used everywhere for the per-pilot board: best score first, ties by name."""
+    return (PlayerBest.score.desc(), PlayerBest.username.asc())
+
+def backfill_player_best():
+    """Seed player_best from the historical Score table (one-off, when it is still empty)."""
+    if db.session.query(PlayerBest.username).first() is not None:
+        return
+    rows = db.session.query(Score.username, db.func.max(Score.score)).group_by(Score.username).all()
+    for username, best in rows:
+        db.session.add(PlayerBest(username=username, score=best))
+    commit()
+
+def _decode_log_records(body):
+    return [{'level': level, 'message': message, 'ts': ts}
+            for level, message, ts in wire_format.decode_log_batch(body)]
+
 # --- Routes ---
 
-@app.route('/log/batch', methods=['POST'])
+@api.route('/log/batch', methods=['POST'])
 def log_batch():
     if not check_api_key():
         return jsonify({"error": "Unauthorized"}), 401
     
-    data = request.json # Should be a list of log objects
+    if not _is_supported_type(wire_format.LOG_BATCH_CONTENT_TYPE):
+        return jsonify({"error": "Unsupported content type"}), 415
+
+    data = read_payload(_decode_log_records) # Should be a list of log objects
     if not data or not isinstance(data, list):
         return jsonify({"error": "Invalid data format"}), 400
         
+    stored = 0
     for item in data:
-        if 'level' in item and 'message' in item:
-            new_log = GameLog(level=item['level'], message=item['message'])
+        if isinstance(item, dict) and 'level' in item and 'message' in item:
+            new_log = GameLog(level=item['level'], message=item['message'],
+                              timestamp=_client_timestamp(item.get('ts')))
             db.session.add(new_log)
+            stored += 1
     
-    db.session.commit()
+    commit()
+    LOG_BATCH_SIZE.observe(len(data))
+    LOGS_INGESTED.inc(stored, endpoint='batch')
     return jsonify({"status": f"batched {len(data)} logs"}), 201
 
-@app.route('/log', methods=['POST'])
+@api.route('/log', methods=['POST'])
 def log_event():
     if not check_api_key():
         return jsonify({"error": "Unauthorized"}), 401
@@ -87,36 +355,371 @@ def log_event():
 
     new_log = GameLog(level=data['level'], message=data['message'])
     db.session.add(new_log)
-    db.session.commit()
+    commit()
+    LOGS_INGESTED.inc(endpoint='single')
     
     return jsonify({"status": "logged"}), 201
 
-@app.route('/leaderboard', methods=['GET'])
+@api.route('/leaderboard', methods=['GET'])
 def get_leaderboard():
-    # Return Top 10 High Scores
-    top_scores = Score.query.order_by(Score.score.desc()).limit(10).all()
-    return jsonify([s.to_dict() for s in top_scores])
+    # Return Top 10 High Scores, from the hub's in-memory copy. Clients that can't
+    # stream poll it with If-None-Match: an unchanged board is a 304 without any SQL
+    board, etag = leaderboard_hub().current()
+    if etag in request.if_none_match:
+        return Response(status=304, headers={'ETag': f'"{etag}"'})
+    response = jsonify(board)
+    response.set_etag(etag)
+    return response
+
+def top_scores(limit=10):
+    return [s.to_dict() for s in Score.query.order_by(Score.score.desc()).limit(limit).all()]
+
+def leaderboard_hub():
+    return current_app.extensions['leaderboard_hub']
+
+def replay_verifier():
+    """The process' ReplayVerifier, or None when verification is disabled (REPLAY_VERIFY=0)."""
+    return current_app.extensions.get('replay_verifier')
+
+def _decode_replay(value):
+    """Replay bytes from a compact body (bytes) or a JSON body (base64 string)."""
+    if value is None or isinstance(value, bytes):
+        return value
+    try:
+        return base64.b64decode(value, validate=True)
+    except (binascii.Error, TypeError, ValueError):
+        raise ValueError("invalid replay encoding")
 
-@app.route('/score', methods=['POST'])
+@api.route('/leaderboard/verified', methods=['GET'])
+def get_verified_leaderboard():
+    # Top 10 scores backed by a replay the server re-simulated
+    rows = VerifiedScore.query.order_by(VerifiedScore.score.desc()).limit(10).all()
+    return jsonify([v.to_dict() for v in rows])
+
+@api.route('/verify/<replay_id>', methods=['GET'])
+def get_verification(replay_id):
+    """Verification status of a submitted replay (id = sha256 returned by /score)."""
+    verifier = replay_verifier()
+    result = verifier.status(replay_id) if verifier else None
+    if result is None:
+        # Finished in another worker process (or before a restart): check the board
+        row = VerifiedScore.query.filter_by(replay_hash=replay_id).first()
+        if row is None:
+            return jsonify({"error": "Unknown replay"}), 404
+        result = {'status': 'verified', 'score': row.score, 'wave': row.wave, 'ticks': row.ticks}
+    return jsonify({'id': replay_id, **result})
+
+@api.route('/leaderboard/stream', methods=['GET'])
+def stream_leaderboard():
+    """
+    Server-Sent Events: a full 'snapshot' on connect, then 'diff' events carrying only
+    the positions that changed, pushed when submit_score moves the top 10.
+    """
+    hub = leaderboard_hub()
+    q, snapshot = hub.subscribe()
+    if q is None:
+        # Past the cap (a quarter of the threads on gthread), clients poll /leaderboard
+        return jsonify({"error": "Too many open streams"}), 503, {'Retry-After': '60'}
+    return Response(hub.stream(q, snapshot), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@api.route('/rank', methods=['GET'])
+def get_rank():
+    """
+    Rank of one pilot on the best-score board plus their nearby neighbours.
+    Rank = number of pilots with a strictly better score + 1 (ties share a rank),
+    answered by a count over the score index rather than a full scan.
+    """
+    username = request.args.get('username', '').strip()
+    if not username:
+        return jsonify({"error": "username is required"}), 400
+    try:
+        around = max(0, min(int(request.args.get('around', 2)), 10))
+    except ValueError:
+        around = 2
+
+    me = db.session.get(PlayerBest, username)
+    if me is None:
+        return jsonify({"error": "Unknown pilot"}), 404
+
+    rank = PlayerBest.query.filter(PlayerBest.score > me.score).count() + 1
+    total = max(pilot_total(), rank) # Cached count may predate this pilot
+
+    # Pilots just above (walk the index upwards from our position) and just below
+    ahead = PlayerBest.query.filter(
+        db.or_(PlayerBest.score > me.score,
+               db.and_(PlayerBest.score == me.score, PlayerBest.username < me.username))
+    ).order_by(PlayerBest.score.asc(), PlayerBest.username.desc()).limit(around).all()
+    behind = PlayerBest.query.filter(
+        db.or_(PlayerBest.score < me.score,
+               db.and_(PlayerBest.score == me.score, PlayerBest.username > me.username))
+    ).order_by(*_higher_ranked()).limit(around).all()
+
+    def ranked(entries):
+        # Competition ranking: only the first entry of a score run needs a count
+        out = []
+        for entry in entries:
+            if entry.score == me.score:
+                r = rank
+            elif out and out[-1]['score'] == entry.score:
+                r = out[-1]['rank']
+            else:
+                r = PlayerBest.query.filter(PlayerBest.score > entry.score).count() + 1
+            out.append(entry.to_dict(rank=r))
+        return out
+
+    return jsonify({
+        **me.to_dict(rank=rank),
+        'total': total,
+        'ahead': ranked(list(reversed(ahead))),
+        'behind': ranked(behind),
+    })
+
+@api.route('/score', methods=['POST'])
 def submit_score():
     if not check_api_key():
         return jsonify({"error": "Unauthorized"}), 401
-        
-    data = request.json
-    if not data or 'username' not in data or 'score' not in data:
+
+    if not _is_supported_type(wire_format.SCORE_CONTENT_TYPE):
+        return jsonify({"error": "Unsupported content type"}), 415
+
+    data = read_payload(wire_format.decode_score)
+    if not isinstance(data, dict) or 'username' not in data or 'score' not in data:
         return jsonify({"error": "Invalid data"}), 400
         
-    new_score = Score(username=data['username'], score=data['score'])
+    try:
+        score = int(data['score'])
+        replay = _decode_replay(data.get('replay'))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid data"}), 400
+
+    new_score = Score(username=data['username'], score=score)
     db.session.add(new_score)
-    db.session.commit()
+    upsert_player_best(data['username'], score)
+    commit()
+    leaderboard_hub().notify_changed()
+
+    response = {"status": "score saved"}
+    if replay:
+        # Re-simulated off the request path; the result lands on /leaderboard/verified
+        verifier = replay_verifier()
+        if verifier is None:
+            response["verification"] = {"status": "disabled"}
+        else:
+            replay_id, status = verifier.submit(data['username'], score, replay)
+            response["verification"] = {"id": replay_id, "status": status}
     
-    return jsonify({"status": "score saved"}), 201
+    return jsonify(response), 201
+
+@api.route('/perf', methods=['POST'])
+def submit_perf():
+    """Client frame-time summaries (a JSON list, see perf_telemetry.py)."""
+    if not check_api_key():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    if request.mimetype != wire_format.JSON_CONTENT_TYPE:
+        return jsonify({"error": "Unsupported content type"}), 415
+
+    data = read_payload(None)
+    if not data or not isinstance(data, list):
+        return jsonify({"error": "Invalid data format"}), 400
+    try:
+        rows = [PerfSummary.from_record(item) for item in data]
+    except ValueError as e:
+        return jsonify({"error": f"Invalid summary: {e}"}), 400
+
+    db.session.add_all(rows)
+    commit()
+    PERF_INGESTED.inc(len(rows))
+    return jsonify({"status": f"stored {len(rows)} summaries"}), 201
+
+# Session percentiles summarised by /perf/summary: output name -> column
+PERF_METRICS = (('p50', PerfSummary.p50), ('p95', PerfSummary.p95), ('p99', PerfSummary.p99),
+                ('max', PerfSummary.max_ms), ('entities', PerfSummary.entities), ('mem_kb', PerfSummary.mem_kb))
+
+def _nearest_rank(n, percent):
+    # round(n * percent / 100), 1-based, in integer SQL arithmetic (same on SQLite and PostgreSQL)
+    return (n * percent + 50) // 100
+
+@api.route('/perf/summary', methods=['GET'])
+def get_perf_summary():
+    """
+    Fleet frame times per (build, platform, state) over the last `days` days.
+    Sessions can't be merged into exact fleet percentiles, so each session percentile
+    is summarised across sessions: its median (typical player) and its 90th
+    percentile (the slowest tenth of sessions). Computed in one SQL query: each
+    session is ranked per metric with window functions and only the two rows
+    at the nearest ranks are kept, so the response costs O(groups), not O(rows).
+    """
+    if not ADMIN_KEY:
+        return jsonify({"error": "Admin endpoints disabled (set ADMIN_KEY)"}), 404
+    if not check_admin_key():
+        return jsonify({"error": "Unauthorized"}), 401
+    try:
+        days = max(1, min(int(request.args.get('days', 7)), 90))
+    except ValueError:
+        days = 7
+    group = (PerfSummary.build, PerfSummary.platform, PerfSummary.state)
+    ranked = db.select(
+        *group, PerfSummary.frames, PerfSummary.dropped,
+        func.count().over(partition_by=group).label('n'),
+        *[column.label(name) for name, column in PERF_METRICS],
+        *[func.row_number().over(partition_by=group, order_by=column).label(f"{name}_rank")
+          for name, column in PERF_METRICS],
+    ).where(PerfSummary.timestamp >= datetime.utcnow() - timedelta(days=days))
+    for arg in ('build', 'platform', 'state'):
+        if request.args.get(arg):
+            ranked = ranked.where(getattr(PerfSummary, arg) == request.args[arg])
+    ranked = ranked.subquery()
+
+    quantiles = []
+    for name, _ in PERF_METRICS:
+        for percent in (50, 90):
+            at_rank = ranked.c[f"{name}_rank"] == _nearest_rank(ranked.c.n, percent)
+            quantiles.append(func.max(case((at_rank, ranked.c[name]))))
+    key = (ranked.c.build, ranked.c.platform, ranked.c.state)
+    query = db.select(*key, func.count(), func.sum(ranked.c.frames), func.sum(ranked.c.dropped),
+                      *quantiles).group_by(*key).order_by(*key)
+
+    result = []
+    for build, platform, state, sessions, frames, dropped, *values in db.session.execute(query):
+        entry = {'build': build, 'platform': platform, 'state': state,
+                 'sessions': sessions, 'frames': frames,
+                 'dropped_pct': round(100.0 * dropped / frames, 2)}
+        for i, (name, _) in enumerate(PERF_METRICS):
+            entry[name] = {'median': values[2 * i], 'p90': values[2 * i + 1]}
+        result.append(entry)
+    return jsonify({'days': days, 'groups': result})
+
+@api.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus scrape target: request/DB timings and ingest counters of every worker."""
+    return Response(metrics.REGISTRY.exposition(), content_type=metrics.CONTENT_TYPE)
+
+@api.route('/admin/slow-queries', methods=['GET', 'DELETE'])
+def admin_slow_queries():
+    """
+    The server's recent slow statements, every worker merged (newest first): duration,
+    redacted SQL and parameters, the route that ran them and their EXPLAIN output.
+    DELETE empties the log of every worker.
+    """
+    if not ADMIN_KEY:
+        return jsonify({"error": "Admin endpoints disabled (set ADMIN_KEY)"}), 404
+    if not check_admin_key():
+        return jsonify({"error": "Unauthorized"}), 401
+    if request.method == 'DELETE':
+        SLOW_QUERIES.clear()
+        return jsonify({"status": "cleared"})
+    snapshot = SLOW_QUERIES.snapshot()
+    return jsonify({
+        'workers': snapshot['workers'],
+        'threshold_ms': SLOW_QUERIES.threshold * 1000.0,
+        'seen': snapshot['seen'],
+        'queries': snapshot['entries'],
+    })
 
 # --- Setup ---
-with app.app_context():
+def init_db():
+    """One-time schema bootstrap. Run as a release/migration step, never from workers."""
     db.create_all()
+    backfill_player_best()
+
+def _database_url():
+    # Use environment variable for DB URL (Render/Heroku compatible), or default to local SQLite
+    url = os.environ.get('DATABASE_URL', 'sqlite:///game_data.db')
+    # Fix for some postgres URLs starting with "postgres://" instead of "postgresql://"
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    return url
+
+def create_app(config=None):
+    app = Flask(__name__)
+
+    # --- Configuration ---
+    app.config['SQLALCHEMY_DATABASE_URI'] = _database_url()
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Drop dead pooled connections (server restarts, idle timeouts) instead of failing a request
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_pre_ping': True}
+    if config:
+        app.config.update(config)
+
+    db.init_app(app)
+    app.register_blueprint(api)
+    app.before_request(_start_request_timer)
+    app.after_request(_record_request)
+
+    def _fetch_board_for_hub():
+        # Runs on the hub's watcher thread, outside any request
+        with app.app_context():
+            return top_scores()
+
+    app.extensions['pilot_total'] = {'value': None, 'at': 0.0,
+                                     'ttl': float(os.environ.get('RANK_TOTAL_TTL', 5))}
+
+    # One hub per server process (its thread starts lazily, after fork).
+    # Background re-reads pick up scores saved by other workers.
+    # Open streams per process: a quarter of the thread pool on gthread workers, so the
+    # API keeps three quarters; async workers (gevent/eventlet, the gunicorn.conf default)
+    # hold a stream per greenlet and keep a quarter of their connections for the API
+    async_worker = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread') in ('gevent', 'eventlet')
+    if async_worker:
+        default_streams = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000)) * 3 // 4
+    else:
+        default_streams = max(1, int(os.environ.get('GUNICORN_THREADS', 16)) // 4)
+    app.extensions['leaderboard_hub'] = LeaderboardHub(
+        _fetch_board_for_hub, resync_interval=float(os.environ.get('LEADERBOARD_RESYNC_SECONDS', 5)),
+        max_subscribers=int(os.environ.get('LEADERBOARD_STREAM_MAX', default_streams)))
+
+    def _store_verified(replay_id, username, result):
+        # Runs on the verifier's result thread, outside any request
+        if result['status'] != 'verified':
+            app.logger.warning("VERIFY: %s %s %s: %s", username, replay_id[:12], result['status'], result.get('reason'))
+            return
+        with app.app_context():
+            try:
+                db.session.add(VerifiedScore(username=username, score=result['score'], wave=result['wave'],
+                                             ticks=result['ticks'], replay_hash=replay_id))
+                commit()
+            except Exception as e:
+                # Same replay already verified (e.g. by another worker)
+                db.session.rollback()
+                app.logger.warning("VERIFY: could not store %s: %s", replay_id[:12], e)
+
+    # Replay verification pool: the cores are shared by all gunicorn workers
+    if os.environ.get('REPLAY_VERIFY', '1') == '1':
+        cores = os.cpu_count() or 1
+        # WEB_CONCURRENCY is exported by gunicorn.conf.py (its default included); 1 = dev server
+        per_worker = max(1, cores // max(1, int(os.environ.get('WEB_CONCURRENCY', 1))))
+        app.extensions['replay_verifier'] = ReplayVerifier(
+            _store_verified,
+            workers=int(os.environ.get('REPLAY_VERIFY_WORKERS', per_worker)),
+            time_budget=float(os.environ.get('REPLAY_VERIFY_BUDGET', 2.0)),
+            max_pending=int(os.environ.get('REPLAY_VERIFY_QUEUE', 64)))
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create tables and backfill derived data (run once per deploy)."""
+        init_db()
+        click.echo("Database schema ready.")
+
+    return app
+
+def dispose_engine(app, close=True):
+    """
+    Fork safety: pooled connections must not be shared between processes.
+    close=True in the master before forking, close=False in the child after fork
+    (drops the inherited pool without closing the parent's sockets).
+    """
+    with app.app_context():
+        db.engine.dispose(close=close)
+
+# Module-level app for `gunicorn server:app` / `flask --app server`
+app = create_app()
 
 if __name__ == '__main__':
+    # Local development: bootstrap the schema in-process, then serve
+    with app.app_context():
+        init_db()
     # Use PORT env variable if available (good for some hosts), default 5000
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=True)
@@ -5,11 +5,101 @@ SCREEN_WIDTH = 1280
 SCREEN_HEIGHT = 720
 FPS = 60
 import sys
+
+# Timing: the simulation advances in fixed ticks, rendering runs at its own rate
+# (see WarGame.run). All speeds/durations in ticks are per simulation tick.
+SIM_HZ = 60
+SIM_DT = 1.0 / SIM_HZ
+RENDER_FPS = FPS          # Target draw rate; lowering it (e.g. 30) doesn't change game speed
+MAX_FRAME_TIME = 0.25     # Longer frames (window drag, debugger) are clamped
+MAX_CATCHUP_STEPS = 5     # Max ticks per rendered frame; any backlog beyond is dropped
+
+# Startup: threads baking images/sounds/procedural surfaces (0 = serial, on the main thread)
+ASSET_WORKERS = 4
+ASSET_PACK_FILE = 'assets.pak'  # Written by build_assets.py; loose files are used without it
+
+# Garbage collection (see gc_control.py): 'managed' or 'default' (CPython's automatic thresholds)
+GC_MODE = 'managed'
+GC_THRESHOLDS = (5000, 20, 100)  # gen0 allocations / gen0 runs per gen1 / gen1 runs per gen2
+GC_IDLE_MIN_MS = 4.0             # Spare frame time needed to collect ahead of schedule
+GC_COLLECT_STATES = ('LoadingState', 'MenuState', 'GameOverState', 'VictoryState')  # Full collect on entering these
+
+# Quality governor (see render.py): trades effects for frame rate on slow machines
+QUALITY_AUTO = True
+QUALITY_START = 0               # 0 = HIGH ... 3 = MINIMAL
+QUALITY_WINDOW = 30             # Frames averaged per decision
+QUALITY_DOWNGRADE_RATIO = 0.9   # Drop a tier above 90% of the frame budget
+QUALITY_UPGRADE_RATIO = 0.5     # Raise a tier below 50% of the budget...
+QUALITY_UPGRADE_HOLD = 180      # ...sustained for this many frames
+# Render resolution of the full-screen backdrop (starfield, menu grid), selectable in OPTIONS.
+# The window stays SCREEN_WIDTH x SCREEN_HEIGHT, so sprites, HUD and mouse coordinates
+# are unaffected; a lower quality tier can only reduce it further.
+RENDER_RESOLUTIONS = (('NATIVE', 1.0), ('640x360', 0.5))
+RENDER_RESOLUTION = 'NATIVE'
 FULLSCREEN = True if sys.platform != 'emscripten' else False
 
 # Network
 API_URL = "http://127.0.0.1:5000/log"
 LEADERBOARD_URL = "http://127.0.0.1:5000/leaderboard"
+LEADERBOARD_STREAM_URL = "http://127.0.0.1:5000/leaderboard/stream"
+# Menu leaderboard: 'stream' (one SSE connection per menu visit) or 'poll' (conditional
+# GET every LEADERBOARD_POLL_SECONDS). A stream refused by the server (404 / 503)
+# polls instead and tries the stream again after its Retry-After.
+LEADERBOARD_FEED = 'stream'
+LEADERBOARD_POLL_SECONDS = 5.0
+LEADERBOARD_STREAM_RETRY_SECONDS = 60.0  # When the refusal carries no Retry-After
+RANK_URL = "http://127.0.0.1:5000/rank"
+# Client -> server encoding: 'compact' (binary, see wire_format.py) or 'json'
+WIRE_FORMAT = 'compact'
+WIRE_COMPRESSION = 'gzip'  # 'gzip', 'zstd' (if zstandard is installed) or None
+
+# Log delivery: 'asyncio' (tasks on the game's event loop) or 'thread' (background thread)
+LOG_BACKEND = 'asyncio'
+LOG_PUMP_BUDGET_MS = 1.0  # Max time per frame spent moving events into batches
+LOG_OUTBOX_BATCHES = 100  # Log batches waiting for the network (asyncio); the oldest is dropped past it
+
+# Log aggregation (client side, see api_logger.LogAggregator)
+LOG_SUMMARY_INTERVAL = 30.0  # Seconds between SUMMARY records
+# Hot levels coalesced into counters/histograms instead of one record per event.
+# Rare levels (waves, state transitions, upgrades, expiries...) always go out verbatim.
+LOG_AGGREGATED_LEVELS = ('ENTITY_DESTROY', 'CHARACTER_STATE', 'PICKUP', 'DAMAGE')
+# Fraction of aggregated events still sent verbatim (0 = summaries only)
+LOG_SAMPLE_RATES = {
+    'ENTITY_DESTROY': 0.0,
+    'CHARACTER_STATE': 0.0,
+    'PICKUP': 0.01,
+    'DAMAGE': 0.02,
+}
+# Max verbatim records per level per interval ('default' applies to unlisted levels, 0 = no cap)
+LOG_RATE_CAPS = {
+    'default': 20,
+}
+
+# Client performance telemetry (see perf_telemetry.py): one frame-time summary per
+# game state and session, sent to /perf when the logger has nothing else to send
+PERF_TELEMETRY = True
+PERF_MIN_FRAMES = 300  # States shown for fewer frames are not reported
+# A session's summaries are sent when one of these states starts (and on exit)
+PERF_FLUSH_STATES = ('MenuState', 'GameOverState', 'VictoryState')
+BUILD_ID = 'dev'       # Stamped by release builds; /perf/summary groups by build and platform
+
+# Replays (see replay.py): seed + per-tick input of every finished game
+RECORD_REPLAYS = True
+REPLAY_DIR = 'replays'
+SUBMIT_REPLAYS = True  # Attach the replay to /score for server-side verification
+
+# Game modes (scenarios in waves.py) selectable in OPTIONS
+GAME_MODES = ('campaign', 'endless', 'swarm')
+GAME_MODE = 'campaign'
+SPAWN_PER_TICK = 8  # Planned enemies released per simulation tick
+
+def get_game_mode():
+    return GAME_MODE
+
+def cycle_game_mode():
+    global GAME_MODE
+    GAME_MODE = GAME_MODES[(GAME_MODES.index(GAME_MODE) + 1) % len(GAME_MODES)]
+    return GAME_MODE
 
 # Theme System
 CURRENT_THEME = 'DARK'  # Default theme
@@ -51,10 +141,19 @@ COLOR_HUD = (0, 255, 0)           # Green Text
 COLOR_STARS = (255, 255, 255)     # White Stars
 COLOR_EXPLOSION = (255, 100, 0)
 
-# Game Settings
+# Game Settings (speeds in pixels per simulation tick)
 PLAYER_SPEED = 5
+BULLET_SPEED = 10
 ENEMY_BASE_SPEED = 0.5
 HUNTER_SPEED = 1.2
 HEAVY_SPEED = 0.3
 MAX_HEALTH = 10
-POWERUP_DURATION = 10000  # 10 seconds in milliseconds
\ No newline at end of file
+POWERUP_DURATION = 10000  # 10 seconds in milliseconds
+
+# Sound effects (see sfx.py): reserved mixer channels and retrigger limit per sound
+SFX_GROUPS = {
+    'shoot':     {'file': 'shoot.wav',     'volume': 0.4, 'voices': 3, 'min_interval_ms': 60},
+    'explosion': {'file': 'explosion.wav', 'volume': 0.5, 'voices': 4, 'min_interval_ms': 30},
+}
+PARTICLE_LIFE = 20  # Explosion particle lifetime in simulation ticks
+WAVE_BANNER_TICKS = 2 * SIM_HZ  # "WAVE N" banner: 2 seconds of simulation
\ No newline at end of file
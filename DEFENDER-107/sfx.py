@@ -0,0 +1,90 @@
+# sfx.py
+# Sound effect voices. Every sound class (SFX_GROUPS in settings.py) owns a
+# reserved block of mixer channels, so a burst of one sound can neither starve
+# the others nor grow the number of voices the mixer has to sum: at most
+# SFX_GROUPS[...]['voices'] copies of a sound play at once, and retriggers
+# closer than 'min_interval_ms' are dropped (inaudible as separate hits anyway).
+import pygame
+from settings import SFX_GROUPS
+
+
+class VoiceGroup:
+    """Reserved channels of one sound class. Full group: the oldest voice is cut."""
+    __slots__ = ('name', 'channels', 'min_interval', 'last_ms', 'next',
+                 'played', 'dropped', 'stolen')
+
+    def __init__(self, name, channels, min_interval):
+        self.name = name
+        self.channels = channels
+        self.min_interval = min_interval
+        self.last_ms = -min_interval
+        self.next = 0      # Round robin: the channel started longest ago
+        self.played = 0
+        self.dropped = 0
+        self.stolen = 0
+
+    def play(self, sound, now_ms):
+        if now_ms - self.last_ms < self.min_interval:
+            self.dropped += 1
+            return None
+        self.last_ms = now_ms
+        count = len(self.channels)
+        for i in range(count):
+            channel = self.channels[(self.next + i) % count]
+            if not channel.get_busy():
+                break
+        else:
+            channel = self.channels[self.next]
+            self.stolen += 1
+        self.next = (self.channels.index(channel) + 1) % count
+        channel.play(sound)
+        self.played += 1
+        return channel
+
+
+# --- PATTERN: SINGLETON ---
+# Owns the mixer's channel layout. Channels 0..N-1 are reserved for the groups
+# (pygame's Sound.play() never picks reserved channels), music has its own stream.
+class SFXMixer:
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(SFXMixer, cls).__new__(cls)
+            cls._instance.groups = {}
+        return cls._instance
+
+    def setup(self):
+        """Reserve the channel groups. Idempotent; False without a working mixer."""
+        if self.groups:
+            return True
+        try:
+            if not pygame.mixer.get_init():
+                return False
+            total = sum(cfg['voices'] for cfg in SFX_GROUPS.values())
+            pygame.mixer.set_num_channels(total)
+            pygame.mixer.set_reserved(total)
+            index = 0
+            for name, cfg in SFX_GROUPS.items():
+                channels = [pygame.mixer.Channel(index + i) for i in range(cfg['voices'])]
+                self.groups[name] = VoiceGroup(name, channels, cfg['min_interval_ms'])
+                index += cfg['voices']
+        except:
+            print("SFX: [WARNING] could not reserve mixer channels")
+            self.groups.clear()
+            return False
+        return True
+
+    def play(self, name, sound):
+        group = self.groups.get(name)
+        if group is None:
+            if not self.setup() or name not in self.groups:
+                return None
+            group = self.groups[name]
+        return group.play(sound, pygame.time.get_ticks())
+
+    def stats(self):
+        """{group: (played, dropped, stolen)} since startup."""
+        return {name: (g.played, g.dropped, g.stolen) for name, g in self.groups.items()}
+
+SFX = SFXMixer()
@@ -4,7 +4,18 @@ import threading
 from abc import ABC, abstractmethod
 from settings import *
 from entities import FighterJet, EnemySquadron, Drone, Hunter, Heavy, RapidFireDecorator, ShieldDecorator, PowerUp, draw_heart, Asteroid, draw_shield_emblem, AUDIO, draw_circular_timer
+from entities import ASSETS, POOLS, collide
+from pools import ActiveList
+from scheduler import SCHEDULER
 from api_logger import APILogger
+from render import RENDER
+from ui import UI
+from waves import WaveDirector
+from replay import InputFrame, IDLE_FRAME, ReplayRecorder, FILE_EXTENSION
+import os
+import sys
+import time
+from leaderboard_feed import LeaderboardFeed
 import requests
 import json
 
@@ -15,37 +26,85 @@ class StarField:
     Instead of drawing 100 separate star rectangles every frame (CPU heavy),
     we pre-render them onto transparent surfaces (Layers).
     We then just blit these 2 layers with offsets to create a 'Parallax' effect.
+    QUALITY: lower tiers draw one layer only, and may render the whole backdrop at a
+    reduced internal resolution (RENDER.internal_scale) and upscale it in one pass.
+    Screens with more full-screen backdrop (the menu grid) pass it as `overlay` so it
+    is drawn into the small framebuffer too, before the upscale.
     """
+    # Shared by every StarField: screens only differ by their scroll offsets, so a
+    # state change no longer re-bakes two full-screen layers.
+    _stars = None      # (layer 1 stars, layer 2 stars), picked once
+    _layers = {}       # internal scale -> (layer1, layer2)
+
     def __init__(self):
-        # Pre-render two layers of stars for a parallax effect
-        self.layer1 = self._create_star_layer(SCREEN_WIDTH, SCREEN_HEIGHT, 50, 1)
-        self.layer2 = self._create_star_layer(SCREEN_WIDTH, SCREEN_HEIGHT, 30, 2)
+        self._backdrops = {}
         self.y1 = 0
         self.y2 = 0
+        self._layers_for(1.0)
+
+    @classmethod
+    def pick_stars(cls):
+        if cls._stars is None:
+            cls._stars = (cls._pick_stars(SCREEN_WIDTH, SCREEN_HEIGHT, 50),
+                          cls._pick_stars(SCREEN_WIDTH, SCREEN_HEIGHT, 30))
+        return cls._stars
+
+    @staticmethod
+    def _pick_stars(w, h, count):
+        return [(random.randint(0, w), random.randint(0, h)) for _ in range(count)]
 
-    def _create_star_layer(self, w, h, count, size):
+    @staticmethod
+    def _create_star_layer(w, h, stars, size, scale=1.0):
         # Optimized for blit speed
-        surf = pygame.Surface((w, h), pygame.SRCALPHA).convert_alpha()
-        for _ in range(count):
-            x = random.randint(0, w)
-            y = random.randint(0, h)
-            pygame.draw.rect(surf, (200, 200, 200), (x, y, size, size))
+        surf = pygame.Surface((int(w * scale), int(h * scale)), pygame.SRCALPHA).convert_alpha()
+        size = max(1, round(size * scale))
+        for x, y in stars:
+            pygame.draw.rect(surf, (200, 200, 200), (int(x * scale), int(y * scale), size, size))
         return surf
 
+    @classmethod
+    def build_layers(cls, scale=1.0):
+        """Bakes both layers for one scale without publishing them (AssetBaker job)."""
+        stars1, stars2 = cls.pick_stars()
+        return (cls._create_star_layer(SCREEN_WIDTH, SCREEN_HEIGHT, stars1, 1, scale),
+                cls._create_star_layer(SCREEN_WIDTH, SCREEN_HEIGHT, stars2, 2, scale))
+
+    @classmethod
+    def _layers_for(cls, scale):
+        if scale not in cls._layers:
+            cls._layers[scale] = cls.build_layers(scale)
+        return cls._layers[scale]
+
     def update(self):
         # Scroll layers at different speeds
         self.y1 = (self.y1 + 1) % SCREEN_HEIGHT
         self.y2 = (self.y2 + 2) % SCREEN_HEIGHT
 
-    def draw(self, screen):
+    def draw(self, screen, overlay=None):
         theme = get_theme_colors()
-        screen.fill(theme['BG']) # Clear screen with theme background
+        scale = RENDER.internal_scale
+        layer1, layer2 = self._layers_for(scale)
+        if scale == 1.0:
+            target = screen
+        else:
+            if scale not in self._backdrops:
+                self._backdrops[scale] = pygame.Surface(layer1.get_size()).convert()
+            target = self._backdrops[scale]
+        h = layer1.get_height()
+        target.fill(theme['BG']) # Clear screen with theme background
         # Layer 1
-        screen.blit(self.layer1, (0, self.y1))
-        screen.blit(self.layer1, (0, self.y1 - SCREEN_HEIGHT))
+        y1 = int(self.y1 * scale)
+        target.blit(layer1, (0, y1))
+        target.blit(layer1, (0, y1 - h))
         # Layer 2
-        screen.blit(self.layer2, (0, self.y2))
-        screen.blit(self.layer2, (0, self.y2 - SCREEN_HEIGHT))
+        if RENDER.star_layers > 1:
+            y2 = int(self.y2 * scale)
+            target.blit(layer2, (0, y2))
+            target.blit(layer2, (0, y2 - h))
+        if overlay is not None:
+            overlay(target, scale)
+        if target is not screen:
+            pygame.transform.scale(target, screen.get_size(), screen)
 
 # --- PATTERN: STATE ---
 # This serves as the 'State' interface.
@@ -59,39 +118,103 @@ class GameState(ABC):
     @abstractmethod
     def draw(self, game): pass
 
+    # Optional hooks, called by WarGame.change_state
+    def enter(self, game): pass
+    def leave(self, game): pass
+
+    def entity_count(self):
+        """Live entities, for perf telemetry (screens without a simulation have none)."""
+        return 0
+
+
+# --- CYBER GRID (menu background) ---
+_GRID_SURFS = {}  # internal scale -> grid surface
+
+def build_grid(scale=1.0):
+    # Pre-render Cyber Grid - Optimized (1px lines at any internal scale)
+    w, h = int(SCREEN_WIDTH * scale), int((SCREEN_HEIGHT + 50) * scale)
+    surf = pygame.Surface((w, h), pygame.SRCALPHA).convert_alpha()
+    grid_color = (0, 50, 100)
+    for x in range(0, SCREEN_WIDTH, 50):
+        pygame.draw.line(surf, grid_color, (int(x * scale), 0), (int(x * scale), h), 1)
+    for y in range(0, SCREEN_HEIGHT + 50, 50):
+        pygame.draw.line(surf, grid_color, (0, int(y * scale)), (w, int(y * scale)), 1)
+    return surf
+
+def _install_grid(surf, scale=1.0):
+    _GRID_SURFS[scale] = surf
+
+def grid_surface(scale=1.0):
+    if scale not in _GRID_SURFS:
+        _install_grid(build_grid(scale), scale)
+    return _GRID_SURFS[scale]
+
+def draw_grid(target, scale):
+    """StarField overlay: the scrolling grid, drawn at the backdrop's internal scale."""
+    time_offset = (pygame.time.get_ticks() // 20) % 50
+    target.blit(grid_surface(scale), (0, int((time_offset - 50) * scale)))
+
+
+# --- LOADING STATE ---
+class LoadingState(GameState):
+    """
+    First screen. Queues the menu backdrop (star layers, grid) on the AssetBaker and
+    hands over to MenuState as soon as that 'menu' group is in; the 'game' group
+    (sprites, sounds) keeps baking behind the menu.
+    """
+    def __init__(self):
+        StarField.pick_stars()
+        ASSETS.add('starfield', 'menu', StarField.build_layers,
+                   lambda layers: StarField._layers.setdefault(1.0, layers))
+        ASSETS.add('grid', 'menu', build_grid, _install_grid)
+
+    def handle_input(self, events, game): pass
+
+    def update(self, game):
+        if ASSETS.ready('menu'):
+            game.change_state(MenuState())
+
+    def draw(self, game):
+        game.screen.fill(get_theme_colors()['BG'])
+        done, total = ASSETS.progress()
+        w = 400
+        x, y = SCREEN_WIDTH // 2 - w // 2, SCREEN_HEIGHT // 2
+        pygame.draw.rect(game.screen, (0, 150, 255), (x, y, w, 12), 1)
+        pygame.draw.rect(game.screen, (0, 255, 255), (x, y, int(w * done / max(1, total)), 12))
+        t = UI.text("LOADING", 40, (200, 200, 200))
+        game.screen.blit(t, (SCREEN_WIDTH // 2 - t.get_width() // 2, y - 50))
 
 # --- MENU STATE ---
 class MenuState(GameState):
     def __init__(self):
         self.stars = StarField()
-        self.top_scores = []
+        # Shared live leaderboard, running only while a menu is on screen (enter/leave)
+        self.feed = LeaderboardFeed()
+        self.top_scores = self.feed.top_scores
         self.menu_items = ["START MISSION", "OPTIONS", "EXIT"]
         self.selected_index = 0
-        self.server_online = False
-        self.fetch_leaderboard()
-        AUDIO.load_sounds()
-        AUDIO.play_music('music.mp3')
+        self.server_online = self.feed.online
+        self.my_rank = None       # Own standing from /rank, fetched once the pilot name is known
+        self.rank_pilot = None
+        # Sound effects are decoded by the asset pipeline (initialize_entities)
         AUDIO.play_music('music.mp3')
-        # Pre-render Cyber Grid - Optimized
-        self.grid_surf = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT + 50), pygame.SRCALPHA).convert_alpha()
-        grid_color = (0, 50, 100)
-        for x in range(0, SCREEN_WIDTH, 50):
-            pygame.draw.line(self.grid_surf, grid_color, (x, 0), (x, SCREEN_HEIGHT + 50), 1)
-        for y in range(0, SCREEN_HEIGHT + 50, 50):
-            pygame.draw.line(self.grid_surf, grid_color, (0, y), (SCREEN_WIDTH, y), 1)
-
-    def fetch_leaderboard(self):
+
+    def enter(self, game):
+        self.feed.start()
+
+    def leave(self, game):
+        self.feed.stop()
+
+    def fetch_rank(self, pilot_name):
+        """Own standing on the best-score board: one indexed lookup server-side."""
+        self.rank_pilot = pilot_name
         def _fetch():
             try:
-                r = requests.get(LEADERBOARD_URL, timeout=5)
-                if r.status_code == 200:
-                    self.top_scores = r.json()
-                    self.server_online = True
-                else:
-                    self.server_online = False
+                r = requests.get(RANK_URL, params={'username': pilot_name, 'around': 0}, timeout=5)
+                self.my_rank = r.json() if r.status_code == 200 else None
             except:
-                self.server_online = False
-        
+                self.my_rank = None
+
         threading.Thread(target=_fetch, daemon=True).start()
 
     def handle_input(self, events, game):
@@ -112,71 +235,66 @@ class MenuState(GameState):
                     self.selected_index = (self.selected_index + 1) % len(self.menu_items)
                 
                 if e.key == pygame.K_r:
-                    self.fetch_leaderboard()
+                    self.feed.resync()
+                    self.fetch_rank(game.player_name)
                 
 
     def update(self, game):
         self.stars.update()
+        self.server_online = self.feed.online
+        if self.rank_pilot != game.player_name:
+            self.fetch_rank(game.player_name)
 
     def draw(self, game):
-        self.stars.draw(game.screen)
-        
-        # Cyber Grid Background
-        theme = get_theme_colors()
-        grid_color = theme['GRID']
-        # Cyber Grid Background from Cache
-        time_offset = (pygame.time.get_ticks() // 20) % 50
-        game.screen.blit(self.grid_surf, (0, time_offset - 50))
+        # Stars + Cyber Grid Background, one upscale at reduced internal resolution
+        self.stars.draw(game.screen, draw_grid)
 
-        # Neon Title
-        font = pygame.font.Font(None, 80)
-        f2 = pygame.font.Font(None, 40) # Smaller font for items
-        
+        # Neon Title (cached text surfaces, see ui.py)
         # Outer Glow
-        t1_glow = font.render("GALACTIC DEFENDER", True, (0, 100, 255))
-        t2_glow = font.render("ENDLESS WAR", True, (255, 0, 100))
+        t1_glow = UI.text("GALACTIC DEFENDER", 80, (0, 100, 255))
+        t2_glow = UI.text("ENDLESS WAR", 80, (255, 0, 100))
         game.screen.blit(t1_glow, (SCREEN_WIDTH//2 - t1_glow.get_width()//2 + 2, 152))
         game.screen.blit(t2_glow, (SCREEN_WIDTH//2 - t2_glow.get_width()//2 + 2, 222))
         
-        t1 = font.render("GALACTIC DEFENDER", True, COLOR_PLAYER)
-        t2 = font.render("ENDLESS WAR", True, COLOR_ENEMY)
+        t1 = UI.text("GALACTIC DEFENDER", 80, COLOR_PLAYER)
+        t2 = UI.text("ENDLESS WAR", 80, COLOR_ENEMY)
         
         game.screen.blit(t1, (SCREEN_WIDTH//2 - t1.get_width()//2, 150))
         game.screen.blit(t2, (SCREEN_WIDTH//2 - t2.get_width()//2, 220))
         
         if pygame.time.get_ticks() % 1000 < 500:
-            msg = f2.render("[ USE ARROWS TO NAVIGATE ]", True, (200, 200, 200))
+            msg = UI.text("[ USE ARROWS TO NAVIGATE ]", 40, (200, 200, 200))
             game.screen.blit(msg, (SCREEN_WIDTH//2 - msg.get_width()//2, 380))
             
         # Draw Menu Selectors
         for i, item in enumerate(self.menu_items):
             color = (255, 255, 255) if i == self.selected_index else (100, 100, 100)
             prefix = "> " if i == self.selected_index else "  "
-            txt = f2.render(prefix + item, True, color)
+            txt = UI.text(prefix + item, 40, color)
             game.screen.blit(txt, (SCREEN_WIDTH//2 - txt.get_width()//2, 280 + i * 40))
             
             
         # --- Styled Leaderboard ---
-        lb_panel = pygame.Surface((300, 350), pygame.SRCALPHA)
-        pygame.draw.rect(lb_panel, theme['PANEL_BG'], (0, 0, 300, 350), border_radius=15)
-        pygame.draw.rect(lb_panel, (*theme['PANEL_BORDER'], 255), (0, 0, 300, 350), 2, border_radius=15)
-        game.screen.blit(lb_panel, (40, 440))
+        game.screen.blit(UI.panel((300, 350), 'leaderboard'), (40, 440))
 
-        heading = f2.render("TOP PILOTS", True, (0, 255, 255))
+        heading = UI.text("TOP PILOTS", 40, (0, 255, 255))
         game.screen.blit(heading, (60, 460))
         
         # Display server status
-        font_sm = pygame.font.Font(None, 30)
         status_color = (0, 255, 0) if self.server_online else (255, 50, 50)
         status_text = "[ SERVER: ONLINE ]" if self.server_online else "[ SERVER: OFFLINE ]"
-        txt_status = font_sm.render(status_text, True, status_color)
+        txt_status = UI.text(status_text, 30, status_color)
         game.screen.blit(txt_status, (60, 485))
         
         y_off = 510
-        font_sm = pygame.font.Font(None, 30)
+        if self.my_rank:
+            me = self.my_rank
+            txt_me = UI.text(f"YOU: #{me['rank']} of {me['total']} - {me['score']}", 30, (255, 255, 0))
+            game.screen.blit(txt_me, (60, y_off))
+            y_off += 30
         for i, entry in enumerate(self.top_scores):
             txt = f"{i+1}. {entry['username']} - {entry['score']}"
-            s = font_sm.render(txt, True, (200, 200, 200))
+            s = UI.text(txt, 30, (200, 200, 200))
             game.screen.blit(s, (60, y_off))
             y_off += 30
 
@@ -193,7 +311,9 @@ class NameInputState(GameState):
                     final_name = self.name.strip() if self.name.strip() else "PILOT_X"
                     game.player_name = final_name
                     APILogger().log("GAME_START", f"Mission Started by {final_name}")
-                    game.change_state(WarState())
+                    # Join the sprites/sounds still baking (usually long done by now)
+                    ASSETS.wait('game')
+                    game.change_state(WarState(pilot=final_name))
                 elif e.key == pygame.K_BACKSPACE:
                     self.name = self.name[:-1]
                 else:
@@ -207,11 +327,10 @@ class NameInputState(GameState):
     def draw(self, game):
         self.stars.draw(game.screen)
         
-        font = pygame.font.Font(None, 60)
-        t = font.render("ENTER PILOT NAME:", True, (255, 255, 0))
+        t = UI.text("ENTER PILOT NAME:", 60, (255, 255, 0))
         game.screen.blit(t, (SCREEN_WIDTH//2 - t.get_width()//2, 200))
         
-        name_t = font.render(self.name + "_", True, (255, 255, 255))
+        name_t = UI.text(self.name + "_", 60, (255, 255, 255))
         game.screen.blit(name_t, (SCREEN_WIDTH//2 - name_t.get_width()//2, 300))
 
 # --- OPTIONS STATE ---
@@ -235,25 +354,35 @@ class OptionsState(GameState):
                 if e.key == pygame.K_t:
                     toggle_theme()
                     APILogger().log("SYSTEM", f"Theme changed in OPTIONS to {CURRENT_THEME} MODE")
+                if e.key == pygame.K_m:
+                    mode = cycle_game_mode()
+                    APILogger().log("SYSTEM", f"Game mode changed in OPTIONS to {mode}")
+                if e.key == pygame.K_r:
+                    resolution = RENDER.cycle_resolution()
+                    APILogger().log("SYSTEM", f"Render resolution changed in OPTIONS to {resolution}")
 
     def update(self, game): self.stars.update()
 
     def draw(self, game):
         self.stars.draw(game.screen)
-        f = pygame.font.Font(None, 60)
-        t = f.render("SETTINGS", True, (0, 255, 255))
+        t = UI.text("SETTINGS", 60, (0, 255, 255))
         game.screen.blit(t, (SCREEN_WIDTH//2 - t.get_width()//2, 150))
         
-        f2 = pygame.font.Font(None, 40)
         s_txt = "ON" if self.sound_on else "OFF"
-        st = f2.render(f"SOUND (Press S): {s_txt}", True, (255, 255, 255))
+        st = UI.text(f"SOUND (Press S): {s_txt}", 40, (255, 255, 255))
         game.screen.blit(st, (SCREEN_WIDTH//2 - st.get_width()//2, 250))
         
-        tt = f2.render(f"THEME (Press T): {CURRENT_THEME}", True, (255, 255, 255))
+        tt = UI.text(f"THEME (Press T): {CURRENT_THEME}", 40, (255, 255, 255))
         game.screen.blit(tt, (SCREEN_WIDTH//2 - tt.get_width()//2, 300))
+
+        mt = UI.text(f"MODE (Press M): {get_game_mode().upper()}", 40, (255, 255, 255))
+        game.screen.blit(mt, (SCREEN_WIDTH//2 - mt.get_width()//2, 350))
+
+        rt = UI.text(f"RESOLUTION (Press R): {RENDER.resolution}", 40, (255, 255, 255))
+        game.screen.blit(rt, (SCREEN_WIDTH//2 - rt.get_width()//2, 400))
         
-        msg = f2.render("Press ESC to Return", True, (100, 100, 100))
-        game.screen.blit(msg, (SCREEN_WIDTH//2 - msg.get_width()//2, 450))
+        msg = UI.text("Press ESC to Return", 40, (100, 100, 100))
+        game.screen.blit(msg, (SCREEN_WIDTH//2 - msg.get_width()//2, 500))
 
 # --- PAUSE STATE ---
 class PauseState(GameState):
@@ -265,15 +394,13 @@ class PauseState(GameState):
     """
     def __init__(self, war_state):
         self.previous_state = war_state
-        self.pause_start = pygame.time.get_ticks()
+        SCHEDULER.pause() # Game clock and its timers freeze until resume
 
     def handle_input(self, events, game):
         for e in events:
             if e.type == pygame.KEYDOWN:
                 if e.key == pygame.K_ESCAPE or e.key == pygame.K_p:
-                    # Calculate duration of this pause session and add it to state
-                    duration = pygame.time.get_ticks() - self.pause_start
-                    self.previous_state.paused_duration += duration
+                    SCHEDULER.resume()
                     game.change_state(self.previous_state)
                 
                 if e.key == pygame.K_m:
@@ -286,43 +413,61 @@ class PauseState(GameState):
         self.previous_state.draw(game)
         
         # Overlay darkening
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180)) # Slightly darker
-        game.screen.blit(overlay, (0,0))
+        game.screen.blit(UI.panel((SCREEN_WIDTH, SCREEN_HEIGHT), 'overlay'), (0,0)) # Slightly darker
         
-        font = pygame.font.Font(None, 100)
-        t = font.render("PAUSED", True, (255, 255, 255))
+        t = UI.text("PAUSED", 100, (255, 255, 255))
         game.screen.blit(t, (SCREEN_WIDTH//2 - t.get_width()//2, SCREEN_HEIGHT//2 - 50))
         
-        f2 = pygame.font.Font(None, 40)
-        msg = f2.render("Press P to Resume | Press M for Menu", True, (200, 200, 200))
+        msg = UI.text("Press P to Resume | Press M for Menu", 40, (200, 200, 200))
         game.screen.blit(msg, (SCREEN_WIDTH//2 - msg.get_width()//2, SCREEN_HEIGHT//2 + 50))
 
 # --- PLAYING STATE (ENDLESS) ---
 class WarState(GameState):
-    def __init__(self):
-        self.stars = StarField()
+    """
+    DETERMINISM: every random decision comes from self.rng (seeded), timed effects
+    run on the simulation clock, and input is applied from one InputFrame per tick
+    inside update(). Seed + frames therefore reproduce a session exactly (replay.py).
+    The pilot's name is mixed into the seed, binding the replay to the pilot.
+    """
+    def __init__(self, seed=None, headless=False, scenario=None, pilot=''):
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.pilot = pilot
+        self.rng = random.Random(f"{self.seed}:{pilot}" if pilot else self.seed)
+        self.headless = headless
+        self.tick = 0
+        SCHEDULER.reset()
+        # Wave content and pacing (waves.py SCENARIOS)
+        self.director = WaveDirector(scenario or get_game_mode(), self.rng)
+        self.recorder = ReplayRecorder(self.seed, self.director.name, pilot)
+        self.replay = None            # Set once the game is over
+        self._pending_input = None
+        self._held_input = IDLE_FRAME  # Keys/mouse carry over to ticks without a new sample
+
+        # Cosmetic layers use the global RNG: skipped when re-simulating
+        self.stars = StarField() if not headless else None
         self.squadron = EnemySquadron()
         self.player = FighterJet()
+        if self.director.cfg['player_lives']:
+            self.player.lives = self.director.cfg['player_lives']
         self.bullets = []
-        self.powerups = []
-        self.obstacles = [] # Asteroids
-        self.decorated = False
+        self.powerups = ActiveList(POOLS)
+        self.obstacles = ActiveList(POOLS) # Asteroids
         self.player_moving = False
         
-        # Scoreboard & Timer Stats
-        self.start_ticks = pygame.time.get_ticks()
-        self.paused_duration = 0
+        # Scoreboard Stats (mission time is the game clock)
         self.score = 0
         self.wave = 1
         
         # Wave Notification System
         self.wave_notification = None  # Text to display
-        self.wave_notification_timer = 0  # Duration to show notification
+        self.wave_notification_end = 0  # Tick the banner disappears
+        self._wave_banner_timer = None
         
         # Initial Wave
         self.spawn_wave()
         
+        if headless:
+            return
         # Pre-render HUD Panel - Optimized
         self.hud_panel = pygame.Surface((SCREEN_WIDTH, 45), pygame.SRCALPHA).convert_alpha()
         pygame.draw.rect(self.hud_panel, (20, 20, 40, 180), (0, 0, SCREEN_WIDTH, 45))
@@ -332,57 +477,33 @@ class WarState(GameState):
         # Show wave notification (except for wave 1)
         if self.wave > 1:
             self.wave_notification = f"WAVE {self.wave}"
-            self.wave_notification_timer = 120  # Show for 2 seconds (120 frames at 60 FPS)
+            self.wave_notification_end = SCHEDULER.tick + WAVE_BANNER_TICKS
+            if self._wave_banner_timer:
+                self._wave_banner_timer.cancel()
+            self._wave_banner_timer = SCHEDULER.call_at(self.wave_notification_end, self._clear_wave_notification)
         
         #Enemy wave Loggs
         APILogger().log("GAME", f"Wave {self.wave} Spawning")
-        # Increase enemy count every wave
-        count = 3 + int(self.wave * 1.5)
-        speed_boost = min(3.0, self.wave * 0.2) # Cap speed so it's not impossible
-        
-        #Spawn enemies based on wave
-        for i in range(count):
-            x = random.randint(50, SCREEN_WIDTH - 50)
-            y = random.randint(-200, -50)
-            
-            roll = random.random()
-            if self.wave < 3:
-                # Only Drones in early waves
-                self.squadron.add(Drone(x, y, speed_mod=speed_boost))
-            elif self.wave < 6:
-                # Intro Hunters
-                if roll < 0.7:
-                    self.squadron.add(Drone(x, y, speed_mod=speed_boost))
-                else:
-                    self.squadron.add(Hunter(x, y, speed_mod=speed_boost))
-            else:
-                # All types in later waves
-                if roll < 0.5:
-                    self.squadron.add(Drone(x, y, speed_mod=speed_boost))
-                elif roll < 0.8:
-                    self.squadron.add(Hunter(x, y, speed_mod=speed_boost))
-                else:
-                    self.squadron.add(Heavy(x, y, speed_mod=speed_boost))
+        # Enemy count, mix and speed come from the scenario; the director
+        # releases them over the next ticks (see _handle_spawn_logic)
+        self.director.plan_wave(self.wave)
+
+    def _clear_wave_notification(self):
+        self.wave_notification = None
+        self._wave_banner_timer = None
+
+    def entity_count(self):
+        return (len(self.squadron.children) + len(self.squadron.particles) + len(self.bullets)
+                + len(self.obstacles) + len(self.powerups))
 
     #Input handling
+    # Live input is only sampled here; it is applied in update() so the recorded
+    # InputFrame is exactly what the simulation consumed this tick.
     def handle_input(self, events, game):
         keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT]: self.player.move(-PLAYER_SPEED)
-        if keys[pygame.K_RIGHT]: self.player.move(PLAYER_SPEED)
-            
         mx, my = pygame.mouse.get_pos()
-        # Only move if mouse is inside window horizontally
-        moving_now = False
-        if 0 < mx < SCREEN_WIDTH:
-            self.player.set_x(mx)
-            # Check if actually moved (roughly)
-            moving_now = True
-            
-        # Log character state change: Idle <-> Moving
-        if moving_now != self.player_moving:
-            self.player_moving = moving_now
-            state_label = "Moving" if moving_now else "Idle"
-            APILogger().log("CHARACTER_STATE", f"Pilot -> {state_label}")
+        fire = 0
+        pause = False
         
         for e in events:
             # Quit anytime
@@ -390,33 +511,90 @@ class WarState(GameState):
                  game.change_state(MenuState())
 
             if e.type == pygame.KEYDOWN and e.key == pygame.K_SPACE:
-                self.player.shoot(self.bullets)
+                fire += 1
             
             # --- PAUSE TRIGGER ---
             if e.type == pygame.KEYDOWN and (e.key == pygame.K_ESCAPE or e.key == pygame.K_p):
+                pause = True
                 game.change_state(PauseState(self))
             
             # MOUSE SHOOT
             if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
-                self.player.shoot(self.bullets)
+                fire += 1
+
+        # Only follow the mouse if it is inside window horizontally
+        mouse_x = mx if 0 < mx < SCREEN_WIDTH else None
+        self.queue_input(InputFrame(mouse_x, bool(keys[pygame.K_LEFT]), bool(keys[pygame.K_RIGHT]), fire, pause))
+
+    def queue_input(self, frame):
+        """Input for the next tick. Frames queued before an update (e.g. while paused) are merged."""
+        prev = self._pending_input
+        if prev is not None:
+            frame = frame._replace(fire=prev.fire + frame.fire, pause=prev.pause or frame.pause)
+        self._pending_input = frame
+
+    def _apply_input(self, frame):
+        if frame.left: self.player.move(-PLAYER_SPEED)
+        if frame.right: self.player.move(PLAYER_SPEED)
+        
+        moving_now = False
+        if frame.mouse_x is not None:
+            self.player.set_x(frame.mouse_x)
+            # Check if actually moved (roughly)
+            moving_now = True
+            
+        # Log character state change: Idle <-> Moving
+        if moving_now != self.player_moving:
+            self.player_moving = moving_now
+            state_label = "Moving" if moving_now else "Idle"
+            APILogger().log("CHARACTER_STATE", f"Pilot -> {state_label}", key=state_label)
+
+        for _ in range(frame.fire):
+            self.player.shoot(self.bullets)
+
+    def _finish_replay(self, game):
+        """Seal the recording at the moment the outcome is decided and keep it on disk."""
+        if self.replay is not None:
+            return
+        self.replay = self.recorder.finish(self)
+        if self.headless or not RECORD_REPLAYS or sys.platform == 'emscripten':
+            return
+        try:
+            folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), REPLAY_DIR)
+            os.makedirs(folder, exist_ok=True)
+            pilot = getattr(game, 'player_name', "PILOT_X")
+            path = os.path.join(folder, f"{time.strftime('%Y%m%d-%H%M%S')}_{pilot}{FILE_EXTENSION}")
+            self.replay.save(path)
+            print(f"REPLAY: saved {path}")
+        except Exception as e:
+            print(f"REPLAY: could not save replay: {e}")
+
+    def _replay_payload(self):
+        # Sent with the score so the server can re-simulate and verify it
+        return self.replay.to_bytes() if SUBMIT_REPLAYS and self.replay else None
 
     def update(self, game):
-        self.stars.update()
+        # Several ticks can run per rendered frame (fixed timestep catch-up):
+        # only the first one consumes the sampled events, the rest keep held keys/mouse
+        frame = self._pending_input or self._held_input
+        self._pending_input = None
+        self._held_input = frame._replace(fire=0, pause=False)
+        self._apply_input(frame)
+        self.recorder.record(frame)
+        self.tick += 1
+        SCHEDULER.advance() # Runs the timers due this tick
+
+        if self.stars: self.stars.update()
         self.squadron.update()
         
         # Update wave notification timer
-        if self.wave_notification_timer > 0:
-            self.wave_notification_timer -= 1
-            if self.wave_notification_timer == 0:
-                self.wave_notification = None
-        
         # Bullets
         # Update player (handles timed effects)
         p_status = self.player.update()
         if p_status == "EXPIRED":
-            # Revert to normal FighterJet as requested
-            self.player = self.player.get_base_ship()
-            self.decorated = False
+            # Drop the wrappers that ran out; effects still active keep running
+            base = self.player.get_base_ship()
+            self.player = base.effects.outermost() or base
 
         self._update_projectiles()
         self._handle_spawn_logic(game)
@@ -425,76 +603,75 @@ class WarState(GameState):
 
     def _update_projectiles(self):
         for b in self.bullets[:]:
-            b.y -= 10
+            b.y -= BULLET_SPEED
             if b.y < 0: 
                 self.bullets.remove(b)
                 continue
             
             # Drone/Hunter/Heavy Collision
-            for enemy in self.squadron.children[:]:
-                if b.colliderect(enemy.rect):
+            for enemy in self.squadron.children.each():
+                if b.colliderect(enemy.rect) and collide(b, enemy):
                     # Check HP
                     enemy.hp -= 1
                     if enemy.hp <= 0:
                         self.squadron.add_explosion(enemy.rect.centerx, enemy.rect.centery)
-                        self.squadron.children.remove(enemy)
+                        self.squadron.children.kill(enemy)
                         self.score += 100 * self.wave
-                        APILogger().log("ENTITY_DESTROY", f"{enemy.__class__.__name__} destroyed. Score: {self.score}")
+                        APILogger().log("ENTITY_DESTROY", f"{enemy.__class__.__name__} destroyed. Score: {self.score}",
+                                        key=enemy.__class__.__name__, value=self.score)
                     
                     if b in self.bullets: self.bullets.remove(b)
                     return # Bullet gone
 
             # Asteroid Collision
-            for ast in self.obstacles[:]:
-                if b.colliderect(ast.rect):
+            for ast in self.obstacles.each():
+                if b.colliderect(ast.rect) and collide(b, ast):
                     self.squadron.add_explosion(ast.rect.centerx, ast.rect.centery)
-                    self.obstacles.remove(ast)
+                    self.obstacles.kill(ast)
                     if b in self.bullets: self.bullets.remove(b)
                     self.score += 50
                     return
 
     def _handle_spawn_logic(self, game):
+        # Planned enemies enter a few per tick: no spike when a big wave starts
+        self.director.spawn_pending(self.squadron, self.obstacles)
+
         # Wave complete?
-        if not self.squadron.children:
+        if not self.squadron.children and not self.director.pending:
             self.wave += 1
-            if self.wave > 10:
-                APILogger().log("RESULT", "Victory Reached Wave 10+")
-                if hasattr(game, 'player_name'):
-                    APILogger().submit_score(game.player_name, self.score)
+            if self.director.is_victory(self.wave):
+                self._finish_replay(game)
+                APILogger().log("RESULT", f"Victory Reached Wave {self.wave - 1}+")
+                if hasattr(game, 'player_name') and self.director.cfg['ranked']:
+                    APILogger().submit_score(game.player_name, self.score, self._replay_payload())
                 game.change_state(VictoryState(self.score))
                 return
             self.spawn_wave()
         
         # Obstacles
-        for ast in self.obstacles[:]:
+        for ast in self.obstacles.each():
             ast.update()
-            if ast.rect.y > SCREEN_HEIGHT: self.obstacles.remove(ast)
+            if ast.rect.y > SCREEN_HEIGHT: self.obstacles.kill(ast)
         
-        if random.randint(0, 1000) < 10:
-             self.obstacles.append(Asteroid(random.randint(0, SCREEN_WIDTH), -50))
+        ast_x = self.director.roll_asteroid()
+        if ast_x is not None:
+             self.obstacles.spawn(Asteroid, ast_x, -50, rng=self.rng)
 
         # PowerUp spawning
-        if random.randint(0, 1000) < 8:
-            x = random.randint(50, SCREEN_WIDTH-50)
-            roll = random.random()
-            
-            # 1- the 3 shoots don't appears in the 3 first waves
-            if self.wave < 3:
-                p_type = 'SHIELD' if roll < 0.5 else 'LIFE'
-            else:
-                p_type = 'SHIELD' if roll < 0.4 else 'LIFE' if roll < 0.7 else 'RAPID'
-            
-            self.powerups.append(PowerUp(x, -50, p_type))
+        drop = self.director.roll_powerup(self.wave)
+        if drop is not None:
+            x, p_type = drop
+            self.powerups.spawn(PowerUp, x, -50, p_type)
 
     def _handle_powerups(self):
-        for p in self.powerups[:]:
+        for p in self.powerups.each():
             p.update()
             if p.rect.y > SCREEN_HEIGHT: 
-                self.powerups.remove(p)
+                self.powerups.kill(p)
                 continue
 
             if p.rect.colliderect(self.player.get_rect()):
-                APILogger().log("PICKUP", f"Collected {p.type} PowerUp")
+                APILogger().log("PICKUP", f"Collected {p.type} PowerUp", key=p.type)
                 if p.type == 'SHIELD':
                      if not self.player.has_decorator(ShieldDecorator):
                           self.player = ShieldDecorator(self.player)
@@ -509,43 +686,43 @@ class WarState(GameState):
                     if self.wave >= 3:
                         if not self.player.has_decorator(RapidFireDecorator):
                              self.player = RapidFireDecorator(self.player)
-                             self.decorated = True
                     else:
                         APILogger().log("STATUS", "Rapid Fire locked until Wave 3")
-                self.powerups.remove(p)
+                self.powerups.kill(p)
 
     def _handle_collisions(self, game):
         player_r = self.player.get_rect()
         
         # Asteroids
-        for ast in self.obstacles[:]:
-            if ast.rect.colliderect(player_r):
-                self.obstacles.remove(ast)
+        for ast in self.obstacles.each():
+            if ast.rect.colliderect(player_r) and collide(ast, self.player):
                 self.squadron.add_explosion(ast.rect.centerx, ast.rect.centery)
+                self.obstacles.kill(ast)
                 if self.player.take_damage() is True:
                      self._trigger_game_over(game)
                      return
 
         # Drones
-        for d in self.squadron.children[:]:
-            if d.rect.colliderect(player_r) or d.rect.y > SCREEN_HEIGHT:
+        for d in self.squadron.children.each():
+            if d.rect.y > SCREEN_HEIGHT or (d.rect.colliderect(player_r) and collide(d, self.player)):
                 result = self.player.take_damage()
                 
                 if result == "BREAK_SHIELD":
                     self.player = self.player.remove_decorator(ShieldDecorator)
-                    self.squadron.children.remove(d)
                     self.squadron.add_explosion(d.rect.centerx, d.rect.centery)
+                    self.squadron.children.kill(d)
                 elif result is True: # Death
                     self._trigger_game_over(game)
                     return
                 else: # Tanked it (or just damage)
-                    self.squadron.children.remove(d)
                     self.squadron.add_explosion(d.rect.centerx, d.rect.centery)
+                    self.squadron.children.kill(d)
 
     def _trigger_game_over(self, game):
+        self._finish_replay(game)
         APILogger().log("DEATH", f"Game Over. Final Score: {self.score}")
-        if hasattr(game, 'player_name'):
-            APILogger().submit_score(game.player_name, self.score)
+        if hasattr(game, 'player_name') and self.director.cfg['ranked']:
+            APILogger().submit_score(game.player_name, self.score, self._replay_payload())
         game.change_state(GameOverState(self.score, self.wave))
 
     def draw(self, game):
@@ -559,32 +736,27 @@ class WarState(GameState):
         self.squadron.draw(game.screen)
         for ast in self.obstacles: 
             ast.draw(game.screen)
+        # Bullets are drawn where they were part way through the current tick
+        bullet_lag = round(BULLET_SPEED * (1.0 - RENDER.alpha))
         for b in self.bullets:
-            pygame.draw.rect(game.screen, COLOR_BULLET, b)
+            pygame.draw.rect(game.screen, COLOR_BULLET, b.move(0, bullet_lag))
         for p in self.powerups:
             p.draw(game.screen)
             
         # --- HUD (Heads Up Display) ---
-        # If we are drawing from PauseState, we need to show the time frozen at pause_start
-        current_tick = pygame.time.get_ticks()
-        # Find if we are currently being drawn by a PauseState or if we are the active state
-        # A bit hacky but works for this architecture: check game.state
-        if game.state.__class__.__name__ == "PauseState" and hasattr(game.state, 'pause_start'):
-            current_tick = game.state.pause_start
-
-        seconds = (current_tick - self.start_ticks - self.paused_duration) // 1000
+        # Game clock: frozen while a PauseState is drawing us
+        seconds = SCHEDULER.now_ms() // 1000
         time_str = f"{seconds // 60:02}:{seconds % 60:02}"
-        font = pygame.font.Font(None, 36)
         
         # Glass Panel HUD from Cache
         game.screen.blit(self.hud_panel, (0, 0))
         
         # Render Stats
         pilot_name = getattr(game, 'player_name', "Unknown")
-        txt_pilot = font.render(f"PILOT: {pilot_name}", True, (0, 255, 255))
-        txt_score = font.render(f"SCORE: {self.score}", True, (255, 255, 255))
-        txt_wave = font.render(f"WAVE: {self.wave}", True, COLOR_HUD)
-        txt_time = font.render(f"TIME: {time_str}", True, (255, 200, 0))
+        txt_pilot = UI.text(f"PILOT: {pilot_name}", 36, (0, 255, 255))
+        txt_score = UI.text(f"SCORE: {self.score}", 36, (255, 255, 255))
+        txt_wave = UI.text(f"WAVE: {self.wave}", 36, COLOR_HUD)
+        txt_time = UI.text(f"TIME: {time_str}", 36, (255, 200, 0))
         
         game.screen.blit(txt_pilot, (15, 10))
         game.screen.blit(txt_score, (250, 10))
@@ -595,31 +767,23 @@ class WarState(GameState):
         base = self.player.get_base_ship()
         lives = base.lives
         
-        for i in range(lives):
+        for i in range(min(lives, MAX_HEALTH)):
             draw_heart(game.screen, 30 + i*35, 80, 25)
         
         # --- WAVE NOTIFICATION ---
-        if self.wave_notification and self.wave_notification_timer > 0:
+        if self.wave_notification:
+            left = self.wave_notification_end - SCHEDULER.tick
             # Calculate alpha for fade effect
-            if self.wave_notification_timer > 100:
-                alpha = min(255, (120 - self.wave_notification_timer) * 12)  # Fade in
-            elif self.wave_notification_timer < 20:
-                alpha = self.wave_notification_timer * 12  # Fade out
+            if left > WAVE_BANNER_TICKS - 20:
+                alpha = min(255, (WAVE_BANNER_TICKS - left) * 12)  # Fade in
+            elif left < 20:
+                alpha = left * 12  # Fade out
             else:
                 alpha = 255  # Full opacity
             
-            # Create notification surface
-            notif_font = pygame.font.Font(None, 100)
-            notif_text = notif_font.render(self.wave_notification, True, (255, 255, 0))
-            
-            # Create semi-transparent surface
-            notif_surface = pygame.Surface((notif_text.get_width() + 60, notif_text.get_height() + 40), pygame.SRCALPHA)
-            pygame.draw.rect(notif_surface, (0, 0, 0, min(200, alpha)), (0, 0, notif_surface.get_width(), notif_surface.get_height()), border_radius=20)
-            pygame.draw.rect(notif_surface, (255, 255, 0, alpha), (0, 0, notif_surface.get_width(), notif_surface.get_height()), 3, border_radius=20)
-            
-            # Blit text onto notification surface
-            notif_text.set_alpha(alpha)
-            notif_surface.blit(notif_text, (30, 20))
+            # Cached panel with the text baked in; the fade is a surface alpha
+            notif_surface = UI.banner(self.wave_notification, 100, (255, 255, 0))
+            notif_surface.set_alpha(alpha)
             
             # Center on screen
             x_pos = SCREEN_WIDTH // 2 - notif_surface.get_width() // 2
@@ -630,34 +794,23 @@ class WarState(GameState):
         # Show Shield/Rapid icons next to score if active with Circular Timers
         icon_x = 180
         
+        effects = self.player.get_base_ship().effects
+
         # Shield
-        if self.player.has_decorator(ShieldDecorator):
-            # Find the decorator in the stack to get its time
-            curr = self.player
-            while curr and not isinstance(curr, ShieldDecorator):
-                curr = getattr(curr, 'ship', None)
-            
-            if curr:
-                draw_shield_emblem(game.screen, icon_x, 25, 20)
-                # Progress for timer
-                elapsed = pygame.time.get_ticks() - curr.start_time
-                progress = max(0, (curr.duration - elapsed) / curr.duration)
-                draw_circular_timer(game.screen, (icon_x, 25), progress, (0, 200, 255))
-                icon_x += 40
+        shield = effects.get(ShieldDecorator)
+        if shield:
+            draw_shield_emblem(game.screen, icon_x, 25, 20)
+            # Progress for timer
+            draw_circular_timer(game.screen, (icon_x, 25), shield.remaining(), (0, 200, 255))
+            icon_x += 40
         
         # Rapid Fire (3 shoots)
-        if self.decorated:
-            curr = self.player
-            while curr and not isinstance(curr, RapidFireDecorator):
-                curr = getattr(curr, 'ship', None)
-            
-            if curr:
-                # Use a small rect or icon for Rapid Fire
-                pygame.draw.rect(game.screen, (255, 255, 0), (icon_x - 5, 15, 10, 20))
-                elapsed = pygame.time.get_ticks() - curr.start_time
-                progress = max(0, (curr.duration - elapsed) / curr.duration)
-                draw_circular_timer(game.screen, (icon_x, 25), progress, (255, 255, 0))
-                icon_x += 40
+        rapid = effects.get(RapidFireDecorator)
+        if rapid:
+            # Use a small rect or icon for Rapid Fire
+            pygame.draw.rect(game.screen, (255, 255, 0), (icon_x - 5, 15, 10, 20))
+            draw_circular_timer(game.screen, (icon_x, 25), rapid.remaining(), (255, 255, 0))
+            icon_x += 40
 
 # --- VICTORY STATE ---
 class VictoryState(GameState):
@@ -674,15 +827,13 @@ class VictoryState(GameState):
 
     def draw(self, game):
         self.stars.draw(game.screen)
-        f = pygame.font.Font(None, 80)
-        t = f.render("MISSION ACCOMPLISHED", True, (0, 255, 0))
+        t = UI.text("MISSION ACCOMPLISHED", 80, (0, 255, 0))
         game.screen.blit(t, (SCREEN_WIDTH//2 - t.get_width()//2, 150))
         
-        f2 = pygame.font.Font(None, 40)
-        st = f2.render(f"FINAL SCORE: {self.score}", True, (255, 255, 255))
+        st = UI.text(f"FINAL SCORE: {self.score}", 40, (255, 255, 255))
         game.screen.blit(st, (SCREEN_WIDTH//2 - st.get_width()//2, 250))
         
-        msg = f2.render("The galaxy is safe... for now. Press ENTER", True, (200, 200, 200))
+        msg = UI.text("The galaxy is safe... for now. Press ENTER", 40, (200, 200, 200))
         game.screen.blit(msg, (SCREEN_WIDTH//2 - msg.get_width()//2, 450))
 
 # --- GAME OVER STATE ---
@@ -703,17 +854,14 @@ class GameOverState(GameState):
     def draw(self, game):
         self.stars.draw(game.screen)
         
-        font = pygame.font.Font(None, 80)
-        t = font.render("GAME OVER", True, (255, 0, 0))
+        t = UI.text("GAME OVER", 80, (255, 0, 0))
         game.screen.blit(t, (SCREEN_WIDTH//2 - t.get_width()//2, 150))
         
-        f2 = pygame.font.Font(None, 50)
-        s_txt = f2.render(f"FINAL SCORE: {self.score}", True, (255, 255, 255))
-        w_txt = f2.render(f"WAVES SURVIVED: {self.wave}", True, (0, 255, 0))
+        s_txt = UI.text(f"FINAL SCORE: {self.score}", 50, (255, 255, 255))
+        w_txt = UI.text(f"WAVES SURVIVED: {self.wave}", 50, (0, 255, 0))
         
         game.screen.blit(s_txt, (SCREEN_WIDTH//2 - s_txt.get_width()//2, 250))
         game.screen.blit(w_txt, (SCREEN_WIDTH//2 - w_txt.get_width()//2, 300))
         
-        f3 = pygame.font.Font(None, 30)
-        msg = f3.render("Press ENTER to Try Again", True, (150, 150, 150))
+        msg = UI.text("Press ENTER to Try Again", 30, (150, 150, 150))
         game.screen.blit(msg, (SCREEN_WIDTH//2 - msg.get_width()//2, 450))
\ No newline at end of file
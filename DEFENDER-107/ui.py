@@ -0,0 +1,103 @@
+# ui.py
+# Shared cache for transient UI surfaces: fonts, rendered text and the rounded,
+# bordered alpha panels the menus and HUD draw every frame. Each surface is built
+# once per key and reused; fades call set_alpha on the cached surface.
+from collections import OrderedDict
+
+import pygame
+import settings
+
+TEXT_CACHE_SIZE = 256  # Rendered strings kept (score/time strings change, labels don't)
+BANNER_CACHE_SIZE = 8  # Text-baked panels kept ("WAVE N" is new every wave in endless)
+
+# Panel looks. Colours may name a key of the active theme (settings.get_theme_colors).
+PANEL_STYLES = {
+    'leaderboard': {'fill': 'PANEL_BG', 'border': 'PANEL_BORDER', 'width': 2, 'radius': 15},
+    'overlay':     {'fill': (0, 0, 0, 180), 'border': None, 'width': 0, 'radius': 0},
+    'banner':      {'fill': (0, 0, 0, 200), 'border': (255, 255, 0), 'width': 3, 'radius': 20},
+}
+
+
+# --- PATTERN: SINGLETON / FLYWEIGHT ---
+# One cache for every state: a surface is keyed by what it looks like
+# (size, theme, style / text, size, colour), never by who draws it.
+class UICache:
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(UICache, cls).__new__(cls)
+            cls._instance._fonts = {}
+            cls._instance._panels = {}
+            cls._instance._text = OrderedDict()
+            cls._instance._banners = OrderedDict()
+        return cls._instance
+
+    def font(self, size):
+        font = self._fonts.get(size)
+        if font is None:
+            font = self._fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def text(self, string, size, color):
+        """Rendered text surface; treat as read-only (shared)."""
+        key = (string, size, color)
+        surf = self._text.get(key)
+        if surf is None:
+            surf = self._text[key] = self.font(size).render(string, True, color)
+            if len(self._text) > TEXT_CACHE_SIZE:
+                self._text.popitem(last=False)
+        else:
+            self._text.move_to_end(key)
+        return surf
+
+    def panel(self, size, style):
+        """Rounded/bordered alpha panel for a PANEL_STYLES entry, per active theme."""
+        key = (size, settings.CURRENT_THEME, style)
+        surf = self._panels.get(key)
+        if surf is None:
+            surf = self._panels[key] = self._build_panel(size, PANEL_STYLES[style])
+        return surf
+
+    def banner(self, string, size, color, style='banner', pad=(30, 20)):
+        """Panel with centred text baked in: one blit (and one set_alpha) per frame."""
+        key = (string, size, color, settings.CURRENT_THEME, style)
+        surf = self._banners.get(key)
+        if surf is None:
+            text = self.font(size).render(string, True, color)
+            w, h = text.get_width() + pad[0] * 2, text.get_height() + pad[1] * 2
+            surf = self._banners[key] = self._build_panel((w, h), PANEL_STYLES[style])
+            surf.blit(text, pad)
+            if len(self._banners) > BANNER_CACHE_SIZE:
+                self._banners.popitem(last=False)
+        else:
+            self._banners.move_to_end(key)
+        return surf
+
+    def circle(self, radius, color):
+        """Alpha-blended disc (e.g. the dim backdrop of the power-up timers)."""
+        key = ('circle', radius, color)
+        surf = self._panels.get(key)
+        if surf is None:
+            surf = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(surf, color, (radius, radius), radius)
+            self._panels[key] = surf
+        return surf
+
+    def _build_panel(self, size, style):
+        theme = settings.get_theme_colors()
+        fill = theme[style['fill']] if isinstance(style['fill'], str) else style['fill']
+        surf = pygame.Surface(size, pygame.SRCALPHA)
+        rect = (0, 0, size[0], size[1])
+        pygame.draw.rect(surf, fill, rect, border_radius=style['radius'])
+        if style['border'] is not None:
+            border = theme[style['border']] if isinstance(style['border'], str) else style['border']
+            pygame.draw.rect(surf, (*border[:3], 255), rect, style['width'], border_radius=style['radius'])
+        return surf
+
+    def clear(self):
+        self._panels.clear()
+        self._text.clear()
+        self._banners.clear()
+
+UI = UICache()
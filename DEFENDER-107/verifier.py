@@ -0,0 +1,165 @@
+# verifier.py
+# Server-side score verification: submitted replays are re-simulated headlessly
+# (replay.play, the same WarState.update path the game runs) on a process pool.
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+# Longest game accepted for verification (30 minutes at 60 FPS)
+MAX_REPLAY_TICKS = 60 * 60 * 30
+# The CPU budget grows with the replay: a game gets at least ticks / this many seconds.
+# Re-simulation runs ~27k ticks/s here, so a 30-minute game (~11s allowed) never times
+# out for being long, while a stalled or pathological one still does.
+MIN_TICKS_PER_SECOND = 10000
+# Results that depend only on (replay, pilot, claimed score): safe to answer from the cache.
+# 'timeout' and 'error' come from the server's load at the time and are retried.
+FINAL_STATUSES = ('verified', 'rejected')
+
+log = logging.getLogger(__name__)
+
+
+# --- Pool side (runs in the worker processes) ---
+def _init_worker():
+    # pygame (dummy drivers) and the cached assets are set up once per process
+    import replay
+    replay.init_headless()
+
+def verify_replay(data, claimed_score, username, time_budget, max_ticks=MAX_REPLAY_TICKS):
+    """
+    Re-simulates one encoded replay submitted by `username`. time_budget is the
+    minimum CPU seconds for this job (raised for long games, see MIN_TICKS_PER_SECOND).
+    Returns {'status': 'verified'|'rejected'|'timeout'|'error', ...}.
+    """
+    import replay
+    start = time.process_time()
+    try:
+        r = replay.Replay.from_bytes(data, max_ticks=max_ticks)
+        if not r.outcome:
+            return {'status': 'rejected', 'reason': "replay has no outcome"}
+        if r.pilot != username:
+            # The name seeds the simulation: a re-labelled replay can't reproduce anyway
+            return {'status': 'rejected', 'reason': "replay was recorded by another pilot"}
+        time_budget = max(time_budget, len(r.frames) / MIN_TICKS_PER_SECOND)
+        from waves import SCENARIOS
+        if not SCENARIOS.get(r.scenario, {}).get('ranked'):
+            return {'status': 'rejected', 'reason': f"scenario {r.scenario!r} is not ranked"}
+        outcome = replay.play(r, should_stop=lambda: time.process_time() - start > time_budget)
+    except replay.ReplayError as e:
+        return {'status': 'rejected', 'reason': str(e)}
+    except TimeoutError as e:
+        return {'status': 'timeout', 'reason': str(e)}
+    except Exception as e:
+        return {'status': 'error', 'reason': repr(e)}
+    cpu_ms = round((time.process_time() - start) * 1000, 1)
+    if outcome != r.outcome:
+        return {'status': 'rejected', 'reason': "replay does not reproduce its outcome", 'cpu_ms': cpu_ms}
+    if outcome['score'] != claimed_score:
+        return {'status': 'rejected', 'reason': "claimed score does not match replay", 'cpu_ms': cpu_ms}
+    return {'status': 'verified', 'score': outcome['score'], 'wave': outcome['wave'],
+            'ticks': outcome['ticks'], 'cpu_ms': cpu_ms}
+
+def replay_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+# --- PATTERN: PRODUCER / CONSUMER ---
+# Request threads produce jobs, the process pool consumes them. The number of jobs
+# waiting or running is bounded (submit answers 'busy' past max_pending) so a burst
+# of submissions can't queue unbounded CPU work. Final results are cached per
+# (replay hash, pilot, claimed score): the same submission again is answered from the
+# cache and never re-simulated (nor counted twice on the verified board), while the
+# same replay with another claimed score is judged on its own.
+class ReplayVerifier:
+    def __init__(self, on_result, workers=None, time_budget=2.0, max_pending=64, cache_size=4096):
+        """
+        on_result(replay_hash, username, result): called once per finished job,
+        on a pool management thread (not in a request).
+        """
+        self._on_result = on_result
+        self.workers = workers or os.cpu_count() or 1
+        self.time_budget = time_budget
+        self.max_pending = max_pending
+        self._cache_size = cache_size
+        self._cache = OrderedDict()    # (hash, username, claimed score) -> final result
+        self._latest = OrderedDict()   # hash -> last result of any job on it (/verify/<id>)
+        self._inflight = set()         # (hash, username, claimed score)
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _pool(self):
+        # Created on first use, i.e. inside the serving process after any fork.
+        # 'spawn' children: forking a process that already runs request threads is unsafe.
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=_init_worker)
+        return self._executor
+
+    def submit(self, username, claimed_score, data):
+        """Returns (replay_hash, status). status: 'queued', 'busy' or a cached result status."""
+        h = replay_hash(data)
+        key = (h, username, claimed_score)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return h, cached['status']
+            if key in self._inflight:
+                return h, 'queued'
+            if len(self._inflight) >= self.max_pending:
+                return h, 'busy'
+            self._inflight.add(key)
+            pool = self._pool()
+        try:
+            future = pool.submit(verify_replay, data, claimed_score, username, self.time_budget)
+        except Exception:
+            # Broken pool (a worker died): start a fresh one for the next job
+            log.exception("ReplayVerifier: submit failed")
+            with self._lock:
+                self._inflight.discard(key)
+                self._executor = None
+            return h, 'busy'
+        future.add_done_callback(lambda f: self._done(key, f))
+        return h, 'queued'
+
+    def status(self, h):
+        """Result dict for a finished job, {'status': 'queued'} while running, else None."""
+        with self._lock:
+            if any(key[0] == h for key in self._inflight):
+                return {'status': 'queued'}
+            return self._latest.get(h)
+
+    @property
+    def pending(self):
+        return len(self._inflight)
+
+    def _done(self, key, future):
+        h, username, _ = key
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {'status': 'error', 'reason': repr(e)}
+        with self._lock:
+            self._inflight.discard(key)
+            if result['status'] in FINAL_STATUSES:
+                self._cache[key] = result
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+            self._latest[h] = result
+            self._latest.move_to_end(h)
+            while len(self._latest) > self._cache_size:
+                self._latest.popitem(last=False)
+        try:
+            self._on_result(h, username, result)
+        except Exception:
+            log.exception("ReplayVerifier: result handler failed")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,144 @@
+# waves.py
+# Data-driven wave engine: enemy mixes, counts, speeds and spawn pacing come from
+# the SCENARIOS table instead of being hard-coded in WarState.
+from collections import deque
+
+from settings import SCREEN_WIDTH, SPAWN_PER_TICK
+from entities import Drone, Hunter, Heavy, Asteroid
+
+ENEMY_TYPES = {'Drone': Drone, 'Hunter': Hunter, 'Heavy': Heavy}
+
+# Scenario keys:
+#   ranked          scores can reach the verified leaderboard
+#   waves           last wave before victory (None = endless)
+#   count           (base, per_wave): enemies in wave w = base + w * per_wave
+#   count_cap       max enemies per wave (None = no cap)
+#   speed           (per_wave, cap): speed bonus = min(cap, w * per_wave)
+#   mix             [(from_wave, {type: weight})]: the last entry with from_wave <= w applies
+#   wave_asteroids  (base, per_wave) asteroids spawned as part of each wave
+#   spawn_y         y range enemies enter from (above the screen)
+#   spawn_per_tick  max entities created per tick; the rest queue for the next ticks
+#   asteroid_chance / powerup_chance   per-tick odds out of 1000 (ambient spawns)
+#   player_lives    starting lives (None = FighterJet default)
+SCENARIOS = {
+    # The original 10-wave mission
+    'campaign': {
+        'ranked': True, 'waves': 10,
+        'count': (3, 1.5), 'count_cap': None, 'speed': (0.2, 3.0),
+        'mix': [(1, {'Drone': 1.0}),
+                (3, {'Drone': 0.7, 'Hunter': 0.3}),
+                (6, {'Drone': 0.5, 'Hunter': 0.3, 'Heavy': 0.2})],
+        'wave_asteroids': (0, 0), 'spawn_y': (-200, -50), 'spawn_per_tick': SPAWN_PER_TICK,
+        'asteroid_chance': 10, 'powerup_chance': 8, 'player_lives': None,
+    },
+    # Same curve, no victory: waves keep growing until the pilot falls
+    'endless': {
+        'ranked': True, 'waves': None,
+        'count': (3, 1.5), 'count_cap': 60, 'speed': (0.2, 3.0),
+        'mix': [(1, {'Drone': 1.0}),
+                (3, {'Drone': 0.7, 'Hunter': 0.3}),
+                (6, {'Drone': 0.5, 'Hunter': 0.3, 'Heavy': 0.2}),
+                (15, {'Drone': 0.4, 'Hunter': 0.35, 'Heavy': 0.25})],
+        'wave_asteroids': (0, 0.5), 'spawn_y': (-400, -50), 'spawn_per_tick': SPAWN_PER_TICK,
+        'asteroid_chance': 10, 'powerup_chance': 8, 'player_lives': None,
+    },
+    # Engine stress preset (OPTIONS, benchmark.py swarm): thousands of entities on screen.
+    # 25 per tick releases wave 1 over ~72 ticks; the spawn ticks then cost less than a
+    # steady-state tick with the whole wave alive (see benchmark.py swarm).
+    'swarm': {
+        'ranked': False, 'waves': None,
+        'count': (1000, 500), 'count_cap': 5000, 'speed': (0.1, 1.0),
+        'mix': [(1, {'Drone': 0.5, 'Hunter': 0.3, 'Heavy': 0.2})],
+        'wave_asteroids': (200, 100), 'spawn_y': (-3000, -50), 'spawn_per_tick': 25,
+        'asteroid_chance': 10, 'powerup_chance': 8, 'player_lives': 1000000,
+    },
+}
+
+
+class WaveDirector:
+    """
+    Plans each wave up front (all random rolls happen at wave start, from the
+    state's seeded rng) and releases the planned entities a few per tick, so a
+    5000-enemy wave costs spawn_per_tick constructions per frame, not one spike.
+    """
+    def __init__(self, scenario, rng):
+        if scenario not in SCENARIOS:
+            raise ValueError(f"unknown scenario {scenario!r}")
+        self.name = scenario
+        self.cfg = SCENARIOS[scenario]
+        self.rng = rng
+        self.pending = deque()   # (kind, x, y, speed_boost) not spawned yet
+
+    # --- Wave plan ---
+    def wave_size(self, wave):
+        base, per_wave = self.cfg['count']
+        count = base + int(wave * per_wave)
+        cap = self.cfg['count_cap']
+        return count if cap is None else min(count, cap)
+
+    def speed_boost(self, wave):
+        per_wave, cap = self.cfg['speed']
+        return min(cap, wave * per_wave) # Cap speed so it's not impossible
+
+    def mix_for(self, wave):
+        mix = self.cfg['mix'][0][1]
+        for from_wave, weights in self.cfg['mix']:
+            if wave >= from_wave:
+                mix = weights
+        return mix
+
+    def is_victory(self, wave):
+        return self.cfg['waves'] is not None and wave > self.cfg['waves']
+
+    def plan_wave(self, wave):
+        rng = self.rng
+        boost = self.speed_boost(wave)
+        kinds = list(self.mix_for(wave).items())
+        y_min, y_max = self.cfg['spawn_y']
+        for _ in range(self.wave_size(wave)):
+            x = rng.randint(50, SCREEN_WIDTH - 50)
+            y = rng.randint(y_min, y_max)
+            # Cumulative weights: same rolls as the original if/elif chains
+            roll = rng.random()
+            kind = kinds[-1][0]
+            for name, weight in kinds:
+                if roll < weight:
+                    kind = name
+                    break
+                roll -= weight
+            self.pending.append((kind, x, y, boost))
+        base, per_wave = self.cfg['wave_asteroids']
+        for _ in range(base + int(wave * per_wave)):
+            self.pending.append(('Asteroid', rng.randint(0, SCREEN_WIDTH), rng.randint(y_min, y_max), 0))
+
+    def spawn_pending(self, squadron, obstacles):
+        """Create up to spawn_per_tick planned entities (all of them if None)."""
+        budget = self.cfg['spawn_per_tick'] or len(self.pending)
+        pending = self.pending
+        while pending and budget > 0:
+            kind, x, y, boost = pending.popleft()
+            if kind == 'Asteroid':
+                obstacles.spawn(Asteroid, x, y, rng=self.rng)
+            else:
+                squadron.children.spawn(ENEMY_TYPES[kind], x, y, speed_mod=boost)
+            budget -= 1
+
+    # --- Ambient spawns (every tick) ---
+    def roll_asteroid(self):
+        """x of a new drifting asteroid, or None."""
+        if self.rng.randint(0, 1000) < self.cfg['asteroid_chance']:
+            return self.rng.randint(0, SCREEN_WIDTH)
+        return None
+
+    def roll_powerup(self, wave):
+        """(x, type) of a new power-up, or None."""
+        if self.rng.randint(0, 1000) >= self.cfg['powerup_chance']:
+            return None
+        x = self.rng.randint(50, SCREEN_WIDTH-50)
+        roll = self.rng.random()
+        # 1- the 3 shoots don't appears in the 3 first waves
+        if wave < 3:
+            p_type = 'SHIELD' if roll < 0.5 else 'LIFE'
+        else:
+            p_type = 'SHIELD' if roll < 0.4 else 'LIFE' if roll < 0.7 else 'RAPID'
+        return x, p_type
@@ -0,0 +1,216 @@
+# wire_format.py
+# Compact binary encoding for client -> server traffic (logs and scores).
+# Shared by api_logger.py (encoder) and server.py (decoder) so both sides
+# always agree on the layout. JSON stays the fallback format.
+import gzip
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Content types negotiated on /log/batch and /score
+JSON_CONTENT_TYPE = "application/json"
+LOG_BATCH_CONTENT_TYPE = "application/x-defender-logs"
+SCORE_CONTENT_TYPE = "application/x-defender-score"
+
+MAGIC = b"D7"
+VERSION = 1
+
+# Levels known by both sides are sent as a single byte code instead of a string.
+# Append only: the index IS the wire code.
+KNOWN_LEVELS = (
+    "SYSTEM", "STATE_TRANSITION", "GAME", "GAME_START", "CHARACTER_STATE",
+    "ENTITY_DESTROY", "PICKUP", "DAMAGE", "UPGRADE", "DECORATOR_REMOVE",
+    "STATUS", "DEATH", "RESULT", "EXPIRE", "SUMMARY",
+)
+_LEVEL_CODES = {name: i for i, name in enumerate(KNOWN_LEVELS)}
+
+# Don't bother compressing tiny bodies, the gzip header alone is ~20 bytes
+COMPRESS_MIN_BYTES = 256
+# Protect the server from decompression bombs
+MAX_DECODED_BYTES = 1 << 20
+
+
+class WireFormatError(ValueError):
+    pass
+
+
+# --- VARINT HELPERS (LEB128 + zigzag for signed deltas) ---
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(buf, pos):
+    result = 0
+    shift = 0
+    while True:
+        if pos >= len(buf):
+            raise WireFormatError("truncated varint")
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return result, pos
+        shift += 7
+        if shift > 63:
+            raise WireFormatError("varint too long")
+
+def _zigzag(n):
+    return (n << 1) if n >= 0 else ((-n << 1) - 1)
+
+def _unzigzag(n):
+    return (n >> 1) if not n & 1 else -((n + 1) >> 1)
+
+def _write_str(out, text):
+    raw = text.encode("utf-8")
+    _write_varint(out, len(raw))
+    out += raw
+
+def _read_str(buf, pos):
+    length, pos = _read_varint(buf, pos)
+    end = pos + length
+    if end > len(buf):
+        raise WireFormatError("truncated string")
+    return bytes(buf[pos:end]).decode("utf-8", errors="replace"), end
+
+def _check_header(buf):
+    if len(buf) < 3 or bytes(buf[:2]) != MAGIC:
+        raise WireFormatError("bad magic")
+    if buf[2] != VERSION:
+        raise WireFormatError(f"unsupported version {buf[2]}")
+    return 3
+
+
+# --- LOG BATCHES ---
+# Layout:
+#   MAGIC VERSION
+#   varint base_ts_ms
+#   varint n_extra_levels, then n strings  (levels not in KNOWN_LEVELS)
+#   varint n_records, then per record:
+#       varint level_code  (< len(KNOWN_LEVELS): static table, else extra table)
+#       zigzag varint ts delta from previous record (ms)
+#       string message
+def encode_log_batch(records):
+    """records: iterable of (level, message, ts_ms) tuples. Returns bytes."""
+    records = list(records)
+    extra = {}
+    for level, _, _ in records:
+        if level not in _LEVEL_CODES and level not in extra:
+            extra[level] = len(KNOWN_LEVELS) + len(extra)
+
+    out = bytearray(MAGIC)
+    out.append(VERSION)
+    base_ts = records[0][2] if records else 0
+    _write_varint(out, base_ts)
+    _write_varint(out, len(extra))
+    for level in extra:
+        _write_str(out, level)
+    _write_varint(out, len(records))
+    prev_ts = base_ts
+    for level, message, ts in records:
+        code = _LEVEL_CODES.get(level)
+        _write_varint(out, code if code is not None else extra[level])
+        _write_varint(out, _zigzag(ts - prev_ts))
+        prev_ts = ts
+        _write_str(out, message)
+    return bytes(out)
+
+def decode_log_batch(data):
+    """Inverse of encode_log_batch. Returns a list of (level, message, ts_ms)."""
+    buf = bytes(data)
+    pos = _check_header(buf)
+    ts, pos = _read_varint(buf, pos)
+    n_extra, pos = _read_varint(buf, pos)
+    levels = list(KNOWN_LEVELS)
+    for _ in range(n_extra):
+        level, pos = _read_str(buf, pos)
+        levels.append(level)
+    count, pos = _read_varint(buf, pos)
+    records = []
+    size = len(buf)
+    try:
+        for _ in range(count):
+            # Fast path: level codes, small deltas and short messages are single-byte varints
+            code = buf[pos]
+            if code < 0x80: pos += 1
+            else: code, pos = _read_varint(buf, pos)
+            delta = buf[pos]
+            if delta < 0x80: pos += 1
+            else: delta, pos = _read_varint(buf, pos)
+            length = buf[pos]
+            if length < 0x80: pos += 1
+            else: length, pos = _read_varint(buf, pos)
+            end = pos + length
+            if end > size:
+                raise WireFormatError("truncated string")
+            ts += (delta >> 1) if not delta & 1 else -((delta + 1) >> 1)
+            records.append((levels[code], buf[pos:end].decode("utf-8", errors="replace"), ts))
+            pos = end
+    except IndexError:
+        raise WireFormatError("truncated or corrupt batch")
+    return records
+
+
+# --- SCORES ---
+# Layout: MAGIC VERSION, string username, varint score
+#         [varint replay length, replay bytes]   (optional, see replay.py)
+def encode_score(username, score, replay=None):
+    out = bytearray(MAGIC)
+    out.append(VERSION)
+    _write_str(out, username)
+    _write_varint(out, max(0, int(score)))
+    if replay:
+        _write_varint(out, len(replay))
+        out += replay
+    return bytes(out)
+
+def decode_score(data):
+    buf = memoryview(data)
+    pos = _check_header(buf)
+    username, pos = _read_str(buf, pos)
+    score, pos = _read_varint(buf, pos)
+    result = {"username": username, "score": score}
+    if pos < len(buf):
+        length, pos = _read_varint(buf, pos)
+        if pos + length > len(buf):
+            raise WireFormatError("truncated replay")
+        result["replay"] = bytes(buf[pos:pos + length])
+    return result
+
+
+# --- COMPRESSION (Content-Encoding) ---
+def compress(body, encoding):
+    """Returns (body, content_encoding or None)."""
+    if not encoding or len(body) < COMPRESS_MIN_BYTES:
+        return body, None
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(body), "zstd"
+    if encoding in ("gzip", "zstd"):
+        return gzip.compress(body, compresslevel=6), "gzip"
+    return body, None
+
+def decompress(body, encoding):
+    """Decoded body; any corrupt, truncated or oversized input raises WireFormatError."""
+    if not encoding or encoding == "identity":
+        return body
+    if encoding == "gzip":
+        d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            out = d.decompress(body, MAX_DECODED_BYTES)
+        except zlib.error as e:
+            raise WireFormatError(f"corrupt gzip body: {e}")
+        if d.unconsumed_tail:
+            raise WireFormatError("decoded body too large")
+        if not d.eof:
+            raise WireFormatError("truncated gzip body")
+        return out
+    if encoding == "zstd" and zstandard is not None:
+        try:
+            return zstandard.ZstdDecompressor().decompress(body, max_output_size=MAX_DECODED_BYTES)
+        except zstandard.ZstdError as e:
+            raise WireFormatError(f"corrupt zstd body: {e}")
+    raise WireFormatError(f"unsupported content encoding {encoding}")